@@ -79,6 +79,43 @@ CREATE TABLE IF NOT EXISTS country_year_summary (
   INDEX idx_cys_slug (slug_game)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Tables de synthèse précalculées pour l'API, remplies par
+-- `python src/load_data_to_mysql.py --rollups` (INSERT ... SELECT sur medals,
+-- athletes et results, les tables des requêtes qu'elles remplacent).
+-- `position` conserve l'ordre de tri des agrégats.
+CREATE TABLE IF NOT EXISTS summary_medals_year_city (
+  position INT PRIMARY KEY,
+  year INT,
+  city VARCHAR(255),
+  medal VARCHAR(10) NOT NULL,
+  count INT NOT NULL,
+  INDEX idx_smyc_year (year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS summary_sport_totals (
+  position INT PRIMARY KEY,
+  sport VARCHAR(255) NOT NULL,
+  participants INT NOT NULL,
+  medals INT NOT NULL,
+  UNIQUE KEY uq_sst_sport (sport)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS summary_country_totals (
+  position INT PRIMARY KEY,
+  country VARCHAR(255) NOT NULL,
+  participants INT NOT NULL,
+  medals INT NOT NULL,
+  gold INT NOT NULL,
+  silver INT NOT NULL,
+  bronze INT NOT NULL,
+  UNIQUE KEY uq_sct_country (country)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS summary_stats (
+  name VARCHAR(50) PRIMARY KEY,
+  value BIGINT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Table des prédictions IA
 CREATE TABLE IF NOT EXISTS medal_predictions (
   id INT AUTO_INCREMENT PRIMARY KEY,
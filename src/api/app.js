@@ -6,6 +6,9 @@ const fs = require('fs');
 require('dotenv').config();
 
 const { testConnection, executeQuery, getStats } = require('./database');
+const resultShards = require('./resultShards');
+const filterIndex = require('./filterIndex');
+const { applyDemoFilters } = require('./demoFilters');
 
 const app = express();
 const PORT = process.env.PORT || 3001;
@@ -27,6 +30,8 @@ const COUNTRY_SUMMARY_CSV_PATH = path.join(PROJECT_ROOT, 'data', 'processed', 'c
 // Mode démo : sert les réponses depuis data/demo lorsqu'on exporte DEMO_MODE=true
 const IS_DEMO_MODE = String(process.env.DEMO_MODE || '').toLowerCase() === 'true';
 const DEMO_DATA_DIR = path.join(PROJECT_ROOT, 'data', 'demo');
+const DEMO_RESULTS_DIR = path.join(DEMO_DATA_DIR, 'results');
+const DEMO_FILTERS_DIR = path.join(DEMO_DATA_DIR, 'filters');
 
 const loadDemoJson = (fileName, options = {}) => {
   const { expectArray = false, fallbackValue = [] } = options;
@@ -67,6 +72,29 @@ const loadDemoJson = (fileName, options = {}) => {
   }
 };
 
+// Agrégats précalculés par build_demo_data.py (data/demo/rollup_*.json).
+// Renvoie null s'ils n'ont pas encore été générés : l'appelant recalcule alors depuis results.json.
+const loadDemoRollup = (fileName) => {
+  if (!fs.existsSync(path.join(DEMO_DATA_DIR, fileName))) {
+    return null;
+  }
+  return loadDemoJson(fileName, { fallbackValue: null });
+};
+
+// Tables summary_* remplies par `load_data_to_mysql.py --rollups`.
+// Renvoie null si elles sont absentes ou vides : l'appelant interroge alors les tables sources.
+const querySummary = async (query) => {
+  try {
+    const rows = await executeQuery(query);
+    return rows.length > 0 ? rows : null;
+  } catch (error) {
+    if (error.code === 'ER_NO_SUCH_TABLE') {
+      return null;
+    }
+    throw error;
+  }
+};
+
 const parseArrayParam = (value) => {
   if (Array.isArray(value)) {
     return value.map((item) => String(item).trim()).filter(Boolean);
@@ -77,73 +105,33 @@ const parseArrayParam = (value) => {
   return [];
 };
 
-const applyDemoFilters = (dataset, options = {}) => {
-  const {
-    yearMin,
-    yearMax,
-    seasons = [],
-    countries = [],
-    medalTypes = [],
-    sports = [],
-    gender,
-    search,
-    yearEquals,
-    sportEquals,
-    medalEquals
-  } = options;
+// results.json gardé en mémoire tant que le fichier ne change pas : les positions de
+// l'index des filtres y font référence.
+let cachedDemoResults = null;
 
-  const normalizedSearch = search ? String(search).toLowerCase() : null;
-  const normalizedYearMin = (typeof yearMin === 'number' && !Number.isNaN(yearMin)) ? yearMin : undefined;
-  const normalizedYearMax = (typeof yearMax === 'number' && !Number.isNaN(yearMax)) ? yearMax : undefined;
-  const normalizedYearEquals = (typeof yearEquals === 'number' && !Number.isNaN(yearEquals)) ? yearEquals : undefined;
+const loadDemoResults = () => {
+  const filePath = path.join(DEMO_DATA_DIR, 'results.json');
+  const { mtimeMs } = fs.statSync(filePath);
+  if (!cachedDemoResults || cachedDemoResults.mtimeMs !== mtimeMs) {
+    cachedDemoResults = { mtimeMs, rows: loadDemoJson('results.json', { expectArray: true }) };
+  }
+  return cachedDemoResults.rows;
+};
 
-  return dataset.filter((row) => {
-    if (typeof normalizedYearEquals === 'number' && row.year !== normalizedYearEquals) {
-      return false;
-    }
-    if (typeof normalizedYearMin === 'number' && row.year < normalizedYearMin) {
-      return false;
-    }
-    if (typeof normalizedYearMax === 'number' && row.year > normalizedYearMax) {
-      return false;
-    }
-    if (seasons.length > 0 && !seasons.includes(row.season)) {
-      return false;
-    }
-    if (countries.length > 0) {
-      const countryCandidates = [row.country, row.nationality].filter(Boolean);
-      const hasMatch = countryCandidates.some((value) => countries.includes(value));
-      if (!hasMatch) {
-        return false;
-      }
-    }
-    if (medalTypes.length > 0 && !medalTypes.includes(row.medal)) {
-      return false;
-    }
-    if (sports.length > 0 && !sports.includes(row.sport)) {
-      return false;
-    }
-    if (sportEquals && row.sport !== sportEquals) {
-      return false;
-    }
-    if (medalEquals && row.medal !== medalEquals) {
-      return false;
-    }
-    if (gender && row.gender !== gender) {
-      return false;
-    }
-    if (normalizedSearch) {
-      const haystacks = [row.name, row.sport, row.nationality, row.country, row.city]
-        .filter(Boolean)
-        .map((value) => String(value).toLowerCase());
-      const found = haystacks.some((value) => value.includes(normalizedSearch));
-      if (!found) {
-        return false;
-      }
-    }
+// applyDemoFilters sur results.json, via l'index inversé quand il est à jour :
+// seules les lignes candidates sont parcourues pour la recherche libre.
+const filterDemoResults = (options = {}) => {
+  const resultsData = loadDemoResults();
+  const index = filterIndex.loadFilterIndex(DEMO_FILTERS_DIR);
+  if (!index || index.rows !== resultsData.length) {
+    return applyDemoFilters(resultsData, options);
+  }
 
-    return true;
-  });
+  const positions = filterIndex.lookupPositions(index, options);
+  const candidates = positions === null
+    ? resultsData
+    : Array.from(positions, (position) => resultsData[position]);
+  return options.search ? applyDemoFilters(candidates, { search: options.search }) : candidates;
 };
 
 const paginateArray = (items, limit, offset) => items.slice(offset, offset + limit);
@@ -462,6 +450,11 @@ app.get('/api', (req, res) => {
 app.get('/api/stats', async (req, res) => {
   if (IS_DEMO_MODE) {
     try {
+      const rollup = loadDemoRollup('rollup_stats.json');
+      if (rollup) {
+        return res.json(rollup);
+      }
+
   const athletes = loadDemoJson('athletes.json', { expectArray: true });
   const results = loadDemoJson('results.json', { expectArray: true });
       const uniqueSports = new Set(results.map((row) => row.sport)).size;
@@ -479,6 +472,11 @@ app.get('/api/stats', async (req, res) => {
   }
 
   try {
+    const summary = await querySummary('SELECT name, value FROM summary_stats');
+    if (summary) {
+      return res.json(Object.fromEntries(summary.map((row) => [row.name, Number(row.value)])));
+    }
+
     const stats = await getStats();
     res.json(stats);
   } catch (error) {
@@ -550,6 +548,12 @@ app.get('/api/hosts', async (req, res) => {
 app.get('/api/medals', async (req, res) => {
   try {
     if (IS_DEMO_MODE) {
+      const rollup = loadDemoRollup('rollup_medals.json');
+      if (rollup) {
+        console.log(`[DEMO_MODE] /api/medals renvoie ${rollup.length} lignes précalculées.`);
+        return res.json(rollup);
+      }
+
   const results = loadDemoJson('results.json', { expectArray: true });
       const summaryMap = new Map();
       const medalPriority = { GOLD: 0, SILVER: 1, BRONZE: 2 };
@@ -580,6 +584,13 @@ app.get('/api/medals', async (req, res) => {
       return res.json(medals);
     }
 
+    const summary = await querySummary(
+      'SELECT year, city, medal, count FROM summary_medals_year_city ORDER BY position'
+    );
+    if (summary) {
+      return res.json(summary);
+    }
+
     const query = `
       SELECT year, city, medal, COUNT(*) as count
       FROM medals 
@@ -651,16 +662,26 @@ app.get('/api/results', async (req, res) => {
     });
 
     if (IS_DEMO_MODE) {
-      const resultsData = loadDemoJson('results.json', { expectArray: true });
-      const filtered = applyDemoFilters(resultsData, {
-        sportEquals: sport || undefined,
-        yearEquals: normalizedYear,
-        gender: gender || undefined,
-        medalEquals: medal || undefined,
-        countries: uniqueCountries
-      });
+      // Filtres limités à (année, sport) : lecture directe de la page dans les shards indexés.
+      const manifest = !gender && !medal && uniqueCountries.length === 0
+        ? resultShards.loadManifest(DEMO_RESULTS_DIR)
+        : null;
+      let filtered = null;
+      let total;
+      if (manifest) {
+        total = resultShards.rowRanges(manifest, { year: normalizedYear, sport: sport || undefined })
+          .reduce((sum, [, rows]) => sum + rows, 0);
+      } else {
+        filtered = filterDemoResults({
+          sportEquals: sport || undefined,
+          yearEquals: normalizedYear,
+          gender: gender || undefined,
+          medalEquals: medal || undefined,
+          countries: uniqueCountries
+        });
+        total = filtered.length;
+      }
 
-      const total = filtered.length;
       const totalPages = parsedLimit > 0 ? Math.ceil(total / parsedLimit) : 0;
       const computedPage = requestedPage || (total === 0 ? 0 : Math.floor(requestedOffset / parsedLimit) + 1);
       const currentPage = total === 0
@@ -670,8 +691,15 @@ app.get('/api/results', async (req, res) => {
         ? 0
         : Math.min((currentPage - 1) * parsedLimit, Math.max(total - parsedLimit, 0));
 
-      const paginated = filtered.slice(effectiveOffset, effectiveOffset + parsedLimit);
-      console.log(`[DEMO_MODE] /api/results -> ${paginated.length} éléments renvoyés (total filtré: ${filtered.length}).`);
+      const paginated = manifest
+        ? resultShards.readPage(DEMO_RESULTS_DIR, manifest, {
+          year: normalizedYear,
+          sport: sport || undefined,
+          offset: effectiveOffset,
+          limit: parsedLimit
+        }).rows
+        : filtered.slice(effectiveOffset, effectiveOffset + parsedLimit);
+      console.log(`[DEMO_MODE] /api/results -> ${paginated.length} éléments renvoyés (total filtré: ${total}).`);
       return res.json({
         results: paginated,
         total,
@@ -1196,6 +1224,13 @@ app.get('/api/sports', async (req, res) => {
 app.get('/api/sports/top', async (req, res) => {
   try {
     if (IS_DEMO_MODE) {
+      const rollup = loadDemoRollup('rollup_sports.json');
+      if (rollup) {
+        const sports = rollup.slice(0, 10).map(({ sport, participants }) => ({ sport, participants }));
+        console.log(`[DEMO_MODE] /api/sports/top -> ${sports.length} entrées précalculées.`);
+        return res.json(sports);
+      }
+
   const results = loadDemoJson('results.json', { expectArray: true });
       const tally = new Map();
 
@@ -1216,6 +1251,13 @@ app.get('/api/sports/top', async (req, res) => {
       return res.json(sports);
     }
 
+    const summary = await querySummary(
+      'SELECT sport, participants FROM summary_sport_totals ORDER BY position LIMIT 10'
+    );
+    if (summary) {
+      return res.json(summary);
+    }
+
     const query = `
       SELECT sport, COUNT(*) AS participants
       FROM medals
@@ -1390,13 +1432,12 @@ app.get('/api/stats/quick', async (req, res) => {
     console.log('📊 /api/stats/quick - Filtres reçus:', filters);
     
     if (IS_DEMO_MODE) {
-  const resultsData = loadDemoJson('results.json', { expectArray: true });
       const seasons = parseArrayParam(filters.seasons);
       const countries = parseArrayParam(filters.countries);
       const medalTypes = parseArrayParam(filters.medalTypes).map((value) => value.toUpperCase());
       const sports = parseArrayParam(filters.sports);
 
-      const filtered = applyDemoFilters(resultsData, {
+      const filtered = filterDemoResults({
         yearMin: filters.yearMin ? parseInt(filters.yearMin, 10) : undefined,
         yearMax: filters.yearMax ? parseInt(filters.yearMax, 10) : undefined,
         seasons,
@@ -1525,7 +1566,6 @@ app.post('/api/data/filtered', async (req, res) => {
     console.log('📊 Agrégations demandées:', aggregations);
     
     if (IS_DEMO_MODE) {
-  const resultsData = loadDemoJson('results.json', { expectArray: true });
       const seasons = Array.isArray(filters.seasons) ? filters.seasons : parseArrayParam(filters.seasons);
       const countries = Array.isArray(filters.countries) ? filters.countries : parseArrayParam(filters.countries);
       const medalTypes = (Array.isArray(filters.medalTypes) ? filters.medalTypes : parseArrayParam(filters.medalTypes))
@@ -1535,7 +1575,7 @@ app.post('/api/data/filtered', async (req, res) => {
       const limitValue = Math.max(parseInt(pagination.limit, 10) || 50, 1);
       const offsetValue = Math.max(parseInt(pagination.offset, 10) || 0, 0);
 
-      const filtered = applyDemoFilters(resultsData, {
+      const filtered = filterDemoResults({
         yearMin: filters.yearMin ? parseInt(filters.yearMin, 10) : undefined,
         yearMax: filters.yearMax ? parseInt(filters.yearMax, 10) : undefined,
         seasons,
@@ -1904,4 +1944,4 @@ if (require.main === module) {
 }
 
 module.exports = app;
-module.exports.startServer = startServer;
\ No newline at end of file
+module.exports.startServer = startServer;
\ No newline at end of file
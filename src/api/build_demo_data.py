@@ -7,13 +7,25 @@ fichiers locaux contenant l'ensemble des données réelles.
 from __future__ import annotations
 
 import json
+import sys
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.data_prep.filter_index import write_filter_index
+from src.data_prep.load_data import read_config
+from src.data_prep.name_index import write_name_index
+from src.data_prep.result_shards import frame_order, write_result_shards
+from src.data_prep.rollups import ROLLUP_FILES, json_records, rollups_from_rows
+from src.data_prep.storage import read_dataset
+
 DATA_DIR = PROJECT_ROOT / "data"
 PROCESSED_DIR = DATA_DIR / "processed"
 REPORTS_DIR = PROJECT_ROOT / "reports"
@@ -23,6 +35,25 @@ DEMO_DIR.mkdir(parents=True, exist_ok=True)
 CURRENT_YEAR = 2024
 DEFAULT_MODEL_NAME = "regression_baseline_v1"
 DEFAULT_TARGET = "medals_total"
+JSON_CHUNK_ROWS = 50_000
+
+RESULT_COLUMNS = [
+    "id",
+    "athlete_id",
+    "name",
+    "gender",
+    "age",
+    "nationality",
+    "country",
+    "year",
+    "season",
+    "city",
+    "sport",
+    "event",
+    "medal",
+    "slug_game",
+    "country_code",
+]
 DEFAULT_CREATED_AT = datetime.now(UTC).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
@@ -79,10 +110,90 @@ def compute_age(year_of_birth: Optional[float]) -> Optional[int]:
     return CURRENT_YEAR - year_value if year_value > 0 else None
 
 
+def text_values(series: pd.Series) -> pd.Series:
+    """Valeurs textuelles, chaînes vides comprises comme manquantes (équivalent de ``value or None``)."""
+    return series.where(series.notna() & (series != ""))
+
+
+def compute_ages(years_of_birth: pd.Series) -> pd.Series:
+    """Version vectorisée de ``compute_age``."""
+    if pd.api.types.is_numeric_dtype(years_of_birth):
+        birth = np.trunc(years_of_birth.astype("float64"))
+        return (CURRENT_YEAR - birth).where(birth > 0).astype("Int64")
+    return years_of_birth.map(compute_age).astype("Int64")
+
+
+def build_results_frame(full_df: pd.DataFrame, hosts_map: Dict[str, Dict[str, Optional[str]]]) -> pd.DataFrame:
+    """Lignes de results.json (colonnes RESULT_COLUMNS) et colonnes de travail pour les athlètes.
+
+    Une ligne par résultat nommant un athlète. Les identifiants d'athlètes suivent l'ordre
+    de première apparition de ``athlete_url`` (ou du nom), les attributs de l'édition
+    viennent d'une jointure sur ``hosts_map``.
+    """
+    urls = text_values(full_df["athlete_url"])
+    names = text_values(full_df["athlete_full_name"])
+    keys = urls.fillna(names)
+    source = full_df[keys.notna().to_numpy()].reset_index(drop=True)
+    keys = keys.dropna().reset_index(drop=True)
+
+    hosts = pd.DataFrame.from_dict(hosts_map, orient="index")
+    slugs = text_values(source["slug_game"])
+    host_years = pd.to_numeric(slugs.map(hosts["year"]), errors="coerce")
+    slug_suffix = slugs.str.rsplit("-", n=1).str[-1]
+    slug_years = pd.to_numeric(slug_suffix.where(slug_suffix.str.isdigit().fillna(False).astype(bool)), errors="coerce")
+    nationality = text_values(source["country_name"])
+
+    return pd.DataFrame({
+        "id": np.arange(1, len(source) + 1),
+        "athlete_id": pd.factorize(keys)[0] + 1,
+        "name": text_values(source["athlete_full_name"]),
+        "gender": None,
+        "age": compute_ages(source["athlete_year_birth"]),
+        "nationality": nationality,
+        "country": nationality,
+        # Année de l'édition, sinon celle du slug (comme ``host_year or slug_year``)
+        "year": host_years.where(host_years.notna() & (host_years != 0), slug_years).astype("Int64"),
+        "season": slugs.map(hosts["season"]),
+        "city": slugs.map(hosts["city"]),
+        "sport": text_values(source["discipline_title"]),
+        "event": text_values(source["event_title"]),
+        "medal": text_values(source["medal_type_final"]).fillna(text_values(source["medal_type"])),
+        "slug_game": slugs,
+        "country_code": text_values(source["country_code"]),
+        "athlete_key": keys,
+        "profile_url": text_values(source["athlete_url"]),
+        "games_participations": source["games_participations"],
+        "first_game": text_values(source["first_game"]),
+    })
+
+
+def build_athletes_frame(results_df: pd.DataFrame) -> pd.DataFrame:
+    """Un athlète par identifiant : attributs de sa première ligne, âge et nationalité
+    pris sur la première ligne qui les renseigne."""
+    first_rows = results_df.drop_duplicates("athlete_id")
+    grouped = results_df.groupby("athlete_id", sort=True)
+    nationality = grouped["nationality"].first().to_numpy()
+    participations = [
+        int(value) if str(value).isdigit() else None
+        for value in first_rows["games_participations"].tolist()
+    ]
+    return pd.DataFrame({
+        "id": first_rows["athlete_id"].to_numpy(),
+        "name": first_rows["name"].to_numpy(),
+        "gender": None,
+        "age": grouped["age"].first().reset_index(drop=True),
+        "nationality": nationality,
+        "country": nationality,
+        "games_participations": pd.Series(participations, dtype=object),
+        "first_game": first_rows["first_game"].to_numpy(),
+        "profile_url": first_rows["profile_url"].to_numpy(),
+    })
+
+
 def build_demo_datasets() -> None:
     hosts_map = load_hosts()
 
-    full_path = PROCESSED_DIR / "olympic_full.csv"
+    data_cfg = read_config()
     usecols = [
         "discipline_title",
         "event_title",
@@ -98,72 +209,17 @@ def build_demo_datasets() -> None:
         "first_game",
         "athlete_year_birth",
     ]
-    full_df = pd.read_csv(full_path, usecols=usecols)
-    full_df = full_df.fillna("")
-
-    athlete_registry: Dict[str, Dict[str, Optional[str]]] = {}
-    athlete_id_map: Dict[str, int] = {}
-    results_payload: List[Dict[str, Optional[str]]] = []
-
-    next_athlete_id = 1
-    next_result_id = 1
-
-    for row in full_df.to_dict(orient="records"):
-        athlete_name = row.get("athlete_full_name") or None
-        athlete_url = row.get("athlete_url") or None
-        athlete_key = athlete_url or athlete_name
-        if not athlete_key:
-            continue
-
-        if athlete_key not in athlete_id_map:
-            athlete_id_map[athlete_key] = next_athlete_id
-            athlete_registry[athlete_key] = {
-                "id": next_athlete_id,
-                "name": athlete_name,
-                "gender": None,
-                "age": compute_age(row.get("athlete_year_birth")),
-                "nationality": row.get("country_name") or None,
-                "country": row.get("country_name") or None,
-                "games_participations": int(row["games_participations"]) if str(row.get("games_participations", "")).isdigit() else None,
-                "first_game": row.get("first_game") or None,
-                "profile_url": athlete_url,
-            }
-            next_athlete_id += 1
-        else:
-            # Mettre à jour la nationalité/âge si manquants
-            athlete_record = athlete_registry[athlete_key]
-            if not athlete_record.get("nationality") and row.get("country_name"):
-                athlete_record["nationality"] = row.get("country_name")
-                athlete_record["country"] = row.get("country_name")
-            if athlete_record.get("age") is None:
-                athlete_record["age"] = compute_age(row.get("athlete_year_birth"))
-
-        host_info = hosts_map.get(row.get("slug_game"), {})
-        year_value = host_info.get("year") or extract_year_from_slug(row.get("slug_game"))
-
-        nationality_value = row.get("country_name") or None
-
-        result_entry = {
-            "id": next_result_id,
-            "athlete_id": athlete_id_map[athlete_key],
-            "name": athlete_name,
-            "gender": None,
-            "age": compute_age(row.get("athlete_year_birth")),
-            "nationality": nationality_value,
-            "country": nationality_value,
-            "year": year_value,
-            "season": host_info.get("season"),
-            "city": host_info.get("city"),
-            "sport": row.get("discipline_title") or None,
-            "event": row.get("event_title") or None,
-            "medal": (row.get("medal_type_final") or row.get("medal_type") or None) or None,
-            "slug_game": row.get("slug_game") or None,
-            "country_code": row.get("country_code") or None,
-        }
-        results_payload.append(result_entry)
-        next_result_id += 1
-
-    athletes_payload = sorted(athlete_registry.values(), key=lambda item: item["id"])
+    full_df = read_dataset(PROCESSED_DIR, "olympic_full", columns=usecols, config=data_cfg)
+    results_df = build_results_frame(full_df, hosts_map)
+    del full_df
+    athletes_df = build_athletes_frame(results_df)
+    # results.json suit l'ordre des shards et de MySQL (année décroissante, sport, nom) :
+    # /api/results garde le même ordre quels que soient les filtres actifs.
+    results_df = results_df.take(frame_order(results_df)).reset_index(drop=True)
+
+    # Agrégats précalculés servis par l'API (au lieu de regrouper results.json à chaque requête)
+    rollup_rows = results_df[["athlete_key", "year", "city", "sport", "nationality", "medal"]]
+    rollups = rollups_from_rows(rollup_rows.rename(columns={"nationality": "country"}))
 
     hosts_payload = [
         {
@@ -179,8 +235,7 @@ def build_demo_datasets() -> None:
         for data in hosts_map.values()
     ]
 
-    summary_path = PROCESSED_DIR / "country_year_summary.csv"
-    summary_df = pd.read_csv(summary_path)
+    summary_df = read_dataset(PROCESSED_DIR, "country_year_summary", config=data_cfg)
     summary_df = summary_df.fillna("")
     summary_payload = summary_df.to_dict(orient="records")
 
@@ -212,11 +267,24 @@ def build_demo_datasets() -> None:
             }
         )
 
-    write_json(DEMO_DIR / "athletes.json", athletes_payload)
-    write_json(DEMO_DIR / "results.json", results_payload)
+    results_df = results_df[RESULT_COLUMNS]
+    write_json_frame(DEMO_DIR / "athletes.json", athletes_df)
+    write_json_frame(DEMO_DIR / "results.json", results_df)
+    # Mêmes lignes, dans le même ordre, découpées en shards NDJSON indexés pour la pagination
+    manifest = write_result_shards(results_df, DEMO_DIR / "results")
+    print(f"✅ Wrote {DEMO_DIR / 'results'} ({manifest['total']} objects, {len(manifest['shards'])} shards)")
+    # Index inversés (listes de positions par valeur) pour filtrer results.json sans le parcourir
+    filters_index = write_filter_index(results_df, DEMO_DIR / "filters")
+    print(f"✅ Wrote {DEMO_DIR / 'filters'} ({sum(len(entries) for entries in filters_index['fields'].values())} posting lists)")
+    # Index de recherche des noms d'athlètes (préfixes et trigrammes), classé par nombre de médailles
+    medal_counts = results_df.loc[results_df["medal"].notna(), "athlete_id"].value_counts().to_dict()
+    index_size = write_name_index(json_records(athletes_df[["id", "name"]]), medal_counts, DEMO_DIR / "athlete_names.idx")
+    print(f"✅ Wrote {DEMO_DIR / 'athlete_names.idx'} ({len(athletes_df)} athletes, {index_size} bytes)")
     write_json(DEMO_DIR / "hosts.json", hosts_payload)
     write_json(DEMO_DIR / "country_year_summary_demo.json", summary_payload)
     write_json(DEMO_DIR / "medal_predictions_demo.json", predictions_payload)
+    for name, file_name in ROLLUP_FILES.items():
+        write_json(DEMO_DIR / file_name, rollups[name])
 
 
 def write_json(path: Path, payload: List[Dict[str, Optional[str]]]) -> None:
@@ -227,5 +295,20 @@ def write_json(path: Path, payload: List[Dict[str, Optional[str]]]) -> None:
     print(f"✅ Wrote {path} ({len(payload)} objects)")
 
 
+def write_json_frame(path: Path, frame: pd.DataFrame, chunk_size: int = JSON_CHUNK_ROWS) -> None:
+    """Écrit ``frame`` comme ``write_json`` écrirait ses enregistrements, par blocs de ``chunk_size`` lignes."""
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as stream:
+        stream.write("[")
+        for start in range(0, len(frame), chunk_size):
+            if start:
+                stream.write(", ")
+            # Les crochets du bloc sont retirés : même séparateur ", " que json.dump sur la liste entière
+            stream.write(json.dumps(json_records(frame.iloc[start:start + chunk_size]), ensure_ascii=True)[1:-1])
+        stream.write("]")
+    temp_path.replace(path)
+    print(f"✅ Wrote {path} ({len(frame)} objects)")
+
+
 if __name__ == "__main__":
     build_demo_datasets()
@@ -0,0 +1,73 @@
+// Filtre linéaire des lignes de démonstration (results.json) selon les options des routes
+// /api/results, /api/stats/quick et /api/data/filtered. C'est la référence de l'index
+// inversé de filterIndex.js, qui doit renvoyer exactement les mêmes lignes.
+const applyDemoFilters = (dataset, options = {}) => {
+  const {
+    yearMin,
+    yearMax,
+    seasons = [],
+    countries = [],
+    medalTypes = [],
+    sports = [],
+    gender,
+    search,
+    yearEquals,
+    sportEquals,
+    medalEquals
+  } = options;
+
+  const normalizedSearch = search ? String(search).toLowerCase() : null;
+  const normalizedYearMin = (typeof yearMin === 'number' && !Number.isNaN(yearMin)) ? yearMin : undefined;
+  const normalizedYearMax = (typeof yearMax === 'number' && !Number.isNaN(yearMax)) ? yearMax : undefined;
+  const normalizedYearEquals = (typeof yearEquals === 'number' && !Number.isNaN(yearEquals)) ? yearEquals : undefined;
+
+  return dataset.filter((row) => {
+    if (typeof normalizedYearEquals === 'number' && row.year !== normalizedYearEquals) {
+      return false;
+    }
+    if (typeof normalizedYearMin === 'number' && row.year < normalizedYearMin) {
+      return false;
+    }
+    if (typeof normalizedYearMax === 'number' && row.year > normalizedYearMax) {
+      return false;
+    }
+    if (seasons.length > 0 && !seasons.includes(row.season)) {
+      return false;
+    }
+    if (countries.length > 0) {
+      const countryCandidates = [row.country, row.nationality].filter(Boolean);
+      const hasMatch = countryCandidates.some((value) => countries.includes(value));
+      if (!hasMatch) {
+        return false;
+      }
+    }
+    if (medalTypes.length > 0 && !medalTypes.includes(row.medal)) {
+      return false;
+    }
+    if (sports.length > 0 && !sports.includes(row.sport)) {
+      return false;
+    }
+    if (sportEquals && row.sport !== sportEquals) {
+      return false;
+    }
+    if (medalEquals && row.medal !== medalEquals) {
+      return false;
+    }
+    if (gender && row.gender !== gender) {
+      return false;
+    }
+    if (normalizedSearch) {
+      const haystacks = [row.name, row.sport, row.nationality, row.country, row.city]
+        .filter(Boolean)
+        .map((value) => String(value).toLowerCase());
+      const found = haystacks.some((value) => value.includes(normalizedSearch));
+      if (!found) {
+        return false;
+      }
+    }
+
+    return true;
+  });
+};
+
+module.exports = { applyDemoFilters };
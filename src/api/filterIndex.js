@@ -0,0 +1,128 @@
+// Index inversés des filtres de results.json écrits par build_demo_data.py (data/demo/filters/).
+// Même logique que src/data_prep/filter_index.py : une liste triée de positions par valeur
+// (année, saison, sport, médaille, genre, pays), union des valeurs d'un même champ puis
+// intersection des champs. La recherche libre reste un filtre appliqué aux seuls candidats.
+const fs = require('fs');
+const path = require('path');
+
+const INDEX_NAME = 'index.json';
+const POSTINGS_NAME = 'postings.bin';
+
+let cachedIndex = null;
+
+// Renvoie null si l'index n'a pas été généré. Il est relu quand index.json change.
+const loadFilterIndex = (directory) => {
+  const indexPath = path.join(directory, INDEX_NAME);
+  let stats;
+  try {
+    stats = fs.statSync(indexPath);
+  } catch (error) {
+    return null;
+  }
+  if (cachedIndex && cachedIndex.path === indexPath && cachedIndex.mtimeMs === stats.mtimeMs) {
+    return cachedIndex.index;
+  }
+
+  const payload = JSON.parse(fs.readFileSync(indexPath, 'utf-8'));
+  const buffer = fs.readFileSync(path.join(directory, POSTINGS_NAME));
+  const postings = new Uint32Array(buffer.length / 4);
+  for (let position = 0; position < postings.length; position += 1) {
+    postings[position] = buffer.readUInt32LE(position * 4);
+  }
+  const fields = {};
+  Object.entries(payload.fields).forEach(([field, entries]) => {
+    fields[field] = new Map(entries.map(([value, start, count]) => [value, postings.subarray(start, start + count)]));
+  });
+
+  const index = { rows: payload.rows, fields };
+  cachedIndex = { path: indexPath, mtimeMs: stats.mtimeMs, index };
+  return index;
+};
+
+// Positions (triées) des lignes retenues par les filtres indexés d'applyDemoFilters,
+// ou null si aucun de ces filtres n'est actif.
+const lookupPositions = (index, options = {}) => {
+  const {
+    yearMin,
+    yearMax,
+    yearEquals,
+    seasons = [],
+    countries = [],
+    medalTypes = [],
+    sports = [],
+    gender,
+    sportEquals,
+    medalEquals
+  } = options;
+  const isYear = (value) => typeof value === 'number' && !Number.isNaN(value);
+  const { fields } = index;
+  const constraints = [];
+
+  if (isYear(yearEquals) || isYear(yearMin) || isYear(yearMax)) {
+    // Comme le filtre linéaire, une année absente est comparée comme 0.
+    constraints.push(Array.from(fields.year.entries())
+      .filter(([value]) => (!isYear(yearEquals) || value === yearEquals)
+        && (!isYear(yearMin) || (value || 0) >= yearMin)
+        && (!isYear(yearMax) || (value || 0) <= yearMax))
+      .map(([, positions]) => positions));
+  }
+  [['season', seasons], ['country', countries], ['medal', medalTypes], ['sport', sports]].forEach(([field, values]) => {
+    if (values.length > 0) {
+      constraints.push([...new Set(values)].filter((value) => fields[field].has(value)).map((value) => fields[field].get(value)));
+    }
+  });
+  [['sport', sportEquals], ['medal', medalEquals], ['gender', gender]].forEach(([field, value]) => {
+    if (value) {
+      constraints.push(fields[field].has(value) ? [fields[field].get(value)] : []);
+    }
+  });
+
+  if (constraints.length === 0) {
+    return null;
+  }
+
+  const unions = constraints.map(unionPositions).sort((a, b) => a.length - b.length);
+  return unions.slice(1).reduce(intersectPositions, unions[0]);
+};
+
+// Union triée et sans doublon des listes d'un champ (celles du pays peuvent se recouper).
+const unionPositions = (lists) => {
+  if (lists.length === 1) {
+    return lists[0];
+  }
+  const merged = new Uint32Array(lists.reduce((sum, positions) => sum + positions.length, 0));
+  let cursor = 0;
+  lists.forEach((positions) => {
+    merged.set(positions, cursor);
+    cursor += positions.length;
+  });
+  merged.sort();
+  let size = 0;
+  for (let position = 0; position < merged.length; position += 1) {
+    if (size === 0 || merged[position] !== merged[size - 1]) {
+      merged[size] = merged[position];
+      size += 1;
+    }
+  }
+  return merged.subarray(0, size);
+};
+
+// Intersection de deux listes triées, la plus courte en premier.
+const intersectPositions = (shorter, longer) => {
+  const kept = new Uint32Array(shorter.length);
+  let size = 0;
+  let cursor = 0;
+  for (let position = 0; position < shorter.length && cursor < longer.length; position += 1) {
+    const value = shorter[position];
+    while (cursor < longer.length && longer[cursor] < value) {
+      cursor += 1;
+    }
+    if (longer[cursor] === value) {
+      kept[size] = value;
+      size += 1;
+    }
+  }
+  return kept.subarray(0, size);
+};
+
+module.exports = { loadFilterIndex, lookupPositions };
@@ -0,0 +1,108 @@
+// Lecture paginée des shards NDJSON écrits par build_demo_data.py (data/demo/results/).
+// Même logique que src/data_prep/result_shards.py : le manifest donne, par shard, l'offset
+// en octets d'une ligne sur `stride` et, par partition (année, sport), sa première ligne.
+// Seules les lignes de la page demandée sont lues et décodées.
+const fs = require('fs');
+const path = require('path');
+
+const MANIFEST_NAME = 'manifest.json';
+
+let cachedManifest = null;
+
+// Renvoie null si les shards n'ont pas été générés. Le manifest est relu quand il change.
+const loadManifest = (directory) => {
+  const manifestPath = path.join(directory, MANIFEST_NAME);
+  let stats;
+  try {
+    stats = fs.statSync(manifestPath);
+  } catch (error) {
+    return null;
+  }
+  if (!cachedManifest || cachedManifest.path !== manifestPath || cachedManifest.mtimeMs !== stats.mtimeMs) {
+    cachedManifest = {
+      path: manifestPath,
+      mtimeMs: stats.mtimeMs,
+      manifest: JSON.parse(fs.readFileSync(manifestPath, 'utf-8'))
+    };
+  }
+  return cachedManifest.manifest;
+};
+
+// Plages [firstRow, rows, partition] correspondant aux filtres, dans l'ordre des shards.
+const rowRanges = (manifest, { year, sport } = {}) => {
+  const hasYear = typeof year === 'number';
+  if (!hasYear && !sport) {
+    return [[0, manifest.total, null]];
+  }
+  const matches = manifest.partitions.filter((entry) => (
+    (!hasYear || entry.year === year) && (!sport || entry.sport === sport)
+  ));
+  if (!sport && matches.length > 0) {
+    // Les partitions d'une même année sont contiguës : une seule plage.
+    const rows = matches.reduce((sum, entry) => sum + entry.rows, 0);
+    return [[matches[0].first_row, rows, matches[0]]];
+  }
+  return matches.map((entry) => [entry.first_row, entry.rows, entry]);
+};
+
+// Lignes [start, stop) d'un même shard, lues depuis l'offset connu le plus proche.
+const readSpan = (directory, manifest, start, stop, anchor) => {
+  const { stride } = manifest;
+  const shardIndex = Math.floor(start / manifest.shard_size);
+  const shard = manifest.shards[shardIndex];
+  const localStart = start - shard.first_row;
+  const localStop = stop - shard.first_row;
+
+  let firstLine = Math.floor(localStart / stride) * stride;
+  let begin = shard.offsets[Math.floor(localStart / stride)];
+  if (anchor && anchor.shard === shardIndex) {
+    const anchorLine = anchor.first_row - shard.first_row;
+    if (firstLine < anchorLine && anchorLine <= localStart) {
+      firstLine = anchorLine;
+      begin = anchor.offset;
+    }
+  }
+  const endIndex = Math.ceil(localStop / stride);
+  const end = endIndex < shard.offsets.length ? shard.offsets[endIndex] : shard.bytes;
+
+  const buffer = Buffer.alloc(end - begin);
+  const descriptor = fs.openSync(path.join(directory, shard.file), 'r');
+  try {
+    fs.readSync(descriptor, buffer, 0, buffer.length, begin);
+  } finally {
+    fs.closeSync(descriptor);
+  }
+  const skip = localStart - firstLine;
+  return buffer.toString('ascii').split('\n')
+    .slice(skip, skip + localStop - localStart)
+    .map((line) => JSON.parse(line));
+};
+
+// Une page de lignes filtrées sur (année, sport) et le total filtré.
+const readPage = (directory, manifest, { year, sport, offset = 0, limit = 50 } = {}) => {
+  const ranges = rowRanges(manifest, { year, sport });
+  const total = ranges.reduce((sum, [, rows]) => sum + rows, 0);
+  const rows = [];
+  let remainingOffset = offset;
+
+  for (const [firstRow, count, anchor] of ranges) {
+    if (rows.length >= limit) {
+      break;
+    }
+    if (remainingOffset >= count) {
+      remainingOffset -= count;
+      continue;
+    }
+    let start = firstRow + remainingOffset;
+    const stop = firstRow + Math.min(count, remainingOffset + limit - rows.length);
+    remainingOffset = 0;
+    while (start < stop) {
+      const shardStop = Math.min(stop, (Math.floor(start / manifest.shard_size) + 1) * manifest.shard_size);
+      rows.push(...readSpan(directory, manifest, start, shardStop, anchor));
+      start = shardStop;
+    }
+  }
+  return { rows, total };
+};
+
+module.exports = { loadManifest, rowRanges, readPage };
@@ -0,0 +1,173 @@
+const { test, before, after } = require('node:test');
+const assert = require('node:assert/strict');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const { loadFilterIndex, lookupPositions } = require('../filterIndex');
+const { applyDemoFilters } = require('../demoFilters');
+
+// Champs indexés et clés des lignes couvertes (src/data_prep/filter_index.py::FIELDS).
+const FIELDS = {
+  year: ['year'],
+  season: ['season'],
+  sport: ['sport'],
+  medal: ['medal'],
+  gender: ['gender'],
+  country: ['country', 'nationality']
+};
+
+const YEARS = [null, 1900, 1924, 1956, 1988, 2000, 2016, 2020];
+const SEASONS = [null, 'Summer', 'Winter'];
+const SPORTS = [null, 'Athletics', 'Swimming', 'Judo', 'Alpine Skiing'];
+const MEDALS = [null, 'GOLD', 'SILVER', 'BRONZE'];
+const GENDERS = [null, 'M', 'F'];
+const COUNTRIES = [null, '', 'France', 'Norway', 'Japan', 'Brazil'];
+const NAMES = ['Ana Silva', 'Jean Dupont', 'Li Wei', 'Zoé Martin', 'Mary O\'Brien'];
+const CITIES = [null, 'Paris', 'Oslo', 'Tokyo', 'Rio'];
+
+// Générateur pseudo-aléatoire déterministe (mulberry32) : les échecs sont reproductibles.
+const randomGenerator = (seed) => {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let value = Math.imul(state ^ (state >>> 15), 1 | state);
+    value ^= value + Math.imul(value ^ (value >>> 7), 61 | value);
+    return ((value ^ (value >>> 14)) >>> 0) / 4294967296;
+  };
+};
+
+const buildRows = (random, count) => {
+  const pick = (values) => values[Math.floor(random() * values.length)];
+  return Array.from({ length: count }, (_, index) => {
+    const nationality = pick(COUNTRIES);
+    return {
+      id: index + 1,
+      name: pick(NAMES),
+      gender: pick(GENDERS),
+      nationality,
+      // Le pays diffère parfois de la nationalité : l'index des pays couvre les deux.
+      country: random() < 0.2 ? pick(COUNTRIES) : nationality,
+      year: pick(YEARS),
+      season: pick(SEASONS),
+      city: pick(CITIES),
+      sport: pick(SPORTS),
+      medal: pick(MEDALS)
+    };
+  });
+};
+
+// Même format que write_filter_index : index.json ([valeur, début, nombre] par champ)
+// et postings.bin (positions triées en uint32 little-endian, bout à bout).
+const writeFixtureIndex = (rows, directory) => {
+  const postings = [];
+  const fields = {};
+  Object.entries(FIELDS).forEach(([field, keys]) => {
+    const lists = new Map();
+    rows.forEach((row, position) => {
+      let values = new Set(keys.map((key) => row[key] ?? null));
+      if (keys.length > 1) {
+        values = new Set([...values].filter(Boolean));
+      }
+      values.forEach((value) => {
+        if (!lists.has(value)) {
+          lists.set(value, []);
+        }
+        lists.get(value).push(position);
+      });
+    });
+    fields[field] = Array.from(lists.entries()).map(([value, positions]) => {
+      const entry = [value, postings.length, positions.length];
+      postings.push(...positions);
+      return entry;
+    });
+  });
+
+  const buffer = Buffer.alloc(postings.length * 4);
+  postings.forEach((position, offset) => buffer.writeUInt32LE(position, offset * 4));
+  fs.writeFileSync(path.join(directory, 'postings.bin'), buffer);
+  fs.writeFileSync(path.join(directory, 'index.json'), JSON.stringify({ version: 1, rows: rows.length, fields }));
+};
+
+// Options aléatoires des routes de démo, y compris des valeurs absentes de l'index.
+const randomOptions = (random) => {
+  const pick = (values) => values[Math.floor(random() * values.length)];
+  const some = (values) => {
+    const chosen = values.filter((value) => value && random() < 0.4);
+    return chosen.length > 0 ? chosen : [pick(values.filter(Boolean))];
+  };
+  const years = YEARS.filter(Boolean);
+  const options = {};
+  if (random() < 0.3) options.yearEquals = random() < 0.1 ? 1912 : pick(years);
+  if (random() < 0.3) options.yearMin = pick(years);
+  if (random() < 0.3) options.yearMax = pick(years);
+  if (random() < 0.3) options.seasons = some(SEASONS);
+  if (random() < 0.3) options.countries = some([...COUNTRIES, 'Atlantis']);
+  if (random() < 0.3) options.medalTypes = some(MEDALS);
+  if (random() < 0.3) options.sports = some([...SPORTS, 'Quidditch']);
+  if (random() < 0.15) options.sportEquals = pick(SPORTS.filter(Boolean));
+  if (random() < 0.15) options.medalEquals = pick(MEDALS.filter(Boolean));
+  if (random() < 0.15) options.gender = pick(['M', 'F', 'X']);
+  if (random() < 0.15) options.search = pick(['an', 'é', 'ski', 'par', 'zz']);
+  return options;
+};
+
+// Chemin indexé de filterDemoResults (app.js) : positions de l'index, puis recherche libre.
+const indexedFilter = (index, rows, options) => {
+  const positions = lookupPositions(index, options);
+  const candidates = positions === null ? rows : Array.from(positions, (position) => rows[position]);
+  return options.search ? applyDemoFilters(candidates, { search: options.search }) : candidates;
+};
+
+let directory;
+let rows;
+
+before(() => {
+  directory = fs.mkdtempSync(path.join(os.tmpdir(), 'filter-index-'));
+  rows = buildRows(randomGenerator(7), 2000);
+  writeFixtureIndex(rows, directory);
+});
+
+after(() => {
+  fs.rmSync(directory, { recursive: true, force: true });
+});
+
+test('loadFilterIndex relit index.json et postings.bin', () => {
+  const index = loadFilterIndex(directory);
+  assert.equal(index.rows, rows.length);
+  assert.deepEqual(Object.keys(index.fields).sort(), Object.keys(FIELDS).sort());
+  const gold = Array.from(index.fields.medal.get('GOLD'));
+  assert.deepEqual(gold, rows.flatMap((row, position) => (row.medal === 'GOLD' ? [position] : [])));
+});
+
+test('lookupPositions renvoie null sans filtre indexé', () => {
+  const index = loadFilterIndex(directory);
+  assert.equal(lookupPositions(index, {}), null);
+  assert.equal(lookupPositions(index, { search: 'an' }), null);
+});
+
+test('l\'index renvoie exactement les lignes du filtre linéaire', () => {
+  const index = loadFilterIndex(directory);
+  const random = randomGenerator(42);
+  for (let query = 0; query < 500; query += 1) {
+    const options = randomOptions(random);
+    assert.deepStrictEqual(
+      indexedFilter(index, rows, options),
+      applyDemoFilters(rows, options),
+      `Options : ${JSON.stringify(options)}`
+    );
+  }
+});
+
+test('l\'index est relu quand index.json change', () => {
+  const first = loadFilterIndex(directory);
+  const smaller = rows.slice(0, 100);
+  writeFixtureIndex(smaller, directory);
+  const future = new Date(Date.now() + 5000);
+  fs.utimesSync(path.join(directory, 'index.json'), future, future);
+
+  const second = loadFilterIndex(directory);
+  assert.notEqual(second, first);
+  assert.equal(second.rows, smaller.length);
+  assert.deepStrictEqual(indexedFilter(second, smaller, { medalTypes: ['GOLD'] }), applyDemoFilters(smaller, { medalTypes: ['GOLD'] }));
+});
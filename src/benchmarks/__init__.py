@@ -0,0 +1 @@
+"""Benchmark suite: synthetic Olympic data and per-stage timings."""
@@ -0,0 +1,398 @@
+"""Per-stage benchmarks of the pipeline on synthetic data.
+
+``run`` generates (or reuses) a synthetic dataset for each scale, lays out a
+throwaway copy of the project around it and times every stage in a fresh
+interpreter:
+
+- the current ``src`` tree, the configuration and the tracked inputs of
+  ``build_demo_data`` are copied into the workspace;
+- the configuration is pointed at the synthetic raw files;
+- the repository's ``data/``, ``models/`` and ``reports/`` are never written.
+
+Each stage reports its wall time and the peak resident memory of its process
+tree, sampled from ``/proc`` while it runs, next to the resident memory
+before the timed call (inputs loaded by the stage's setup). The
+``first_page_*`` stages time the first page of results read from
+``results.json`` and from the shards written by ``build_demo_data``. Results are
+written as JSON; ``compare`` exits with status 1 when a stage is slower or
+larger than the baseline by more than the thresholds.
+
+    python -m src.benchmarks.suite run --scales 1 10 --output reports/benchmarks/baseline.json
+    python -m src.benchmarks.suite run --output reports/benchmarks/current.json
+    python -m src.benchmarks.suite compare reports/benchmarks/baseline.json reports/benchmarks/current.json
+
+Everything runs offline on Linux; training and clustering use the
+repository's model configuration with a fixed, small search (``MODEL_OVERRIDES``)
+so the workload does not depend on the search settings in use.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+
+from src.instrumentation import PeakSampler, tree_rss_mb
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CACHE_DIR = PROJECT_ROOT / ".cache" / "benchmarks"
+DEFAULT_OUTPUT = PROJECT_ROOT / "reports" / "benchmarks" / "latest.json"
+
+STAGES = (
+    "parse_athlete_list",
+    "build_full_dataframe",
+    "build_country_year_summary",
+    "run_preprocessing",
+    "build_model_features",
+    "run_clustering",
+    "run_training",
+    "build_demo_data",
+    "first_page_monolithic",
+    "first_page_sharded",
+)
+
+# Stages that read the outputs of another stage, which then runs even when not selected.
+STAGE_INPUTS = {
+    "first_page_monolithic": "build_demo_data",
+    "first_page_sharded": "build_demo_data",
+}
+
+# Page read by the time-to-first-page stages (the frontend's page size).
+FIRST_PAGE_SIZE = 50
+
+# Files copied next to the synthetic data so every stage finds its inputs.
+STATIC_INPUTS = ("data/olympic_hosts.csv", "reports/medal_predictions.csv")
+
+MODEL_OVERRIDES = {
+    "classification": {
+        "gridsearch": {"cv": 3, "n_jobs": 1, "verbose": 0, "params": {"clf__n_estimators": [50], "clf__max_depth": [15]}},
+        "search": {"strategy": "grid", "cv_cache": False},
+    },
+    "clustering": {"n_jobs": 1},
+}
+
+SAMPLE_INTERVAL = 0.02
+
+
+# ----------------------------------------------------------------------
+# Stages (run inside the workspace interpreter)
+# ----------------------------------------------------------------------
+
+def _stage_setup(name: str) -> Callable[[], object]:
+    """Load the inputs of ``name`` and return the call to time."""
+    from src.data_prep.load_data import dataset_schema, load_datasets, raw_dataset_paths, read_config, read_raw_csv
+    from src.data_prep.storage import dataset_path
+
+    config = read_config()
+    processed_dir = Path.cwd() / config.get("processed_dir", "data/processed")
+
+    if name == "parse_athlete_list":
+        from src.data_prep.athlete_parser import parse_athlete_list
+
+        results = read_raw_csv(raw_dataset_paths(config)["results"], dataset_schema("results", config))
+        return lambda: results["athletes"].map(parse_athlete_list)
+    if name in ("build_full_dataframe", "build_country_year_summary"):
+        from src.data_prep.preprocess import build_country_year_summary, build_full_dataframe
+
+        datasets = load_datasets(config)
+        datasets.pop("processed_dir")
+        if name == "build_full_dataframe":
+            return lambda: build_full_dataframe(datasets)
+        full_df = build_full_dataframe(datasets)
+        del datasets
+        return lambda: build_country_year_summary(full_df)
+    if name == "run_preprocessing":
+        from src.data_prep.preprocess import run_preprocessing
+
+        return run_preprocessing
+    if name == "build_model_features":
+        from src.features.feature_engineering import build_model_features
+
+        summary_path = dataset_path(processed_dir, "country_year_summary", config)
+        return lambda: build_model_features(summary_path, refresh=True)
+    if name == "run_clustering":
+        from src.models.train_clustering import run_clustering
+
+        return lambda: run_clustering(save_figures=False)
+    if name == "run_training":
+        from src.models.train_medal_predictor import run_training
+
+        return run_training
+    if name == "build_demo_data":
+        import runpy
+
+        module = runpy.run_path(str(Path.cwd() / "src" / "api" / "build_demo_data.py"), run_name="benchmark")
+        return module["build_demo_datasets"]
+    if name == "first_page_monolithic":
+        results_path = Path.cwd() / "data" / "demo" / "results.json"
+
+        def first_page() -> List[Dict]:
+            with results_path.open("r", encoding="utf-8") as stream:
+                return json.load(stream)[:FIRST_PAGE_SIZE]
+
+        return first_page
+    if name == "first_page_sharded":
+        from src.data_prep.result_shards import read_page
+
+        return lambda: read_page(Path.cwd() / "data" / "demo" / "results", 0, FIRST_PAGE_SIZE)
+    raise ValueError(f"Unknown stage: {name}")
+
+
+def measure_stage(name: str) -> Dict[str, float]:
+    """Set up ``name``, then time the call while sampling memory."""
+    call = _stage_setup(name)
+    before = tree_rss_mb()
+    sampler = PeakSampler(SAMPLE_INTERVAL)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        call()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = sampler.stop()
+    return {"seconds": seconds, "rss_before_mb": before, "peak_rss_mb": peak}
+
+
+# ----------------------------------------------------------------------
+# Workspace and runner
+# ----------------------------------------------------------------------
+
+def _deep_update(target: Dict, updates: Dict) -> Dict:
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_update(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+def prepare_workspace(workspace: Path, raw_dir: Path) -> Path:
+    """Copy the code, configuration and static inputs; point the config at ``raw_dir``."""
+    if workspace.exists():
+        shutil.rmtree(workspace)
+    for source in (PROJECT_ROOT / "src").rglob("*.py"):
+        relative = source.relative_to(PROJECT_ROOT)
+        if "node_modules" in relative.parts:
+            continue
+        target = workspace / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+    for relative in STATIC_INPUTS:
+        target = workspace / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(PROJECT_ROOT / relative, target)
+
+    config_dir = workspace / "config"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    with (PROJECT_ROOT / "config" / "data_paths.yaml").open("r", encoding="utf-8") as stream:
+        data_cfg = yaml.safe_load(stream)
+    data_cfg.update({"data_root": str(raw_dir), "raw_dir": str(raw_dir)})
+    with (PROJECT_ROOT / "config" / "model_params.yaml").open("r", encoding="utf-8") as stream:
+        model_cfg = _deep_update(yaml.safe_load(stream), MODEL_OVERRIDES)
+    for name, payload in (("data_paths.yaml", data_cfg), ("model_params.yaml", model_cfg)):
+        with (config_dir / name).open("w", encoding="utf-8") as stream:
+            yaml.safe_dump(payload, stream, sort_keys=False)
+    return workspace
+
+
+def _run_in_workspace(workspace: Path, stage: str, timeout: Optional[float]) -> Dict:
+    result_path = workspace / f".stage-{stage}.json"
+    env = dict(os.environ, PYTHONPATH=str(workspace), MPLBACKEND="Agg")
+    completed = subprocess.run(
+        [sys.executable, "-m", "src.benchmarks.suite", "stage", stage, "--result", str(result_path)],
+        cwd=workspace,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if completed.returncode != 0 or not result_path.exists():
+        raise RuntimeError(f"Stage {stage} failed:\n{completed.stderr[-2000:]}")
+    with result_path.open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def run_benchmarks(
+    scales: Sequence[float] = (1,),
+    stages: Sequence[str] = STAGES,
+    repeats: int = 1,
+    seed: int = 0,
+    timeout: Optional[float] = None,
+    keep_workspace: bool = False,
+) -> Dict:
+    """Benchmark ``stages`` at each scale; keep the fastest of ``repeats`` runs."""
+    from .synthetic import ensure_dataset
+
+    report: Dict = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scales": {},
+    }
+    for scale in scales:
+        label = f"{scale:g}"
+        raw_dir = CACHE_DIR / "data" / f"x{label}"
+        start = time.perf_counter()
+        manifest = ensure_dataset(raw_dir, scale, seed)
+        print(f"[x{label}] synthetic data {manifest['rows']} ready in {time.perf_counter() - start:.1f}s")
+
+        workspace = prepare_workspace(Path(tempfile.mkdtemp(prefix=f"bench-x{label}-", dir=CACHE_DIR)), raw_dir)
+        results: Dict[str, Dict] = {}
+        required = {"run_preprocessing"} | {STAGE_INPUTS[stage] for stage in stages if stage in STAGE_INPUTS}
+        try:
+            # Every stage runs once in order so later stages find the processed outputs.
+            for stage in STAGES:
+                if stage not in stages and stage not in required:
+                    continue
+                runs = [_run_in_workspace(workspace, stage, timeout) for _ in range(repeats if stage in stages else 1)]
+                if stage not in stages:
+                    continue
+                results[stage] = {
+                    "seconds": min(run["seconds"] for run in runs),
+                    "rss_before_mb": min(run["rss_before_mb"] for run in runs),
+                    "peak_rss_mb": min(run["peak_rss_mb"] for run in runs),
+                }
+                entry = results[stage]
+                print(
+                    f"[x{label}] {stage:<28} {entry['seconds']:>9.2f}s  peak {entry['peak_rss_mb']:>8.1f} MB"
+                    f"  (inputs {entry['rss_before_mb']:.1f} MB)"
+                )
+        finally:
+            if not keep_workspace:
+                shutil.rmtree(workspace, ignore_errors=True)
+        report["scales"][label] = {"rows": manifest["rows"], "stages": results}
+    return report
+
+
+def write_report(report: Dict, path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as stream:
+        json.dump(report, stream, indent=2)
+    temp_path.replace(path)
+    return path
+
+
+def compare_reports(
+    baseline: Dict,
+    current: Dict,
+    time_threshold: float = 0.25,
+    memory_threshold: float = 0.25,
+    min_seconds: float = 0.1,
+) -> Tuple[List[Dict], List[str]]:
+    """Relative change of every stage present in both reports, and the regressions.
+
+    Stages faster than ``min_seconds`` in the baseline are not checked for
+    time, their timings being mostly noise.
+    """
+    rows: List[Dict] = []
+    regressions: List[str] = []
+    for scale, scale_report in current["scales"].items():
+        reference = baseline["scales"].get(scale, {}).get("stages", {})
+        for stage, entry in scale_report["stages"].items():
+            if stage not in reference:
+                continue
+            base = reference[stage]
+            time_change = entry["seconds"] / base["seconds"] - 1 if base["seconds"] else 0.0
+            memory_change = entry["peak_rss_mb"] / base["peak_rss_mb"] - 1 if base["peak_rss_mb"] else 0.0
+            slower = base["seconds"] >= min_seconds and time_change > time_threshold
+            larger = memory_change > memory_threshold
+            rows.append({
+                "scale": scale, "stage": stage,
+                "seconds": entry["seconds"], "time_change": time_change,
+                "peak_rss_mb": entry["peak_rss_mb"], "memory_change": memory_change,
+                "regression": slower or larger,
+            })
+            if slower:
+                regressions.append(f"x{scale} {stage}: {time_change:+.0%} time ({base['seconds']:.2f}s -> {entry['seconds']:.2f}s)")
+            if larger:
+                regressions.append(
+                    f"x{scale} {stage}: {memory_change:+.0%} peak memory ({base['peak_rss_mb']:.1f} -> {entry['peak_rss_mb']:.1f} MB)"
+                )
+    return rows, regressions
+
+
+def _read_report(path: Path) -> Dict:
+    with path.open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def _print_comparison(rows: List[Dict], regressions: List[str]) -> int:
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"x{row['scale']:<6} {row['stage']:<28} {row['seconds']:>9.2f}s {row['time_change']:>+7.1%}"
+            f" {row['peak_rss_mb']:>9.1f} MB {row['memory_change']:>+7.1%}  {flag}"
+        )
+    if regressions:
+        print("Regressions:")
+        for line in regressions:
+            print(f"    {line}")
+        return 1
+    print("No regression")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="benchmark the stages and write a JSON report")
+    run_parser.add_argument("--scales", type=float, nargs="+", default=[1.0], help="multiples of today's volume")
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    run_parser.add_argument("--repeats", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per stage run")
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--compare", type=Path, default=None, metavar="BASELINE", help="compare with a baseline afterwards")
+    run_parser.add_argument("--keep-workspace", action="store_true")
+
+    compare_parser = commands.add_parser("compare", help="fail when a stage regressed against a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--time-threshold", type=float, default=0.25, help="allowed relative slowdown")
+        sub.add_argument("--memory-threshold", type=float, default=0.25, help="allowed relative peak memory growth")
+        sub.add_argument("--min-seconds", type=float, default=0.1, help="ignore timings of faster baseline stages")
+
+    stage_parser = commands.add_parser("stage", help=argparse.SUPPRESS)
+    stage_parser.add_argument("name", choices=STAGES)
+    stage_parser.add_argument("--result", type=Path, required=True)
+
+    arguments = parser.parse_args()
+
+    if arguments.command == "stage":
+        write_report(measure_stage(arguments.name), arguments.result)
+        sys.exit(0)
+
+    if arguments.command == "run":
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        report = run_benchmarks(
+            arguments.scales, arguments.stages, arguments.repeats, arguments.seed, arguments.timeout, arguments.keep_workspace
+        )
+        print(f"Report written to {write_report(report, arguments.output)}")
+        if arguments.compare is None:
+            sys.exit(0)
+        baseline_report, current_report = _read_report(arguments.compare), report
+    else:
+        baseline_report, current_report = _read_report(arguments.baseline), _read_report(arguments.current)
+
+    comparison, failures = compare_reports(
+        baseline_report, current_report, arguments.time_threshold, arguments.memory_threshold, arguments.min_seconds
+    )
+    sys.exit(_print_comparison(comparison, failures))
@@ -0,0 +1,248 @@
+"""Synthetic Olympic datasets for benchmarks.
+
+``generate_dataset`` writes ``olympic_results.csv``, ``olympic_medals.csv`` and
+``olympic_athletes.csv`` with the columns and value formats of the real raw
+files:
+
+- team results list their members in ``athletes`` as the ``repr`` of
+  ``(full_name, url)`` tuples;
+- ranks are numbers or ``DNS``/``DNF``;
+- the first three ranks usually carry a medal, repeated in the medals file.
+
+``scale=1`` matches today's volume (``BASE_ROWS``); ``scale=10`` or ``100``
+multiply it. Vocabularies (editions, disciplines, events, countries) come
+from the tracked ``olympic_hosts.csv`` and ``olympic_medals.csv``. Rows are
+generated and written in chunks, each from its own seeded generator, so the
+output is deterministic and memory stays flat whatever the scale.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+# Row counts of the raw Kaggle files the project is built on.
+BASE_ROWS = {"results": 162_804, "athletes": 75_904, "medals": 21_697}
+
+RESULTS_COLUMNS = [
+    "discipline_title", "event_title", "slug_game", "participant_type", "medal_type", "athletes",
+    "rank_equal", "rank_position", "country_name", "country_code", "country_3_letter_code",
+    "athlete_url", "athlete_full_name", "value_unit", "value_type",
+]
+MEDALS_COLUMNS = [
+    "discipline_title", "slug_game", "event_title", "event_gender", "medal_type", "participant_type",
+    "participant_title", "athlete_url", "athlete_full_name", "country_name", "country_code", "country_3_letter_code",
+]
+ATHLETES_COLUMNS = [
+    "athlete_url", "athlete_full_name", "games_participations", "first_game", "athlete_year_birth", "athlete_medals", "bio",
+]
+
+CHUNK_ROWS = 100_000
+TEAM_SHARE = 0.25
+# Geometric ranks: about 13% of the results finish on the podium.
+RANK_P = 0.045
+MEDALS = np.array(["GOLD", "SILVER", "BRONZE"], dtype=object)
+FIRST_NAMES = np.array(["Anna", "Jean", "Li", "Maria", "Kenji", "Olga", "Pedro", "Sofia", "Ahmed", "Emma", "Zoé", "Seán"], dtype=object)
+LAST_NAMES = np.array(["MARTIN", "SMITH", "WANG", "O'BRIEN", "SILVA", "IVANOVA", "MÜLLER", "SATO", "ROSSI", "NOVAK"], dtype=object)
+
+MANIFEST_NAME = "synthetic.json"
+GENERATOR_VERSION = 1
+
+
+def _vocabulary() -> Dict[str, pd.DataFrame]:
+    medals = pd.read_csv(DATA_DIR / "olympic_medals.csv")
+    hosts = pd.read_csv(DATA_DIR / "olympic_hosts.csv")
+    return {
+        "events": medals[["discipline_title", "event_title", "event_gender"]].drop_duplicates().reset_index(drop=True),
+        "countries": medals[["country_name", "country_code", "country_3_letter_code"]]
+        .drop_duplicates("country_name")
+        .reset_index(drop=True),
+        "hosts": hosts[["game_slug", "game_name"]].dropna().reset_index(drop=True),
+    }
+
+
+def athlete_urls(ids: np.ndarray) -> np.ndarray:
+    return ("https://olympics.com/en/athletes/synthetic-" + pd.Series(ids).astype(str)).to_numpy(dtype=object)
+
+
+def athlete_names(ids: np.ndarray) -> np.ndarray:
+    """Deterministic name of each athlete id, so results need no athlete table."""
+    first = FIRST_NAMES[ids % len(FIRST_NAMES)]
+    last = LAST_NAMES[(ids // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    return (pd.Series(first) + " " + pd.Series(last) + " " + pd.Series(ids).astype(str)).to_numpy(dtype=object)
+
+
+def _athletes_chunk(rng: np.random.Generator, ids: np.ndarray, vocabulary: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    n = len(ids)
+    hosts = vocabulary["hosts"]["game_name"].to_numpy(dtype=object)
+    birth = rng.integers(1880, 2008, size=n).astype(float)
+    birth[rng.random(n) < 0.12] = np.nan
+    medals = np.where(rng.random(n) < 0.3, "\n\n\n1\nG\n", None)
+    bio = np.where(rng.random(n) < 0.4, "Synthetic athlete biography.", None)
+    return pd.DataFrame({
+        "athlete_url": athlete_urls(ids),
+        "athlete_full_name": athlete_names(ids),
+        "games_participations": rng.integers(1, 7, size=n),
+        "first_game": hosts[rng.integers(len(hosts), size=n)],
+        "athlete_year_birth": birth,
+        "athlete_medals": medals,
+        "bio": bio,
+    }, columns=ATHLETES_COLUMNS)
+
+
+def _results_chunk(
+    rng: np.random.Generator,
+    n: int,
+    n_athletes: int,
+    vocabulary: Dict[str, pd.DataFrame],
+):
+    """One chunk of results and the medal rows it produces."""
+    events = vocabulary["events"].iloc[rng.integers(len(vocabulary["events"]), size=n)].reset_index(drop=True)
+    countries = vocabulary["countries"].iloc[rng.integers(len(vocabulary["countries"]), size=n)].reset_index(drop=True)
+    slugs = vocabulary["hosts"]["game_slug"].to_numpy(dtype=object)[rng.integers(len(vocabulary["hosts"]), size=n)]
+
+    team = rng.random(n) < TEAM_SHARE
+    rank = rng.geometric(RANK_P, size=n)
+    medal = np.where(rank <= 3, MEDALS[np.minimum(rank, 3) - 1], None)
+    rank_position = rank.astype(str).astype(object)
+    not_ranked = rng.random(n) < 0.05
+    rank_position[not_ranked] = np.where(rng.random(int(not_ranked.sum())) < 0.5, "DNS", "DNF")
+    medal[not_ranked] = None
+
+    athlete = rng.integers(n_athletes, size=n)
+    urls = np.where(team, None, athlete_urls(athlete))
+    names = np.where(team, None, athlete_names(athlete))
+
+    team_rows = np.flatnonzero(team)
+    sizes = rng.integers(2, 6, size=len(team_rows))
+    sizes[rng.random(len(team_rows)) < 0.02] = 0
+    members = rng.integers(n_athletes, size=int(sizes.sum()))
+    member_urls, member_names = athlete_urls(members), athlete_names(members)
+    athletes = np.full(n, None, dtype=object)
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    for position, row in enumerate(team_rows):
+        start, stop = bounds[position], bounds[position + 1]
+        athletes[row] = repr(list(zip(member_names[start:stop], member_urls[start:stop])))
+
+    unit = np.where(rng.random(n) < 0.2, np.where(rng.random(n) < 0.5, "TIME", "POINTS"), None)
+    results = pd.DataFrame({
+        "discipline_title": events["discipline_title"],
+        "event_title": events["event_title"],
+        "slug_game": slugs,
+        "participant_type": np.where(team, "GameTeam", "Athlete"),
+        "medal_type": medal,
+        "athletes": athletes,
+        "rank_equal": rng.random(n) < 0.01,
+        "rank_position": rank_position,
+        "country_name": countries["country_name"],
+        "country_code": countries["country_code"],
+        "country_3_letter_code": countries["country_3_letter_code"],
+        "athlete_url": urls,
+        "athlete_full_name": names,
+        "value_unit": unit,
+        "value_type": unit,
+    }, columns=RESULTS_COLUMNS)
+
+    # Medals: one row per individual medal, one per member of a medalled team
+    # (or a single anonymous row, as in the real file).
+    has_medal = pd.notna(medal)
+    team_size = np.zeros(n, dtype=np.int64)
+    team_size[team_rows] = sizes
+    member_of = np.repeat(team_rows, sizes)
+    member_won = has_medal[member_of] & (rng.random(len(member_of)) < 0.6)
+    individual = np.flatnonzero(has_medal & ~team)
+    anonymous = np.flatnonzero(has_medal & team & (team_size == 0))
+    medal_frames = []
+    for rows, medal_urls, medal_names, title in (
+        (individual, urls[individual], names[individual], None),
+        (member_of[member_won], member_urls[member_won], member_names[member_won], "team"),
+        (anonymous, np.full(len(anonymous), None), np.full(len(anonymous), None), "team"),
+    ):
+        frame = results.iloc[rows][["discipline_title", "slug_game", "event_title", "medal_type", "participant_type",
+                                    "country_name", "country_code", "country_3_letter_code"]].reset_index(drop=True)
+        frame["event_gender"] = events["event_gender"].to_numpy()[rows]
+        frame["participant_title"] = frame["country_name"] if title else None
+        frame["athlete_url"] = medal_urls
+        frame["athlete_full_name"] = medal_names
+        medal_frames.append(frame[MEDALS_COLUMNS])
+    return results, pd.concat(medal_frames, ignore_index=True)
+
+
+def _append_csv(frame: pd.DataFrame, path: Path, first: bool, index_start: Optional[int] = None) -> None:
+    if index_start is not None:
+        frame.index = pd.RangeIndex(index_start, index_start + len(frame))
+    frame.to_csv(path, mode="w" if first else "a", header=first, index=index_start is not None)
+
+
+def read_manifest(output_dir: Path) -> Optional[Dict]:
+    path = Path(output_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def generate_dataset(output_dir: Path, scale: float = 1.0, seed: int = 0, chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """Write the three raw files for ``scale`` times today's volume; return the manifest."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    vocabulary = _vocabulary()
+    n_results = max(int(BASE_ROWS["results"] * scale), 1)
+    n_athletes = max(int(BASE_ROWS["athletes"] * scale), 1)
+
+    paths = {name: output_dir / f"olympic_{name}.csv" for name in ("results", "medals", "athletes")}
+    temp = {name: path.with_suffix(".csv.tmp") for name, path in paths.items()}
+
+    for index, start in enumerate(range(0, n_athletes, chunk_rows)):
+        rng = np.random.default_rng([seed, 0, index])
+        ids = np.arange(start, min(start + chunk_rows, n_athletes))
+        _append_csv(_athletes_chunk(rng, ids, vocabulary), temp["athletes"], first=index == 0)
+
+    n_medals = 0
+    for index, start in enumerate(range(0, n_results, chunk_rows)):
+        rng = np.random.default_rng([seed, 1, index])
+        results, medals = _results_chunk(rng, min(chunk_rows, n_results - start), n_athletes, vocabulary)
+        _append_csv(results, temp["results"], first=index == 0)
+        _append_csv(medals, temp["medals"], first=index == 0, index_start=n_medals)
+        n_medals += len(medals)
+
+    for name, path in paths.items():
+        temp[name].replace(path)
+    manifest = {
+        "version": GENERATOR_VERSION,
+        "scale": scale,
+        "seed": seed,
+        "rows": {"results": n_results, "medals": n_medals, "athletes": n_athletes},
+    }
+    with (output_dir / MANIFEST_NAME).open("w", encoding="utf-8") as stream:
+        json.dump(manifest, stream, indent=2)
+    return manifest
+
+
+def ensure_dataset(output_dir: Path, scale: float = 1.0, seed: int = 0) -> Dict:
+    """Reuse a previously generated dataset with the same scale and seed."""
+    manifest = read_manifest(output_dir)
+    if manifest and manifest.get("version") == GENERATOR_VERSION and manifest.get("scale") == scale and manifest.get("seed") == seed:
+        return manifest
+    return generate_dataset(output_dir, scale, seed)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate synthetic Olympic raw files")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiple of today's volume (1, 10, 100...)")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    result = generate_dataset(arguments.output_dir, arguments.scale, arguments.seed)
+    print(f"Generated {result['rows']} in {time.perf_counter() - start:.1f}s -> {arguments.output_dir}")
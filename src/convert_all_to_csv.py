@@ -3,83 +3,192 @@ Script principal de conversion de tous les fichiers olympiques vers CSV
 Exécute toutes les conversions en une seule fois
 """
 
+import contextlib
+import hashlib
+import json
 import pandas as pd
 import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
 
-def convert_all_to_csv():
-    """Convertit tous les fichiers de données olympiques en CSV"""
+try:
+    from .streaming_convert import convert_html_streaming, convert_json_streaming, convert_xml_streaming
+except ImportError:  # exécuté directement comme script
+    from streaming_convert import convert_html_streaming, convert_json_streaming, convert_xml_streaming
+
+MANIFEST_PATH = 'csv/.convert_manifest.json'
+
+CONVERSIONS = [
+    {'name': 'olympic_athletes.json', 'kind': 'json', 'source': 'data/olympic_athletes.json', 'output': 'csv/olympic_athletes.csv'},
+    {'name': 'olympic_hosts.xml', 'kind': 'xml', 'source': 'data/olympic_hosts.xml', 'output': 'csv/olympic_hosts.csv'},
+    {'name': 'olympic_medals.xlsx', 'kind': 'xlsx', 'source': 'data/olympic_medals.xlsx', 'output': 'csv/olympic_medals.csv'},
+    {'name': 'olympic_results.html', 'kind': 'html', 'source': 'data/olympic_results.html', 'output': 'csv/olympic_results.csv'},
+]
+
+
+@dataclass
+class ConversionResult:
+    """Résultat structuré de la conversion d'une source"""
+    name: str
+    output: str
+    status: str  # 'converted', 'skipped' ou 'failed'
+    rows: int = 0
+    cols: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def convert_excel(source, output):
+    """Lecture complète du classeur (openpyxl ne se lit pas en streaming avec pandas)"""
+    df = pd.read_excel(source)
+    df.to_csv(output, index=False)
+    return len(df), len(df.columns)
+
+
+CONVERTERS = {
+    'json': convert_json_streaming,
+    'xml': convert_xml_streaming,
+    'xlsx': convert_excel,
+    'html': convert_html_streaming,
+}
+
+
+def run_conversion(conversion):
+    """Exécuté dans un processus du pool : ne lève jamais, renvoie un ConversionResult"""
+    start = time.perf_counter()
+    try:
+        rows, cols = CONVERTERS[conversion['kind']](conversion['source'], conversion['output'])
+    except Exception as e:
+        return ConversionResult(conversion['name'], conversion['output'], 'failed',
+                                seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+    return ConversionResult(conversion['name'], conversion['output'], 'converted', rows, cols,
+                            time.perf_counter() - start)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_state(path, previous=None):
+    """Taille, mtime et hash d'une source ; le hash n'est recalculé que si taille/mtime ont changé"""
+    stat = os.stat(path)
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime_ns:
+        return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': previous['sha256']}
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': file_hash(path)}
+
+
+def read_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as stream:
+        json.dump(manifest, stream, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def print_result(result):
+    if result.status == 'failed':
+        print(f"❌ Erreur avec {result.name}: {result.error}")
+    elif result.status == 'skipped':
+        print(f"⏭️  {result.name} inchangé, conversion ignorée ({result.output})")
+    else:
+        print(f"✅ {result.name} → {result.output}")
+        print(f"   📊 {result.rows} lignes, {result.cols} colonnes")
+
+
+def convert_all_to_csv(force=False, max_workers=None):
+    """Convertit tous les fichiers de données olympiques en CSV
+    
+    Les sources dont la taille, la date de modification et le hash n'ont pas
+    changé depuis la dernière conversion réussie (et dont le CSV existe) sont
+    ignorées. Les autres sont converties en parallèle dans un pool de
+    processus. Renvoie la liste des ConversionResult, dans l'ordre des sources.
+    """
     
     print("🏆 Conversion des données olympiques vers CSV")
     print("=" * 50)
     print(f"📅 Début de la conversion: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    conversions = [
-        {
-            'name': 'olympic_athletes.json',
-            'reader': lambda: pd.read_json('data/olympic_athletes.json'),
-            'output': 'csv/olympic_athletes.csv'
-        },
-        {
-            'name': 'olympic_hosts.xml',
-            'reader': lambda: pd.read_xml('data/olympic_hosts.xml'),
-            'output': 'csv/olympic_hosts.csv'
-        },
-        {
-            'name': 'olympic_medals.xlsx',
-            'reader': lambda: pd.read_excel('data/olympic_medals.xlsx'),
-            'output': 'csv/olympic_medals.csv'
-        },
-        {
-            'name': 'olympic_results.html',
-            'reader': lambda: pd.read_html('data/olympic_results.html')[0],
-            'output': 'csv/olympic_results.csv'
-        }
-    ]
-    
-    success_count = 0
-    total_rows = 0
+    manifest = read_manifest()
+    results = {}
+    states = {}
+    pending = []
     
-    for conversion in conversions:
+    for conversion in CONVERSIONS:
+        name = conversion['name']
         try:
-            print(f"🔄 Conversion de {conversion['name']}...")
-            
-            # Lecture du fichier
-            df = conversion['reader']()
-            
-            # Sauvegarde en CSV
-            df.to_csv(conversion['output'], index=False)
-            
-            rows = len(df)
-            cols = len(df.columns)
-            total_rows += rows
-            
-            print(f"✅ {conversion['name']} → {conversion['output']}")
-            print(f"   📊 {rows} lignes, {cols} colonnes")
-            print()
-            
-            success_count += 1
-            
-        except Exception as e:
-            print(f"❌ Erreur avec {conversion['name']}: {e}")
-            print()
+            states[name] = source_state(conversion['source'], manifest.get(name))
+        except OSError as e:
+            results[name] = ConversionResult(name, conversion['output'], 'failed', error=f"{type(e).__name__}: {e}")
+            continue
+        previous = manifest.get(name)
+        if (not force and previous and os.path.exists(conversion['output'])
+                and previous.get('sha256') == states[name]['sha256']):
+            results[name] = ConversionResult(name, conversion['output'], 'skipped',
+                                             previous.get('rows', 0), previous.get('cols', 0))
+            # Un simple changement de mtime ne doit pas forcer le hash au prochain lancement
+            previous.update(states[name])
+            continue
+        pending.append(conversion)
+    
+    if pending:
+        print(f"🔄 Conversion de {len(pending)} fichier(s) en parallèle...")
+        print()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(run_conversion, pending):
+                results[result.name] = result
+                if result.status == 'converted':
+                    manifest[result.name] = dict(states[result.name], rows=result.rows, cols=result.cols)
+                else:
+                    manifest.pop(result.name, None)
+    write_manifest(manifest)
+    
+    ordered = [results[conversion['name']] for conversion in CONVERSIONS]
+    for result in ordered:
+        print_result(result)
+    print()
+    
+    failed = [result for result in ordered if result.status == 'failed']
+    total_rows = sum(result.rows for result in ordered if result.status == 'converted')
     
     print("=" * 50)
     print(f"🎯 Résumé de la conversion:")
-    print(f"   ✅ Fichiers convertis: {success_count}/{len(conversions)}")
-    print(f"   📊 Total lignes traitées: {total_rows}")
+    print(f"   {'Fichier':<24} {'Statut':<10} {'Durée':>8} {'Lignes/s':>10}")
+    for result in ordered:
+        timing = f"{result.seconds:.2f}s" if result.status != 'skipped' else '-'
+        speed = f"{result.rows_per_second:,.0f}" if result.status == 'converted' else '-'
+        print(f"   {result.name:<24} {result.status:<10} {timing:>8} {speed:>10}")
+    print(f"   ✅ Fichiers à jour: {len(ordered) - len(failed)}/{len(ordered)}")
+    print(f"   📊 Total lignes converties: {total_rows}")
     print(f"   📅 Fin de la conversion: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    if success_count == len(conversions):
+    if not failed:
         print("🏆 Toutes les conversions ont réussi!")
     else:
-        print(f"⚠️  {len(conversions) - success_count} conversion(s) ont échoué")
+        print(f"⚠️  {len(failed)} conversion(s) ont échoué")
+    
+    return ordered
 
 def check_dependencies():
     """Vérifie que toutes les dépendances sont installées"""
-    required_packages = ['pandas', 'openpyxl', 'lxml', 'html5lib']
+    required_packages = ['pandas', 'openpyxl']
     missing_packages = []
     
     for package in required_packages:
@@ -100,14 +209,29 @@ def check_dependencies():
     return True
 
 if __name__ == "__main__":
-    # Vérifie les dépendances
-    if not check_dependencies():
-        sys.exit(1)
+    import argparse
     
-    # Vérifie que le dossier csv existe
-    if not os.path.exists('csv'):
-        print("❌ Le dossier 'csv' n'existe pas")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Conversion des données olympiques vers CSV")
+    parser.add_argument('--force', action='store_true', help="Reconvertit même les sources inchangées")
+    parser.add_argument('--jobs', type=int, default=None, help="Nombre maximal de processus")
+    parser.add_argument('--json', action='store_true',
+                        help="Affiche les résultats au format JSON (le rapport passe sur stderr)")
+    arguments = parser.parse_args()
     
-    # Lance les conversions
-    convert_all_to_csv()
\ No newline at end of file
+    # Avec --json, stdout ne contient que le JSON
+    report_stream = sys.stderr if arguments.json else sys.stdout
+    with contextlib.redirect_stdout(report_stream):
+        # Vérifie les dépendances
+        if not check_dependencies():
+            sys.exit(1)
+        
+        # Vérifie que le dossier csv existe
+        if not os.path.exists('csv'):
+            print("❌ Le dossier 'csv' n'existe pas")
+            sys.exit(1)
+        
+        # Lance les conversions
+        results = convert_all_to_csv(force=arguments.force, max_workers=arguments.jobs)
+    if arguments.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    sys.exit(1 if any(result.status == 'failed' for result in results) else 0)
\ No newline at end of file
@@ -6,22 +6,25 @@ Convertit olympic_athletes.json en olympic_athletes.csv
 import pandas as pd
 import os
 
+try:
+    from .streaming_convert import convert_json_streaming
+except ImportError:  # exécuté directement comme script
+    from streaming_convert import convert_json_streaming
+
 def convert_json_to_csv():
     """Convertit le fichier JSON des athlètes olympiques en CSV"""
     try:
-        # Lecture du fichier JSON
-        df = pd.read_json('data/olympic_athletes.json')
-        
-        # Sauvegarde en CSV
-        df.to_csv('csv/olympic_athletes.csv', index=False)
-        
+        # Lecture en streaming et écriture du CSV par paquets
+        rows, cols = convert_json_streaming('data/olympic_athletes.json', 'csv/olympic_athletes.csv')
+        columns = pd.read_csv('csv/olympic_athletes.csv', nrows=0).columns
+
         print(f"✅ Conversion réussie: olympic_athletes.json → olympic_athletes.csv")
-        print(f"📊 Nombre de lignes: {len(df)}")
-        print(f"📊 Nombre de colonnes: {len(df.columns)}")
-        print(f"📊 Colonnes: {list(df.columns)}")
+        print(f"📊 Nombre de lignes: {rows}")
+        print(f"📊 Nombre de colonnes: {cols}")
+        print(f"📊 Colonnes: {list(columns)}")
         
     except Exception as e:
         print(f"❌ Erreur lors de la conversion JSON: {e}")
 
 if __name__ == "__main__":
-    convert_json_to_csv()
\ No newline at end of file
+    convert_json_to_csv()
\ No newline at end of file
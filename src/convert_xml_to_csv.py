@@ -6,22 +6,25 @@ Convertit olympic_hosts.xml en olympic_hosts.csv
 import pandas as pd
 import os
 
+try:
+    from .streaming_convert import convert_xml_streaming
+except ImportError:  # exécuté directement comme script
+    from streaming_convert import convert_xml_streaming
+
 def convert_xml_to_csv():
     """Convertit le fichier XML des pays hôtes olympiques en CSV"""
     try:
-        # Lecture du fichier XML
-        df = pd.read_xml('data/olympic_hosts.xml')
-        
-        # Sauvegarde en CSV
-        df.to_csv('csv/olympic_hosts.csv', index=False)
-        
+        # Lecture en streaming et écriture du CSV par paquets
+        rows, cols = convert_xml_streaming('data/olympic_hosts.xml', 'csv/olympic_hosts.csv')
+        columns = pd.read_csv('csv/olympic_hosts.csv', nrows=0).columns
+
         print(f"✅ Conversion réussie: olympic_hosts.xml → olympic_hosts.csv")
-        print(f"📊 Nombre de lignes: {len(df)}")
-        print(f"📊 Nombre de colonnes: {len(df.columns)}")
-        print(f"📊 Colonnes: {list(df.columns)}")
+        print(f"📊 Nombre de lignes: {rows}")
+        print(f"📊 Nombre de colonnes: {cols}")
+        print(f"📊 Colonnes: {list(columns)}")
         
     except Exception as e:
         print(f"❌ Erreur lors de la conversion XML: {e}")
 
 if __name__ == "__main__":
-    convert_xml_to_csv()
\ No newline at end of file
+    convert_xml_to_csv()
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""Batched parsing of the ``athletes`` column of the results dataset.
+
+The raw results file stores team members as the Python ``repr`` of a list of
+``(full_name, url)`` tuples. Instead of running ``ast.literal_eval`` and
+building one ``pd.Series`` per athlete, the whole column is parsed with
+vectorised regular expressions into flat, aligned arrays. Cells that do not
+follow the simple ``[('name', 'url'), ...]`` grammar (escapes, ``None``
+values, malformed lists) fall back to the row-wise parser so the output stays
+identical to the historical behaviour.
+"""
+
+from __future__ import annotations
+
+import ast
+import time
+from typing import Dict, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+_QUOTED = r"""(?:'[^'\\]*'|"[^"\\]*")"""
+_PAIR = rf"\(\s*{_QUOTED}\s*,\s*{_QUOTED}\s*\)"
+_LIST_PATTERN = rf"\[\s*(?:{_PAIR}(?:\s*,\s*{_PAIR})*\s*,?)?\s*\]\s*"
+_PAIR_PATTERN = (
+    r"""\(\s*(?:'(?P<name_sq>[^'\\]*)'|"(?P<name_dq>[^"\\]*)")\s*,"""
+    r"""\s*(?:'(?P<url_sq>[^'\\]*)'|"(?P<url_dq>[^"\\]*)")\s*\)"""
+)
+
+
+class AthleteRecords(NamedTuple):
+    """Flat, aligned arrays describing every athlete found in a column."""
+
+    row: np.ndarray
+    athlete_full_name: np.ndarray
+    athlete_url: np.ndarray
+
+
+def parse_athlete_list(cell: str) -> list:
+    """Parse the athlete list column into python objects."""
+    if isinstance(cell, str) and cell.startswith("["):
+        try:
+            parsed = ast.literal_eval(cell)
+            return [
+                {
+                    "athlete_full_name": entry[0],
+                    "athlete_url": entry[1],
+                }
+                for entry in parsed
+                if len(entry) == 2
+            ]
+        except (ValueError, SyntaxError):
+            return []
+    return []
+
+
+def _empty_records() -> AthleteRecords:
+    return AthleteRecords(
+        np.empty(0, dtype=np.int64),
+        np.empty(0, dtype=object),
+        np.empty(0, dtype=object),
+    )
+
+
+def parse_athlete_column(athletes: pd.Series) -> AthleteRecords:
+    """Parse a whole ``athletes`` column in one pass.
+
+    ``row`` holds the position (not the label) of the source row, records of a
+    same row keep their original order and rows are sorted ascending.
+    """
+    values = pd.Series(np.asarray(athletes, dtype=object), dtype=object)
+    is_text = values.map(type).eq(str).to_numpy()
+    if not is_text.any():
+        return _empty_records()
+
+    text = values[is_text].astype(str)
+    text = text[text.str.startswith("[")]
+    if text.empty:
+        return _empty_records()
+
+    simple = text.str.fullmatch(_LIST_PATTERN)
+    extracted = text[simple].str.extractall(_PAIR_PATTERN)
+
+    rows = [extracted.index.get_level_values(0).to_numpy(dtype=np.int64)]
+    names = [np.where(extracted["name_sq"].notna(), extracted["name_sq"], extracted["name_dq"]).astype(object)]
+    urls = [np.where(extracted["url_sq"].notna(), extracted["url_sq"], extracted["url_dq"]).astype(object)]
+
+    # Rare cells outside the simple grammar go through the row-wise parser.
+    for position, cell in text[~simple].items():
+        records = parse_athlete_list(cell)
+        if not records:
+            continue
+        rows.append(np.full(len(records), position, dtype=np.int64))
+        names.append(np.array([record["athlete_full_name"] for record in records], dtype=object))
+        urls.append(np.array([record["athlete_url"] for record in records], dtype=object))
+
+    row = np.concatenate(rows)
+    order = np.argsort(row, kind="stable")
+    return AthleteRecords(
+        row[order],
+        np.concatenate(names)[order],
+        np.concatenate(urls)[order],
+    )
+
+
+def explode_athletes(results_df: pd.DataFrame) -> pd.DataFrame:
+    """Return one row per athlete, filling ``athlete_url``/``athlete_full_name``.
+
+    Rows without any parsed athlete are kept once, exactly like
+    ``DataFrame.explode`` does for empty lists.
+    """
+    n_rows = len(results_df)
+    if "athletes" in results_df.columns:
+        records = parse_athlete_column(results_df["athletes"])
+    else:
+        records = _empty_records()
+
+    counts = np.bincount(records.row, minlength=n_rows)
+    repeats = np.maximum(counts, 1)
+    tidy = results_df.take(np.repeat(np.arange(n_rows), repeats)).reset_index(drop=True)
+    if records.row.size == 0:
+        return tidy
+
+    has_record = np.repeat(counts > 0, repeats)
+    for column in ("athlete_url", "athlete_full_name"):
+        extracted = np.full(len(tidy), np.nan, dtype=object)
+        extracted[has_record] = getattr(records, column)
+        extracted = pd.Series(extracted, index=tidy.index)
+        tidy[column] = tidy.get(column, pd.Series(index=tidy.index)).fillna(extracted)
+    return tidy
+
+
+def explode_athletes_legacy(results_df: pd.DataFrame) -> pd.DataFrame:
+    """Row-wise ``literal_eval`` + ``apply(pd.Series)`` path, kept as a reference."""
+    results_df = results_df.copy()
+    results_df["athlete_records"] = results_df["athletes"].apply(parse_athlete_list)
+    results_exploded = results_df.explode("athlete_records", ignore_index=True)
+
+    athlete_details = results_exploded["athlete_records"].apply(pd.Series)
+    athlete_details = athlete_details.rename(
+        columns={
+            "athlete_full_name": "athlete_full_name_extracted",
+            "athlete_url": "athlete_url_extracted",
+        }
+    )
+    tidy_results = pd.concat([results_exploded.drop(columns=["athlete_records"]), athlete_details], axis=1)
+
+    if "athlete_url_extracted" in tidy_results.columns:
+        tidy_results["athlete_url"] = tidy_results.get("athlete_url", pd.Series(index=tidy_results.index)).fillna(
+            tidy_results["athlete_url_extracted"]
+        )
+        tidy_results = tidy_results.drop(columns=["athlete_url_extracted"], errors="ignore")
+
+    if "athlete_full_name_extracted" in tidy_results.columns:
+        tidy_results["athlete_full_name"] = tidy_results.get(
+            "athlete_full_name", pd.Series(index=tidy_results.index)
+        ).fillna(tidy_results["athlete_full_name_extracted"])
+        tidy_results = tidy_results.drop(columns=["athlete_full_name_extracted"], errors="ignore")
+
+    # ``apply(pd.Series)`` turns the NaN left by empty lists into a stray
+    # positional column named ``0``; it never carried any information.
+    return tidy_results.drop(columns=[0], errors="ignore")
+
+
+def benchmark_athlete_parsing(results_df: pd.DataFrame, repeat: int = 3) -> Dict[str, float]:
+    """Time the legacy and batched paths and check that they agree."""
+    timings: Dict[str, float] = {}
+    outputs = {}
+    for label, func in (("legacy", explode_athletes_legacy), ("batched", explode_athletes)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[label] = func(results_df)
+            best = min(best, time.perf_counter() - start)
+        timings[f"{label}_seconds"] = best
+
+    pd.testing.assert_frame_equal(outputs["legacy"], outputs["batched"], check_column_type=False)
+    timings["rows_in"] = float(len(results_df))
+    timings["rows_out"] = float(len(outputs["batched"]))
+    timings["speedup"] = timings["legacy_seconds"] / max(timings["batched_seconds"], 1e-9)
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .load_data import load_datasets
+
+    parser = argparse.ArgumentParser(description="Benchmark the athlete list parser")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs per path")
+    arguments = parser.parse_args()
+
+    datasets = load_datasets()
+    scores = benchmark_athlete_parsing(datasets["results"], repeat=arguments.repeat)
+    print(f"Rows: {int(scores['rows_in'])} -> {int(scores['rows_out'])}")
+    print(f"Legacy:  {scores['legacy_seconds']:.3f}s")
+    print(f"Batched: {scores['batched_seconds']:.3f}s (x{scores['speedup']:.1f})")
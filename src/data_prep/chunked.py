@@ -0,0 +1,146 @@
+"""Out-of-core build of the processed datasets.
+
+The results file is streamed in chunks of rows instead of being loaded at
+once. Each chunk is exploded and joined against the medals of its editions
+and the athlete profiles, then appended to the processed store. The country
+summary is assembled from per-chunk partial aggregates: medal sums, rank
+sums and counts, and the distinct athletes of each country and edition. Peak
+memory therefore depends on the chunk size and on the two lookup tables, not
+on the size of the results file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .incremental import (
+    assemble_manifest,
+    build_with_sources,
+    frame_fingerprint,
+    partition_fingerprints,
+    partition_labels,
+    update_partition_digests,
+    update_partition_ordinals,
+)
+from .load_data import dataset_schema, iter_raw_csv, raw_dataset_paths, read_raw_csv
+from .storage import DatasetWriter, write_dataset
+
+DEFAULT_CHUNKSIZE = 100_000
+SUMMARY_KEYS = ["country_name", "slug_game"]
+
+# Number of chunk partials kept before they are folded together.
+_COMPACT_EVERY = 16
+
+
+def medals_by_edition(medals_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Split the medals table by edition so each chunk only joins its own."""
+    labels = partition_labels(medals_df)
+    return {str(label): frame for label, frame in medals_df.groupby(labels, sort=False)}
+
+
+def medals_for_chunk(lookup: Dict[str, pd.DataFrame], chunk: pd.DataFrame, empty: pd.DataFrame) -> pd.DataFrame:
+    frames = [lookup[label] for label in partition_labels(chunk).unique() if label in lookup]
+    return pd.concat(frames) if frames else empty
+
+
+class SummaryAccumulator:
+    """Combine per-chunk aggregates into ``country_year_summary``.
+
+    Sums and counts are additive; ``athletes_unique`` needs the distinct
+    ``(country, edition, athlete)`` triples, which are deduplicated as they
+    accumulate.
+    """
+
+    def __init__(self) -> None:
+        self._totals: List[pd.DataFrame] = []
+        self._athletes: List[pd.DataFrame] = []
+
+    def update(self, full_chunk: pd.DataFrame) -> None:
+        frame = full_chunk[SUMMARY_KEYS + ["medal_flag", "rank_position", "athlete_full_name"]]
+        for column in SUMMARY_KEYS:
+            frame = frame.assign(**{column: frame[column].astype(object)})
+        self._totals.append(
+            frame.groupby(SUMMARY_KEYS, dropna=False).agg(
+                medals_total=("medal_flag", "sum"),
+                rank_sum=("rank_position", "sum"),
+                rank_count=("rank_position", "count"),
+            )
+        )
+        self._athletes.append(
+            frame.loc[frame["athlete_full_name"].notna(), SUMMARY_KEYS + ["athlete_full_name"]].drop_duplicates()
+        )
+        if len(self._totals) >= _COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self) -> None:
+        if len(self._totals) > 1:
+            self._totals = [pd.concat(self._totals).groupby(level=SUMMARY_KEYS, dropna=False).sum()]
+        if len(self._athletes) > 1:
+            self._athletes = [pd.concat(self._athletes, ignore_index=True).drop_duplicates()]
+
+    def result(self) -> pd.DataFrame:
+        """Return the summary with the columns and key order of ``build_country_year_summary``."""
+        if not self._totals:
+            return pd.DataFrame(columns=SUMMARY_KEYS + ["medals_total", "athletes_unique", "avg_rank"])
+        self._compact()
+        totals = self._totals[0].reset_index()
+        athletes = self._athletes[0].groupby(SUMMARY_KEYS, dropna=False).size().rename("athletes_unique").reset_index()
+        summary = totals.merge(athletes, on=SUMMARY_KEYS, how="left")
+        summary["athletes_unique"] = summary["athletes_unique"].fillna(0).astype("int64")
+        summary["avg_rank"] = summary["rank_sum"] / summary["rank_count"].where(summary["rank_count"] > 0)
+        summary = summary.sort_values(SUMMARY_KEYS, kind="stable", na_position="last").reset_index(drop=True)
+        return summary[SUMMARY_KEYS + ["medals_total", "athletes_unique", "avg_rank"]]
+
+
+def build_chunked(
+    config: dict,
+    processed_dir: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Tuple[Tuple[Path, Path], dict, np.ndarray]:
+    """Stream the results file and write both processed datasets.
+
+    Returns the two output paths, the preprocessing manifest (identical to
+    the one computed from fully loaded datasets) and the row map of
+    ``olympic_full``.
+    """
+    paths = raw_dataset_paths(config)
+    medals_df = read_raw_csv(paths["medals"], dataset_schema("medals", config))
+    athletes_df = read_raw_csv(paths["athletes"], dataset_schema("athletes", config))
+    lookup = medals_by_edition(medals_df)
+    no_medals = medals_df.iloc[:0]
+
+    digests: Dict[str, "hashlib._Hash"] = {}
+    edition_rows: Dict[str, int] = {}
+    row_maps: List[np.ndarray] = []
+    results_columns: Optional[List[str]] = None
+    summary = SummaryAccumulator()
+
+    with DatasetWriter(processed_dir, "olympic_full", config) as writer:
+        for chunk in iter_raw_csv(paths["results"], dataset_schema("results", config), chunksize):
+            if results_columns is None:
+                results_columns = list(map(str, chunk.columns))
+            update_partition_digests(digests, chunk)
+            ordinals = update_partition_ordinals(edition_rows, chunk)
+            full_chunk, sources = build_with_sources(
+                {"results": chunk, "medals": medals_for_chunk(lookup, chunk, no_medals), "athletes": athletes_df}
+            )
+            row_maps.append(ordinals[sources])
+            writer.write(full_chunk)
+            summary.update(full_chunk)
+            del full_chunk
+    full_path = writer.path
+
+    summary_path = write_dataset(summary.result(), processed_dir, "country_year_summary", config)
+    manifest = assemble_manifest(
+        {label: digest.hexdigest() for label, digest in digests.items()},
+        partition_fingerprints(medals_df),
+        {"results": results_columns or [], "medals": list(map(str, medals_df.columns))},
+        frame_fingerprint(athletes_df),
+    )
+    row_map = np.concatenate(row_maps) if row_maps else np.zeros(0, dtype="int64")
+    return (full_path, summary_path), manifest, row_map
@@ -0,0 +1,292 @@
+"""Inverted filter indexes over the rows of ``results.json``.
+
+The demo endpoints (``/api/results``, ``/api/stats/quick``,
+``/api/data/filtered``) used to run ``applyDemoFilters``, a scan of every row,
+on each request. ``build_demo_data`` now also writes, under
+``data/demo/filters/``, one posting list per value of ``year``, ``season``,
+``sport``, ``medal``, ``gender`` and ``country``:
+
+- ``postings.bin``: the sorted row positions (in ``results.json``) of every
+  list, as little-endian uint32, back to back;
+- ``index.json``: the row count and, per field, ``[value, start, count]``
+  entries locating each list in ``postings.bin`` (in uint32 units).
+
+A query takes the union of the lists of each filtered field, then intersects
+the fields. The ``country`` lists hold the rows whose ``country`` or
+``nationality`` matches, like the scan. The free-text ``search`` filter is not
+indexed: it is applied to the candidates only.
+
+``select`` is the reference engine for ``src/api/filterIndex.js`` and
+``linear_scan`` a port of ``applyDemoFilters``, including its handling of
+missing years (compared as 0). ``verify_filter_index`` checks that both
+return the same rows on random queries:
+
+    python -m src.data_prep.filter_index data/demo --verify 500
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+INDEX_NAME = "index.json"
+POSTINGS_NAME = "postings.bin"
+
+# Indexed field -> row keys whose values it covers.
+FIELDS: Dict[str, Sequence[str]] = {
+    "year": ("year",),
+    "season": ("season",),
+    "sport": ("sport",),
+    "medal": ("medal",),
+    "gender": ("gender",),
+    "country": ("country", "nationality"),
+}
+
+SEARCH_KEYS = ("name", "sport", "nationality", "country", "city")
+
+
+def build_filter_index(rows: Sequence[Dict]) -> Dict:
+    """Posting lists ``{field: {value: [positions]}}`` of ``rows``."""
+    lists: Dict[str, Dict] = {field: {} for field in FIELDS}
+    for position, row in enumerate(rows):
+        for field, keys in FIELDS.items():
+            values = {row.get(key) for key in keys}
+            if len(keys) > 1:
+                # Multi-key fields only index truthy values, like the scan's filter(Boolean).
+                values = {value for value in values if value}
+            for value in values:
+                lists[field].setdefault(value, []).append(position)
+    return {"rows": len(rows), "fields": lists}
+
+
+def _python_value(value):
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def frame_filter_index(frame: pd.DataFrame) -> Dict:
+    """``build_filter_index`` of the records of ``frame``, with numpy position arrays."""
+    rows = np.arange(len(frame))
+    lists: Dict[str, Dict] = {}
+    for field, keys in FIELDS.items():
+        values = pd.concat([frame[key] for key in keys], ignore_index=True)
+        positions = np.tile(rows, len(keys))
+        if len(keys) > 1:
+            truthy = values.notna().to_numpy() & values.astype(object).map(bool).to_numpy()
+            pairs = pd.DataFrame({"position": positions[truthy], "value": values[truthy].to_numpy()}).drop_duplicates()
+            positions, values = pairs["position"].to_numpy(), pairs["value"]
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        order = np.lexsort((positions, codes))
+        bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+        lists[field] = {
+            _python_value(value): positions[order[start:stop]]
+            for value, start, stop in zip(uniques, np.concatenate(([0], bounds[:-1])), bounds)
+        }
+    return {"rows": len(frame), "fields": lists}
+
+
+def write_filter_index(rows: Union[pd.DataFrame, Sequence[Dict]], directory: Path) -> Dict:
+    """Write the index of ``rows`` (dicts or a DataFrame) to ``directory``; return its ``index.json`` payload."""
+    built = frame_filter_index(rows) if isinstance(rows, pd.DataFrame) else build_filter_index(rows)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    chunks = []
+    start = 0
+    fields: Dict[str, List] = {}
+    for field, lists in built["fields"].items():
+        entries = []
+        for value, positions in sorted(lists.items(), key=lambda item: (item[0] is None, str(item[0]))):
+            entries.append([value, start, len(positions)])
+            chunks.append(np.asarray(positions, dtype="<u4"))
+            start += len(positions)
+        fields[field] = entries
+    postings = np.concatenate(chunks) if chunks else np.zeros(0, dtype="<u4")
+    payload = {"version": 1, "rows": built["rows"], "fields": fields}
+
+    # postings.bin first: readers key their cache on index.json.
+    for name, write in (
+        (POSTINGS_NAME, lambda stream: stream.write(postings.tobytes())),
+        (INDEX_NAME, lambda stream: stream.write(json.dumps(payload).encode("utf-8"))),
+    ):
+        temp_path = directory / (name + ".tmp")
+        with temp_path.open("wb") as stream:
+            write(stream)
+        temp_path.replace(directory / name)
+    return payload
+
+
+def load_filter_index(directory: Path) -> Dict:
+    """Read an index written by ``write_filter_index`` back as posting lists."""
+    directory = Path(directory)
+    with (directory / INDEX_NAME).open("r", encoding="utf-8") as stream:
+        payload = json.load(stream)
+    postings = np.fromfile(directory / POSTINGS_NAME, dtype="<u4")
+    fields = {
+        field: {value: postings[start:start + count].tolist() for value, start, count in entries}
+        for field, entries in payload["fields"].items()
+    }
+    return {"rows": payload["rows"], "fields": fields}
+
+
+def _matches_search(row: Dict, search: str) -> bool:
+    needle = search.lower()
+    return any(needle in str(row[key]).lower() for key in SEARCH_KEYS if row.get(key))
+
+
+def linear_scan(
+    rows: Sequence[Dict],
+    year: Optional[int] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    seasons: Sequence[str] = (),
+    countries: Sequence[str] = (),
+    medals: Sequence[str] = (),
+    sports: Sequence[str] = (),
+    sport: Optional[str] = None,
+    medal: Optional[str] = None,
+    gender: Optional[str] = None,
+    search: Optional[str] = None,
+) -> List[int]:
+    """Positions kept by ``applyDemoFilters`` (``yearEquals`` is ``year``, ``medalTypes`` is ``medals``)."""
+    kept = []
+    for position, row in enumerate(rows):
+        row_year = row.get("year")
+        if year is not None and row_year != year:
+            continue
+        if year_min is not None and (row_year or 0) < year_min:
+            continue
+        if year_max is not None and (row_year or 0) > year_max:
+            continue
+        if seasons and row.get("season") not in seasons:
+            continue
+        if countries and not any(value in countries for value in (row.get("country"), row.get("nationality")) if value):
+            continue
+        if medals and row.get("medal") not in medals:
+            continue
+        if sports and row.get("sport") not in sports:
+            continue
+        if sport and row.get("sport") != sport:
+            continue
+        if medal and row.get("medal") != medal:
+            continue
+        if gender and row.get("gender") != gender:
+            continue
+        if search and not _matches_search(row, search):
+            continue
+        kept.append(position)
+    return kept
+
+
+def select(
+    index: Dict,
+    rows: Optional[Sequence[Dict]] = None,
+    year: Optional[int] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    seasons: Sequence[str] = (),
+    countries: Sequence[str] = (),
+    medals: Sequence[str] = (),
+    sports: Sequence[str] = (),
+    sport: Optional[str] = None,
+    medal: Optional[str] = None,
+    gender: Optional[str] = None,
+    search: Optional[str] = None,
+) -> List[int]:
+    """Positions matching the filters of ``linear_scan``, answered from ``index``.
+
+    ``rows`` is only read for ``search``.
+    """
+    fields = index["fields"]
+    constraints = []
+    if year is not None or year_min is not None or year_max is not None:
+        constraints.append([
+            positions for value, positions in fields["year"].items()
+            if (year is None or value == year)
+            and (year_min is None or (value or 0) >= year_min)
+            and (year_max is None or (value or 0) <= year_max)
+        ])
+    for field, values in (("season", seasons), ("country", countries), ("medal", medals), ("sport", sports)):
+        if values:
+            constraints.append([fields[field][value] for value in set(values) if value in fields[field]])
+    for field, value in (("sport", sport), ("medal", medal), ("gender", gender)):
+        if value:
+            constraints.append([fields[field].get(value, ())])
+
+    if constraints:
+        unions = sorted((set().union(*lists) for lists in constraints), key=len)
+        positions = sorted(unions[0].intersection(*unions[1:]))
+    else:
+        positions = list(range(index["rows"]))
+    if search:
+        if rows is None:
+            raise ValueError("The search filter needs the rows")
+        positions = [position for position in positions if _matches_search(rows[position], search)]
+    return positions
+
+
+def random_queries(index: Dict, count: int, seed: int = 0) -> List[Dict]:
+    """Random filter combinations drawn from the indexed values (plus a few unknown ones)."""
+    generator = random.Random(seed)
+    fields = index["fields"]
+    values = {field: [value for value in lists if value is not None] + ["?"] for field, lists in fields.items()}
+    years = [value for value in values["year"] if value != "?"] or [0]
+
+    def pick(field: str, most: int = 3) -> List:
+        return generator.sample(values[field], generator.randint(1, min(most, len(values[field]))))
+
+    queries = []
+    for _ in range(count):
+        query: Dict = {}
+        if generator.random() < 0.3:
+            query["year"] = generator.choice(years)
+        if generator.random() < 0.3:
+            query["year_min"] = generator.choice(years)
+        if generator.random() < 0.3:
+            query["year_max"] = generator.choice(years)
+        for field, key in (("season", "seasons"), ("country", "countries"), ("medal", "medals"), ("sport", "sports")):
+            if generator.random() < 0.3:
+                query[key] = pick(field)
+        for field in ("sport", "medal", "gender"):
+            if generator.random() < 0.15:
+                query[field] = generator.choice(values[field])
+        if generator.random() < 0.1:
+            query["search"] = generator.choice(["an", "e", "ski", "zz"])
+        queries.append(query)
+    return queries
+
+
+def verify_filter_index(rows: Sequence[Dict], index: Dict, queries: Iterable[Dict]) -> int:
+    """Raise ``ValueError`` unless ``select`` and ``linear_scan`` agree on every query."""
+    if index["rows"] != len(rows):
+        raise ValueError(f"Index covers {index['rows']} rows, results have {len(rows)}")
+    checked = 0
+    for query in queries:
+        expected = linear_scan(rows, **query)
+        actual = select(index, rows, **query)
+        if actual != expected:
+            raise ValueError(f"Index mismatch for {query}: {len(actual)} rows instead of {len(expected)}")
+        checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the filter index against a linear scan")
+    parser.add_argument("demo_dir", type=Path, help="Directory holding results.json and filters/")
+    parser.add_argument("--verify", type=int, default=200, metavar="N", help="Number of random queries")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    with (arguments.demo_dir / "results.json").open("r", encoding="utf-8") as stream:
+        results = json.load(stream)
+    filter_index = load_filter_index(arguments.demo_dir / "filters")
+    checked = verify_filter_index(results, filter_index, random_queries(filter_index, arguments.verify, arguments.seed))
+    print(f"Verified: {checked} queries match a linear scan")
@@ -0,0 +1,295 @@
+"""Incremental preprocessing partitioned by Olympic edition (``slug_game``).
+
+Every edition of the results and medals files is fingerprinted. Only the
+editions whose raw rows changed since the last run are exploded, merged and
+aggregated again; the other partitions are taken from the persisted outputs
+and the new partitions are spliced in. A change to the athlete profiles (which
+are shared by every edition) or to the raw column layout triggers a full
+rebuild.
+
+Every mode writes ``olympic_full`` in the row order of a full rebuild (the
+raw results order), so the train/test split does not depend on how the file
+was built. Next to the manifest, ``preprocess_rows.npy`` records for every
+output row the position of its source results row within its edition; an
+incremental run maps the kept rows back to their raw positions with it and
+merges them with the rebuilt ones.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .storage import coerce_schema, read_dataset
+
+PARTITION_KEY = "slug_game"
+MANIFEST_NAME = "preprocess_manifest.json"
+ROW_MAP_NAME = "preprocess_rows.npy"
+MISSING_PARTITION = "__missing__"
+SOURCE_COLUMN = "__source_row__"
+
+
+def partition_labels(df: pd.DataFrame) -> pd.Series:
+    """Return the partition of every row, with a sentinel for missing editions."""
+    return df[PARTITION_KEY].astype(object).where(df[PARTITION_KEY].notna(), MISSING_PARTITION)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Hash the column layout and every row of ``df``."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def update_partition_digests(digests: Dict[str, "hashlib._Hash"], df: pd.DataFrame) -> None:
+    """Feed the row hashes of ``df`` into one running digest per edition.
+
+    Calling it on consecutive chunks of a frame gives the same digests as a
+    single call on the whole frame.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    labels = partition_labels(df)
+    for label, positions in labels.groupby(labels, sort=False).indices.items():
+        key = str(label)
+        if key not in digests:
+            digests[key] = hashlib.blake2b(digest_size=16)
+        digests[key].update(row_hashes[positions].tobytes())
+
+
+def partition_fingerprints(df: pd.DataFrame) -> Dict[str, str]:
+    """Hash the rows of each edition, keeping their order significant."""
+    digests: Dict[str, "hashlib._Hash"] = {}
+    update_partition_digests(digests, df)
+    return {label: digest.hexdigest() for label, digest in digests.items()}
+
+
+def update_partition_ordinals(counts: Dict[str, int], df: pd.DataFrame) -> np.ndarray:
+    """Return the position of every row of ``df`` within its edition.
+
+    ``counts`` holds the rows already seen per edition and is updated, so
+    consecutive chunks of a frame get the same positions as the whole frame.
+    """
+    labels = partition_labels(df).astype(str)
+    ordinals = labels.groupby(labels, sort=False).cumcount().to_numpy(dtype="int64")
+    ordinals = ordinals + labels.map(counts).fillna(0).to_numpy(dtype="int64")
+    for label, count in labels.value_counts(sort=False).items():
+        counts[label] = counts.get(label, 0) + int(count)
+    return ordinals
+
+
+def partition_ordinals(df: pd.DataFrame) -> np.ndarray:
+    return update_partition_ordinals({}, df)
+
+
+def source_positions(results_df: pd.DataFrame, labels: pd.Series, ordinals: np.ndarray) -> np.ndarray:
+    """Raw positions in ``results_df`` of the rows ``(edition, position within the edition)``."""
+    codes, uniques = pd.factorize(partition_labels(results_df).astype(str))
+    by_edition = np.argsort(codes, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1]))
+    row_codes = pd.Index(uniques).get_indexer(labels.astype(str))
+    if (row_codes < 0).any():
+        raise ValueError("Rows reference editions missing from the results file")
+    return by_edition[starts[row_codes] + ordinals]
+
+
+def build_with_sources(
+    datasets: Dict[str, pd.DataFrame],
+    positions: Optional[np.ndarray] = None,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """``build_full_dataframe`` and, for every output row, the results row it comes from.
+
+    ``positions`` are the raw positions of the ``results`` rows (by default
+    ``0..n-1``).
+    """
+    from .preprocess import build_full_dataframe
+
+    results_df = datasets["results"]
+    positions = np.arange(len(results_df)) if positions is None else positions
+    full_df = build_full_dataframe({**datasets, "results": results_df.assign(**{SOURCE_COLUMN: positions})})
+    sources = full_df[SOURCE_COLUMN].to_numpy(dtype="int64")
+    return full_df.drop(columns=SOURCE_COLUMN), sources
+
+
+def assemble_manifest(
+    results_fp: Dict[str, str],
+    medals_fp: Dict[str, str],
+    layout: Dict[str, List[str]],
+    athletes_fp: str,
+) -> dict:
+    partitions = {
+        label: {"results": results_fp.get(label), "medals": medals_fp.get(label)}
+        for label in list(results_fp) + [label for label in medals_fp if label not in results_fp]
+    }
+    return {"layout": layout, "athletes": athletes_fp, "partitions": partitions}
+
+
+def compute_manifest(datasets: Dict[str, pd.DataFrame]) -> dict:
+    """Fingerprint the raw inputs of the preprocessing step."""
+    layout = {
+        "results": list(map(str, datasets["results"].columns)),
+        "medals": list(map(str, datasets["medals"].columns)),
+    }
+    return assemble_manifest(
+        partition_fingerprints(datasets["results"]),
+        partition_fingerprints(datasets["medals"]),
+        layout,
+        frame_fingerprint(datasets["athletes"]),
+    )
+
+
+def read_manifest(processed_dir: Path) -> Optional[dict]:
+    path = processed_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def write_row_map(processed_dir: Path, row_map: np.ndarray) -> str:
+    """Write the per-row edition positions of ``olympic_full``; return their digest."""
+    row_map = np.ascontiguousarray(row_map, dtype="<u4")
+    path = processed_dir / ROW_MAP_NAME
+    temp_path = path.with_suffix(".npy.tmp")
+    with temp_path.open("wb") as stream:
+        np.save(stream, row_map)
+    temp_path.replace(path)
+    return hashlib.blake2b(row_map.tobytes(), digest_size=16).hexdigest()
+
+
+def read_row_map(processed_dir: Path, manifest: dict, rows: int) -> Optional[np.ndarray]:
+    """The row map of the outputs described by ``manifest``, or ``None`` if it is missing or stale."""
+    path = processed_dir / ROW_MAP_NAME
+    if not path.exists() or "row_map" not in manifest:
+        return None
+    row_map = np.load(path)
+    if len(row_map) != rows or hashlib.blake2b(row_map.tobytes(), digest_size=16).hexdigest() != manifest["row_map"]:
+        return None
+    return row_map.astype("int64")
+
+
+def write_manifest(processed_dir: Path, manifest: dict, row_map: Optional[np.ndarray] = None) -> Path:
+    """Write the manifest, and the row map of ``olympic_full`` when given."""
+    if row_map is not None:
+        manifest = dict(manifest, row_map=write_row_map(processed_dir, row_map))
+    path = processed_dir / MANIFEST_NAME
+    temp_path = path.with_suffix(".json.tmp")
+    with temp_path.open("w", encoding="utf-8") as stream:
+        json.dump(manifest, stream, indent=2, sort_keys=True)
+    temp_path.replace(path)
+    return path
+
+
+def changed_partitions(previous: Optional[dict], current: dict) -> Optional[Tuple[List[str], List[str]]]:
+    """Return ``(changed, removed)`` editions, or ``None`` when a full rebuild is needed."""
+    if previous is None:
+        return None
+    if previous.get("layout") != current["layout"] or previous.get("athletes") != current["athletes"]:
+        return None
+    old_partitions = previous.get("partitions", {})
+    changed = [label for label, fp in current["partitions"].items() if old_partitions.get(label) != fp]
+    removed = [label for label in old_partitions if label not in current["partitions"]]
+    return changed, removed
+
+
+def _subset(df: pd.DataFrame, labels: List[str]) -> pd.DataFrame:
+    return df[partition_labels(df).isin(labels)]
+
+
+def sort_summary(summary_df: pd.DataFrame) -> pd.DataFrame:
+    """Match the key order produced by ``groupby(["country_name", "slug_game"])``."""
+    return summary_df.sort_values(["country_name", "slug_game"], kind="stable").reset_index(drop=True)
+
+
+def build_incremental(
+    datasets: Dict[str, pd.DataFrame],
+    processed_dir: Path,
+    config: Optional[dict] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict, np.ndarray]:
+    """Rebuild only the editions whose raw rows changed since the last run.
+
+    Returns the full dataframe (in the row order of a full rebuild), the
+    country summary, the new manifest (with a ``rebuilt`` entry listing the
+    recomputed editions) and the row map to write with it.
+    """
+    from .preprocess import build_country_year_summary
+
+    results_df = datasets["results"]
+    manifest = compute_manifest(datasets)
+    ordinals = partition_ordinals(results_df)
+
+    try:
+        previous_manifest = read_manifest(processed_dir)
+        delta = changed_partitions(previous_manifest, manifest)
+        if delta is not None:
+            previous_full = read_dataset(processed_dir, "olympic_full", config=config)
+            previous_summary = read_dataset(processed_dir, "country_year_summary", config=config)
+            previous_rows = read_row_map(processed_dir, previous_manifest, len(previous_full))
+            if previous_rows is None:
+                delta = None
+    except FileNotFoundError:
+        delta = None
+
+    if delta is None:
+        full_df, sources = build_with_sources(datasets)
+        manifest["rebuilt"] = sorted(manifest["partitions"])
+        return full_df, build_country_year_summary(full_df), manifest, ordinals[sources]
+
+    changed, removed = delta
+    stale = set(changed) | set(removed)
+    manifest["rebuilt"] = sorted(changed)
+
+    kept = ~partition_labels(previous_full).isin(stale).to_numpy()
+    kept_full = previous_full[kept]
+    frames = [kept_full]
+    sources = [source_positions(results_df, partition_labels(kept_full), previous_rows[kept])]
+    summaries = [previous_summary[~partition_labels(previous_summary).isin(stale)]]
+    if changed:
+        positions = np.flatnonzero(partition_labels(results_df).isin(changed).to_numpy())
+        subset = {
+            "results": results_df.take(positions).reset_index(drop=True),
+            "medals": _subset(datasets["medals"], changed).reset_index(drop=True),
+            "athletes": datasets["athletes"],
+        }
+        fresh_full, fresh_sources = build_with_sources(subset, positions)
+        frames.append(fresh_full)
+        sources.append(fresh_sources)
+        summaries.append(build_country_year_summary(fresh_full))
+
+    # Raw results order; rows from one results row keep their build order.
+    sources = np.concatenate(sources)
+    order = np.argsort(sources, kind="stable")
+    full_df = pd.concat(frames, ignore_index=True).take(order).reset_index(drop=True)
+    summary_df = sort_summary(pd.concat(summaries, ignore_index=True))
+    return full_df, summary_df, manifest, ordinals[sources[order]]
+
+
+def verify_against_full_rebuild(
+    datasets: Dict[str, pd.DataFrame],
+    full_df: pd.DataFrame,
+    summary_df: pd.DataFrame,
+) -> None:
+    """Raise ``RuntimeError`` when the outputs differ from a full rebuild, row order included."""
+    from .preprocess import build_country_year_summary, build_full_dataframe
+
+    expected_full = build_full_dataframe(datasets)
+    expected_summary = build_country_year_summary(expected_full)
+
+    for name, expected, actual in (
+        ("olympic_full", expected_full, full_df),
+        ("country_year_summary", expected_summary, summary_df),
+    ):
+        try:
+            pd.testing.assert_frame_equal(
+                coerce_schema(expected, name).reset_index(drop=True),
+                coerce_schema(actual, name).reset_index(drop=True),
+                check_dtype=False,
+                check_column_type=False,
+            )
+        except AssertionError as exc:
+            raise RuntimeError(f"Incremental {name} differs from a full rebuild: {exc}") from exc
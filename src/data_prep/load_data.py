@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
 
 import pandas as pd
 import yaml
 
+from ..instrumentation import instrument
+
 CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "data_paths.yaml"
 
+DATASET_NAMES = ("results", "medals", "athletes")
+
 
 def read_config(config_path: Optional[Path] = None) -> dict:
     """Read the YAML configuration file that stores dataset locations."""
@@ -29,27 +33,136 @@ def _resolve_path(base: Path, fallback: Path, filename: str) -> Path:
     raise FileNotFoundError(f"Cannot locate {filename} in {base} or {fallback}.")
 
 
-def load_datasets(config: Optional[dict] = None) -> Dict[str, pd.DataFrame]:
-    """Load raw Olympic CSV datasets and return them in a dictionary."""
+def raw_dataset_paths(config: Optional[dict] = None) -> Dict[str, Path]:
+    """Resolve the location of the raw results, medals and athletes files."""
     cfg = config or read_config()
     project_root = Path(__file__).resolve().parents[2]
 
     data_root = project_root / cfg.get("data_root", "data")
+    raw_dir = project_root / cfg.get("raw_dir", "data/raw")
+
+    files = cfg.get("files", {})
+    return {
+        "results": _resolve_path(raw_dir, data_root, files.get("results", "olympic_results.csv")),
+        "medals": _resolve_path(raw_dir, data_root, files.get("medals", "olympic_medals.csv")),
+        "athletes": _resolve_path(raw_dir, data_root, files.get("athletes", "olympic_athletes.csv")),
+    }
+
+
+def dataset_schema(name: str, config: Optional[dict] = None) -> dict:
+    """Return the load schema (``usecols``/``dtype``/``category``/``downcast``) of a raw file."""
+    cfg = config or read_config()
+    return dict((cfg.get("schemas") or {}).get(name) or {})
+
+
+def _csv_options(path: Path, schema: dict) -> dict:
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in schema.get("usecols") or [] if column in header] or None
+    dtype = {column: kind for column, kind in (schema.get("dtype") or {}).items() if column in header}
+    dtype.update({column: "category" for column in schema.get("category") or [] if column in header})
+    return {"header": header, "usecols": usecols, "dtype": dtype or None}
+
+
+def _apply_schema(df: pd.DataFrame, options: dict, schema: dict) -> pd.DataFrame:
+    if options["usecols"]:
+        # ``usecols`` does not preserve the requested order.
+        df = df[[column for column in options["header"] if column in options["usecols"]]]
+    if schema.get("downcast"):
+        for column in df.select_dtypes(include="integer").columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    return df
+
+
+def read_raw_csv(path: Path, schema: Optional[dict] = None) -> pd.DataFrame:
+    """Read a raw CSV applying its declared schema.
+
+    ``usecols`` restricts the parsed columns, ``dtype`` forces explicit types,
+    ``category`` lists repeated strings stored as categoricals and
+    ``downcast: true`` shrinks every integer column to its smallest subtype.
+    Columns listed in the schema but absent from the file are ignored.
+    """
+    schema = schema or {}
+    with instrument(f"load.{Path(path).stem}") as step:
+        options = _csv_options(path, schema)
+        df = pd.read_csv(path, usecols=options["usecols"], dtype=options["dtype"])
+        df = _apply_schema(df, options, schema)
+        step.rows_out = len(df)
+    return df
+
+
+def iter_raw_csv(path: Path, schema: Optional[dict] = None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Like :func:`read_raw_csv`, yielding chunks of ``chunksize`` rows.
+
+    Categoricals are built per chunk, so their categories differ between
+    chunks; the positional index keeps counting across chunks.
+    """
+    schema = schema or {}
+    options = _csv_options(path, schema)
+    with pd.read_csv(path, usecols=options["usecols"], dtype=options["dtype"], chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _apply_schema(chunk, options, schema)
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Deep memory footprint of a dataframe in megabytes."""
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def prepare_directories(config: Optional[dict] = None) -> Path:
+    """Create the raw and processed folders if needed; return the processed one."""
+    cfg = config or read_config()
+    project_root = Path(__file__).resolve().parents[2]
+
     raw_dir = project_root / cfg.get("raw_dir", "data/raw")
     processed_dir = project_root / cfg.get("processed_dir", "data/processed")
 
     # Create folders when running the pipeline locally for the first time.
     raw_dir.mkdir(parents=True, exist_ok=True)
     processed_dir.mkdir(parents=True, exist_ok=True)
+    return processed_dir
 
-    files = cfg.get("files", {})
-    results_path = _resolve_path(raw_dir, data_root, files.get("results", "olympic_results.csv"))
-    medals_path = _resolve_path(raw_dir, data_root, files.get("medals", "olympic_medals.csv"))
-    athletes_path = _resolve_path(raw_dir, data_root, files.get("athletes", "olympic_athletes.csv"))
 
-    return {
-        "results": pd.read_csv(results_path),
-        "medals": pd.read_csv(medals_path),
-        "athletes": pd.read_csv(athletes_path),
-        "processed_dir": processed_dir,
-    }
+def load_datasets(config: Optional[dict] = None) -> Dict[str, pd.DataFrame]:
+    """Load raw Olympic CSV datasets and return them in a dictionary."""
+    cfg = config or read_config()
+    processed_dir = prepare_directories(cfg)
+
+    paths = raw_dataset_paths(cfg)
+    with instrument("load.datasets") as step:
+        datasets: Dict[str, object] = {
+            name: read_raw_csv(paths[name], dataset_schema(name, cfg)) for name in DATASET_NAMES
+        }
+        step.rows_out = sum(len(datasets[name]) for name in DATASET_NAMES)
+    datasets["processed_dir"] = processed_dir
+    return datasets
+
+
+def memory_report(config: Optional[dict] = None) -> List[dict]:
+    """Compare the memory of each raw dataset loaded plainly and with its schema."""
+    cfg = config or read_config()
+    paths = raw_dataset_paths(cfg)
+    report = []
+    for name in DATASET_NAMES:
+        plain = pd.read_csv(paths[name])
+        typed = read_raw_csv(paths[name], dataset_schema(name, cfg))
+        report.append(
+            {
+                "dataset": name,
+                "rows": len(typed),
+                "columns_before": plain.shape[1],
+                "columns_after": typed.shape[1],
+                "mb_before": memory_usage_mb(plain),
+                "mb_after": memory_usage_mb(typed),
+            }
+        )
+    return report
+
+
+if __name__ == "__main__":
+    for entry in memory_report():
+        ratio = entry["mb_before"] / max(entry["mb_after"], 1e-9)
+        print(
+            f"{entry['dataset']:<10} {entry['rows']:>9} rows  "
+            f"{entry['columns_before']:>2} -> {entry['columns_after']:>2} cols  "
+            f"{entry['mb_before']:>8.2f} MB -> {entry['mb_after']:>8.2f} MB (x{ratio:.1f})"
+        )
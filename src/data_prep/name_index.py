@@ -0,0 +1,378 @@
+"""Prefix and trigram search index over athlete names.
+
+Name search used to be a substring scan over every athlete. ``build_demo_data``
+now writes ``data/demo/athlete_names.idx``, a single binary file that is
+memory-mapped by ``NameIndex`` (numpy views, no copy):
+
+- names are normalized for matching (``normalize_name``): accents folded,
+  case folded, punctuation turned into spaces;
+- athletes are stored by rank (most medals first, then normalized name), so
+  every posting list is already sorted by relevance and a query can stop at
+  ``limit`` matches;
+- a sorted dictionary of name tokens answers prefix queries (every query word
+  must start a word of the name): the postings of consecutive tokens are
+  stored back to back, so all the tokens sharing a prefix form one slice;
+- a sorted dictionary of trigrams answers substring queries (candidates are
+  checked against the normalized name).
+
+Layout, little-endian uint32 unless noted, every section 4-byte aligned:
+
+    header     b"ANIX", version, athletes, tokens, trigrams, postings, blob bytes
+    athletes   id, medals, name offset, name length, key offset, key length
+    tokens     key offset, key length, postings start, postings count
+    trigrams   key offset, key length, postings start, postings count
+    postings   athlete ranks
+    blob       UTF-8 names and keys (dictionaries are sorted by key bytes)
+
+    python -m src.data_prep.name_index data/demo/athlete_names.idx --query "phelps"
+    python -m src.data_prep.name_index data/demo/athlete_names.idx --bench 2000
+"""
+
+from __future__ import annotations
+
+import mmap
+import random
+import statistics
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b"ANIX"
+VERSION = 1
+HEADER = struct.Struct("<4s6I")
+ATHLETE_FIELDS = 6
+ENTRY_FIELDS = 4
+MODES = ("any", "prefix", "substring")
+# Rough cost of checking one name in Python, in posting entries merged with numpy.
+WALK_COST = 64
+
+
+def normalize_name(text: Optional[str]) -> str:
+    """Accent- and case-folded name with single spaces between alphanumeric words."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join("".join(char if char.isalnum() else " " for char in folded).split())
+
+
+def trigrams(key: str) -> List[str]:
+    return sorted({key[position:position + 3] for position in range(len(key) - 2)})
+
+
+def _sorted_entries(postings: Dict[str, List[int]]) -> List[Tuple[bytes, List[int]]]:
+    return sorted((key.encode("utf-8"), ranks) for key, ranks in postings.items())
+
+
+def write_name_index(athletes: Iterable[Mapping], medals: Mapping[int, int], path: Path) -> int:
+    """Write the index of ``athletes`` (``id`` and ``name``) ranked by ``medals``; return its size."""
+    ranked = []
+    for athlete in athletes:
+        key = normalize_name(athlete.get("name"))
+        if key:
+            ranked.append((-int(medals.get(athlete["id"], 0)), key, int(athlete["id"]), athlete["name"]))
+    ranked.sort()
+
+    tokens: Dict[str, List[int]] = {}
+    grams: Dict[str, List[int]] = {}
+    for rank, (_, key, _, _) in enumerate(ranked):
+        for token in set(key.split()):
+            tokens.setdefault(token, []).append(rank)
+        for gram in trigrams(key):
+            grams.setdefault(gram, []).append(rank)
+
+    blob = bytearray()
+
+    def add(text: bytes) -> Tuple[int, int]:
+        blob.extend(text)
+        return len(blob) - len(text), len(text)
+
+    table = array("I")
+    for negative_medals, key, athlete_id, name in ranked:
+        table.extend((athlete_id, -negative_medals, *add(str(name).encode("utf-8")), *add(key.encode("utf-8"))))
+    postings = array("I")
+    dictionaries = []
+    for entries in (_sorted_entries(tokens), _sorted_entries(grams)):
+        dictionary = array("I")
+        for key, ranks in entries:
+            dictionary.extend((*add(key), len(postings), len(ranks)))
+            postings.extend(ranks)
+        dictionaries.append(dictionary)
+
+    blob.extend(b"\0" * (-len(blob) % 4))
+    sections = [table, *dictionaries, postings]
+    if sys.byteorder != "little":
+        for section in sections:
+            section.byteswap()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("wb") as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, len(ranked), len(tokens), len(grams), len(postings), len(blob)))
+        for section in sections:
+            stream.write(section.tobytes())
+        stream.write(blob)
+    temp_path.replace(path)
+    return path.stat().st_size
+
+
+class NameIndex:
+    """Read-only, memory-mapped view of an ``athlete_names.idx`` file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.athletes, self.tokens, self.trigrams, postings, blob_bytes = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} name index")
+
+        words = self.athletes * ATHLETE_FIELDS + (self.tokens + self.trigrams) * ENTRY_FIELDS + postings
+        self._words = np.frombuffer(self._map, dtype="<u4", count=words, offset=HEADER.size)
+        blob_start = HEADER.size + words * 4
+        self._blob = memoryview(self._map)[blob_start:blob_start + blob_bytes]
+        self._token_base = self.athletes * ATHLETE_FIELDS
+        self._trigram_base = self._token_base + self.tokens * ENTRY_FIELDS
+        self._postings_base = self._trigram_base + self.trigrams * ENTRY_FIELDS
+
+    def close(self) -> None:
+        # The views must go before the map can be closed.
+        self._words = self._blob = None
+        self._map.close()
+
+    def __enter__(self) -> "NameIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Low-level access
+    # ------------------------------------------------------------------
+
+    def _text(self, offset: int, length: int) -> bytes:
+        return bytes(self._blob[offset:offset + length])
+
+    def athlete(self, rank: int) -> Dict:
+        athlete_id, medals, name_offset, name_length = self._words[rank * ATHLETE_FIELDS:rank * ATHLETE_FIELDS + 4].tolist()
+        return {"id": athlete_id, "name": self._text(name_offset, name_length).decode("utf-8"), "medals": medals}
+
+    def key(self, rank: int) -> str:
+        base = rank * ATHLETE_FIELDS + 4
+        return self._text(int(self._words[base]), int(self._words[base + 1])).decode("utf-8")
+
+    def _entry_key(self, base: int, position: int) -> bytes:
+        offset = base + position * ENTRY_FIELDS
+        return self._text(int(self._words[offset]), int(self._words[offset + 1]))
+
+    def _bisect(self, base: int, count: int, key: bytes) -> int:
+        """First dictionary position whose key is not below ``key``."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry_key(base, middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _postings(self, base: int, first: int, last: int) -> np.ndarray:
+        """Postings of dictionary entries ``[first, last)``, stored back to back."""
+        if first == last:
+            return self._words[:0]
+        start = int(self._words[base + first * ENTRY_FIELDS + 2])
+        end_entry = base + (last - 1) * ENTRY_FIELDS
+        end = int(self._words[end_entry + 2]) + int(self._words[end_entry + 3])
+        return self._words[self._postings_base + start:self._postings_base + end]
+
+    def _prefix_postings(self, prefix: str) -> np.ndarray:
+        """Ranks of the names with a token starting with ``prefix`` (with repeats)."""
+        encoded = prefix.encode("utf-8")
+        first = self._bisect(self._token_base, self.tokens, encoded)
+        # 0xFF never occurs in UTF-8, so it sorts after every key starting with the prefix.
+        last = self._bisect(self._token_base, self.tokens, encoded + b"\xff")
+        return self._postings(self._token_base, first, last)
+
+    def _trigram_postings(self, gram: str) -> np.ndarray:
+        encoded = gram.encode("utf-8")
+        position = self._bisect(self._trigram_base, self.trigrams, encoded)
+        if position < self.trigrams and self._entry_key(self._trigram_base, position) == encoded:
+            return self._postings(self._trigram_base, position, position + 1)
+        return self._words[:0]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _prefix_ranks(self, query: str, limit: int) -> List[int]:
+        """Best ranks of the names where every word of ``query`` starts a word."""
+        words = query.split()
+        lists = sorted((self._prefix_postings(word) for word in set(words)), key=len)
+        if len(lists[0]) == 0:
+            return []
+
+        density = 1.0
+        for postings in lists:
+            density *= min(len(postings) / self.athletes, 1.0)
+        if limit / density * WALK_COST < sum(map(len, lists)):
+            # Broad prefixes: walking the ranks finds ``limit`` names before the
+            # posting lists could be merged.
+            ranks = []
+            for rank in range(self.athletes):
+                tokens = self.key(rank).split()
+                if all(any(token.startswith(word) for token in tokens) for word in words):
+                    ranks.append(rank)
+                    if len(ranks) == limit:
+                        break
+            return ranks
+
+        candidates = np.unique(lists[0])
+        for postings in lists[1:]:
+            candidates = candidates[np.isin(candidates, postings)]
+        return candidates[:limit].tolist()
+
+    def _substring_ranks(self, query: str, limit: int) -> List[int]:
+        """Best ranks of the names containing ``query`` (3 characters or more)."""
+        lists = sorted((self._trigram_postings(gram) for gram in trigrams(query)), key=len)
+        candidates = lists[0]
+        for postings in lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = candidates[np.isin(candidates, postings, assume_unique=True)]
+        ranks = []
+        for rank in candidates.tolist():
+            if query in self.key(rank):
+                ranks.append(rank)
+                if len(ranks) == limit:
+                    break
+        return ranks
+
+    def search(self, query: str, limit: int = 20, mode: str = "any") -> List[Dict]:
+        """Athletes matching ``query``, most medals first.
+
+        ``prefix`` keeps names where every query word starts a word of the
+        name, ``substring`` names containing the query (3 characters or
+        more), ``any`` either of them.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        key = normalize_name(query)
+        if not key or limit < 1:
+            return []
+        ranks = set()
+        if mode in ("any", "prefix"):
+            ranks.update(self._prefix_ranks(key, limit))
+        if mode in ("any", "substring") and len(key) >= 3:
+            ranks.update(self._substring_ranks(key, limit))
+        return [self.athlete(rank) for rank in sorted(ranks)[:limit]]
+
+
+def scan_search(keys: Sequence[str], query: str, limit: int = 20, mode: str = "any") -> List[int]:
+    """Ranks matched by ``NameIndex.search``, found by scanning every normalized name."""
+    key = normalize_name(query)
+    if not key or limit < 1:
+        return []
+    words = key.split()
+    matches = []
+    for rank, name in enumerate(keys):
+        tokens = name.split()
+        prefix = mode != "substring" and all(any(token.startswith(word) for token in tokens) for word in words)
+        substring = mode != "prefix" and len(key) >= 3 and key in name
+        if prefix or substring:
+            matches.append(rank)
+            if len(matches) == limit:
+                break
+    return matches
+
+
+def sample_queries(index: NameIndex, count: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """``(kind, query)`` pairs drawn from the indexed names: prefixes, surnames, substrings and misses."""
+    generator = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        key = index.key(generator.randrange(index.athletes))
+        kind = generator.choice(("prefix", "word", "substring", "miss"))
+        if kind == "prefix":
+            query = key[:generator.randint(1, min(len(key), 8))]
+        elif kind == "word":
+            query = generator.choice(key.split())
+        elif kind == "substring":
+            start = generator.randrange(max(len(key) - 3, 1))
+            query = key[start:start + generator.randint(3, 6)]
+        else:
+            query = "".join(generator.choice("qxzjkvw") for _ in range(4))
+        queries.append((kind, query))
+    return queries
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+def benchmark(index: NameIndex, queries: Sequence[Tuple[str, str]], limit: int = 20) -> Dict[str, Dict[str, float]]:
+    """p50/p99 latency of ``search`` per query kind, next to a full scan of the names.
+
+    Raises ``ValueError`` if the index and the scan disagree on a query.
+    """
+    keys = [index.key(rank) for rank in range(index.athletes)]
+    timings: Dict[str, Dict[str, List[float]]] = {}
+    for kind, query in queries:
+        start = time.perf_counter()
+        found = [athlete["id"] for athlete in index.search(query, limit)]
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = [index.athlete(rank)["id"] for rank in scan_search(keys, query, limit)]
+        scanned = time.perf_counter() - start
+        if found != expected:
+            raise ValueError(f"Index and scan disagree on {query!r}")
+        for label in (kind, "all"):
+            entry = timings.setdefault(label, {"index": [], "scan": []})
+            entry["index"].append(indexed)
+            entry["scan"].append(scanned)
+    return {
+        kind: {
+            "queries": len(entry["index"]),
+            **{f"index_{name}": value for name, value in _percentiles(entry["index"]).items()},
+            **{f"scan_{name}": value for name, value in _percentiles(entry["scan"]).items()},
+        }
+        for kind, entry in timings.items()
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Query or benchmark the athlete name index")
+    parser.add_argument("path", type=Path, help="athlete_names.idx written by build_demo_data")
+    parser.add_argument("--query", default=None)
+    parser.add_argument("--mode", choices=MODES, default="any")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--bench", type=int, default=0, metavar="N", help="Time N sampled queries")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    with NameIndex(arguments.path) as name_index:
+        print(f"Opened {name_index.athletes} athletes in {(time.perf_counter() - start) * 1000:.2f} ms")
+        if arguments.query is not None:
+            print(json.dumps(name_index.search(arguments.query, arguments.limit, arguments.mode), ensure_ascii=False, indent=2))
+        if arguments.bench:
+            report = benchmark(name_index, sample_queries(name_index, arguments.bench, arguments.seed), arguments.limit)
+            for kind, entry in sorted(report.items()):
+                print(
+                    f"{kind:<10} {entry['queries']:>6} queries  index p50 {entry['index_p50_ms']:.3f} ms"
+                    f"  p99 {entry['index_p99_ms']:.3f} ms  |  scan p50 {entry['scan_p50_ms']:.3f} ms"
+                    f"  p99 {entry['scan_p99_ms']:.3f} ms"
+                )
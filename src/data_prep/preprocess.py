@@ -2,77 +2,64 @@
 
 from __future__ import annotations
 
-import ast
 from pathlib import Path
 from typing import Dict, Tuple
 
 import pandas as pd
 
-from .load_data import load_datasets, read_config
+from ..instrumentation import instrument, instrumented
+from .athlete_parser import explode_athletes, parse_athlete_list
+from .chunked import build_chunked
+from .incremental import (
+    build_incremental,
+    build_with_sources,
+    compute_manifest,
+    partition_ordinals,
+    verify_against_full_rebuild,
+    write_manifest,
+)
+from .load_data import load_datasets, prepare_directories, read_config
+from .storage import read_dataset, write_dataset
 
 
-def parse_athlete_list(cell: str) -> list:
-    """Parse the athlete list column into python objects."""
-    if isinstance(cell, str) and cell.startswith("["):
-        try:
-            parsed = ast.literal_eval(cell)
-            return [
-                {
-                    "athlete_full_name": entry[0],
-                    "athlete_url": entry[1],
-                }
-                for entry in parsed
-                if len(entry) == 2
-            ]
-        except (ValueError, SyntaxError):
-            return []
-    return []
+def _decategorize(series: pd.Series) -> pd.Series:
+    """Return a categorical column with the dtype of its categories."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(series.cat.categories.dtype)
+    return series
 
 
 def build_full_dataframe(datasets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     """Explode athlete lists, merge medals and athlete profiles."""
-    results_df = datasets["results"].copy()
-    medals_df = datasets["medals"].copy()
-    athletes_df = datasets["athletes"].copy()
-
-    results_df["athlete_records"] = results_df["athletes"].apply(parse_athlete_list)
-    results_exploded = results_df.explode("athlete_records", ignore_index=True)
-
-    athlete_details = results_exploded["athlete_records"].apply(pd.Series)
-    athlete_details = athlete_details.rename(
-        columns={
-            "athlete_full_name": "athlete_full_name_extracted",
-            "athlete_url": "athlete_url_extracted",
-        }
-    )
-    tidy_results = pd.concat([results_exploded.drop(columns=["athlete_records"]), athlete_details], axis=1)
-
-    if "athlete_url_extracted" in tidy_results.columns:
-        tidy_results["athlete_url"] = tidy_results.get("athlete_url", pd.Series(index=tidy_results.index)).fillna(
-            tidy_results["athlete_url_extracted"]
+    # No defensive copies: every step below returns new frames.
+    results_df = datasets["results"]
+    medals_df = datasets["medals"]
+    athletes_df = datasets["athletes"]
+
+    with instrument("preprocess.explode", rows_in=len(results_df)) as step:
+        tidy_results = explode_athletes(results_df)
+        step.rows_out = len(tidy_results)
+
+    with instrument("preprocess.merge", rows_in=len(tidy_results)) as step:
+        medals_trimmed = medals_df.rename(columns={"medal_type": "medal_type_medals"})
+        merged = tidy_results.merge(
+            medals_trimmed[["athlete_url", "slug_game", "event_title", "medal_type_medals"]],
+            on=["athlete_url", "slug_game", "event_title"],
+            how="left",
         )
-        tidy_results = tidy_results.drop(columns=["athlete_url_extracted"], errors="ignore")
-
-    if "athlete_full_name_extracted" in tidy_results.columns:
-        tidy_results["athlete_full_name"] = tidy_results.get(
-            "athlete_full_name", pd.Series(index=tidy_results.index)
-        ).fillna(tidy_results["athlete_full_name_extracted"])
-        tidy_results = tidy_results.drop(columns=["athlete_full_name_extracted"], errors="ignore")
-
-    medals_trimmed = medals_df.rename(columns={"medal_type": "medal_type_medals"})
-    merged = tidy_results.merge(
-        medals_trimmed[["athlete_url", "slug_game", "event_title", "medal_type_medals"]],
-        on=["athlete_url", "slug_game", "event_title"],
-        how="left",
-    )
-    merged = merged.merge(athletes_df, on="athlete_url", how="left", suffixes=("", "_profile"))
+        merged = merged.merge(athletes_df, on="athlete_url", how="left", suffixes=("", "_profile"))
 
-    merged["medal_type_final"] = merged.get("medal_type").fillna(merged.get("medal_type_medals"))
-    merged["medal_flag"] = merged["medal_type_final"].notna().astype(int)
-    merged["rank_position"] = pd.to_numeric(merged.get("rank_position"), errors="coerce")
+        # Both medal columns may be categoricals with different categories.
+        merged["medal_type_final"] = _decategorize(merged.get("medal_type")).fillna(
+            _decategorize(merged.get("medal_type_medals"))
+        )
+        merged["medal_flag"] = merged["medal_type_final"].notna().astype(int)
+        merged["rank_position"] = pd.to_numeric(merged.get("rank_position"), errors="coerce")
+        step.rows_out = len(merged)
     return merged
 
 
+@instrumented("preprocess.summary")
 def build_country_year_summary(full_df: pd.DataFrame) -> pd.DataFrame:
     """Aggregate results by country and edition to create modeling features."""
     aggregation_map = {
@@ -81,7 +68,7 @@ def build_country_year_summary(full_df: pd.DataFrame) -> pd.DataFrame:
         "rank_position": "mean",
     }
     summary = (
-        full_df.groupby(["country_name", "slug_game"], dropna=False)
+        full_df.groupby(["country_name", "slug_game"], dropna=False, observed=True)
         .agg(aggregation_map)
         .rename(
             columns={
@@ -95,28 +82,90 @@ def build_country_year_summary(full_df: pd.DataFrame) -> pd.DataFrame:
     return summary
 
 
-def save_outputs(full_df: pd.DataFrame, summary_df: pd.DataFrame, processed_dir: Path) -> Tuple[Path, Path]:
+def save_outputs(
+    full_df: pd.DataFrame,
+    summary_df: pd.DataFrame,
+    processed_dir: Path,
+    config: dict | None = None,
+) -> Tuple[Path, Path]:
     """Persist the processed datasets to disk."""
-    processed_dir.mkdir(parents=True, exist_ok=True)
-    full_path = processed_dir / "olympic_full.csv"
-    summary_path = processed_dir / "country_year_summary.csv"
-    full_df.to_csv(full_path, index=False)
-    summary_df.to_csv(summary_path, index=False)
+    full_path = write_dataset(full_df, processed_dir, "olympic_full", config)
+    summary_path = write_dataset(summary_df, processed_dir, "country_year_summary", config)
     return full_path, summary_path
 
 
-def run_preprocessing(config_path: Path | None = None) -> Tuple[Path, Path]:
-    """Execute the full preprocessing pipeline."""
+@instrumented("preprocess")
+def run_preprocessing(
+    config_path: Path | None = None,
+    incremental: bool = False,
+    verify: bool = False,
+    chunksize: int | None = None,
+) -> Tuple[Path, Path]:
+    """Execute the full preprocessing pipeline.
+
+    With ``incremental=True`` only the editions whose raw rows changed since
+    the previous run are recomputed. With ``chunksize`` the results file is
+    streamed out of core, ``chunksize`` rows at a time. ``verify=True``
+    compares the result with an in-memory full rebuild, before anything is
+    written (after writing in chunked mode, by reading the outputs back).
+    """
     config = read_config(config_path)
+
+    if chunksize:
+        if incremental:
+            raise ValueError("Chunked preprocessing cannot be combined with incremental mode.")
+        processed_dir = prepare_directories(config)
+        with instrument("preprocess.chunked", chunksize=chunksize):
+            paths, manifest, row_map = build_chunked(config, processed_dir, chunksize)
+        if verify:
+            datasets = load_datasets(config)
+            datasets.pop("processed_dir")
+            verify_against_full_rebuild(
+                datasets,
+                read_dataset(processed_dir, "olympic_full", config=config),
+                read_dataset(processed_dir, "country_year_summary", config=config),
+            )
+            print("Verified: output matches a full rebuild")
+        write_manifest(processed_dir, manifest, row_map)
+        return paths
+
     datasets = load_datasets(config)
     processed_dir: Path = datasets.pop("processed_dir")
 
-    full_df = build_full_dataframe(datasets)
-    summary_df = build_country_year_summary(full_df)
-    return save_outputs(full_df, summary_df, processed_dir)
+    if incremental:
+        with instrument("preprocess.incremental") as step:
+            full_df, summary_df, manifest, row_map = build_incremental(datasets, processed_dir, config)
+            step.rows_out = len(full_df)
+        print(f"Rebuilt {len(manifest['rebuilt'])}/{len(manifest['partitions'])} editions")
+    else:
+        full_df, sources = build_with_sources(datasets)
+        summary_df = build_country_year_summary(full_df)
+        manifest = compute_manifest(datasets)
+        row_map = partition_ordinals(datasets["results"])[sources]
+
+    if verify:
+        with instrument("preprocess.verify", rows_in=len(full_df)):
+            verify_against_full_rebuild(datasets, full_df, summary_df)
+        print("Verified: output matches a full rebuild")
+
+    paths = save_outputs(full_df, summary_df, processed_dir, config)
+    write_manifest(processed_dir, manifest, row_map)
+    return paths
 
 
 if __name__ == "__main__":
-    full_path, summary_path = run_preprocessing()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the Olympic preprocessing pipeline")
+    parser.add_argument("--incremental", action="store_true", help="Only rebuild editions whose inputs changed")
+    parser.add_argument("--verify", action="store_true", help="Check the output against a full rebuild")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the results file by chunks of N rows")
+    arguments = parser.parse_args()
+
+    full_path, summary_path = run_preprocessing(
+        incremental=arguments.incremental,
+        verify=arguments.verify,
+        chunksize=arguments.chunksize,
+    )
     print(f"Saved detailed dataset to: {full_path}")
     print(f"Saved country summary to: {summary_path}")
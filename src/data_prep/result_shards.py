@@ -0,0 +1,237 @@
+"""Sharded, offset-indexed copy of ``results.json`` for paginated reads.
+
+``/api/results`` used to parse the whole ``results.json`` to return one page.
+``build_demo_data`` now also writes the same rows, sorted like the MySQL
+query (year descending, then sport and athlete name), as NDJSON shards of
+``shard_size`` rows under ``data/demo/results/`` next to a ``manifest.json``:
+
+- ``shards``: file, first row, row count, size and the byte offset of every
+  ``stride``-th line, so that any row is at most ``stride - 1`` lines away
+  from a known offset;
+- ``partitions``: one entry per (year, sport) with its first row, row count,
+  shard and byte offset. Sorting by year first keeps every partition, and
+  every year, contiguous.
+
+``read_page`` (and ``src/api/resultShards.js`` on the Node side) seeks to the
+requested page and only decodes its rows. Lines are ASCII-only JSON, so
+character and byte offsets match. ``build_demo_data`` passes a DataFrame, which
+is sorted with one ``lexsort`` and only turned into dicts one shard at a time.
+It also writes ``results.json`` in this order (``frame_order``), so pages
+filtered on other fields keep the order of the shards.
+
+    python -m src.data_prep.result_shards data/demo/results --year 2020 --sport Athletics --offset 50
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .rollups import json_records
+
+MANIFEST_NAME = "manifest.json"
+SHARD_SIZE = 5000
+INDEX_STRIDE = 50
+SORT_ORDER = ["-year", "sport", "name"]
+
+
+def sort_key(row: Dict) -> tuple:
+    """``ORDER BY year DESC, sport, name`` with MySQL's null placement."""
+    year, sport, name = row.get("year"), row.get("sport"), row.get("name")
+    return (year is None, -(year or 0), sport is not None, sport or "", name is not None, name or "")
+
+
+def frame_order(frame: pd.DataFrame) -> np.ndarray:
+    """Positions of ``frame`` rows in ``sort_key`` order (stable, like ``sorted``)."""
+    year = frame["year"]
+    keys = [pd.isna(year).to_numpy(), -pd.to_numeric(year).fillna(0).to_numpy()]
+    for column in ("sport", "name"):
+        # Sorted factorization codes order strings like Python comparisons.
+        codes, _ = pd.factorize(frame[column], sort=True)
+        keys.extend([frame[column].notna().to_numpy(), codes])
+    return np.lexsort(keys[::-1])
+
+
+def _sorted_shards(rows: Union[pd.DataFrame, Iterable[Dict]], shard_size: int) -> Iterator[List[Dict]]:
+    if isinstance(rows, pd.DataFrame):
+        order = frame_order(rows)
+        for start in range(0, len(order), shard_size):
+            yield json_records(rows.take(order[start:start + shard_size]))
+        return
+    ordered = sorted(rows, key=sort_key)
+    for start in range(0, len(ordered), shard_size):
+        yield ordered[start:start + shard_size]
+
+
+def write_result_shards(
+    rows: Union[pd.DataFrame, Iterable[Dict]],
+    directory: Path,
+    shard_size: int = SHARD_SIZE,
+    stride: int = INDEX_STRIDE,
+) -> Dict:
+    """Sort ``rows`` (dicts or a DataFrame), write them as NDJSON shards and return the manifest.
+
+    The shards are written to a sibling directory that replaces ``directory``
+    once complete, so readers never see a partial set.
+    """
+    if shard_size < 1 or stride < 1:
+        raise ValueError("shard_size and stride must be positive")
+    directory = Path(directory)
+    temp_dir = directory.with_name(directory.name + ".tmp")
+    if temp_dir.exists():
+        shutil.rmtree(temp_dir)
+    temp_dir.mkdir(parents=True)
+
+    shards: List[Dict] = []
+    partitions: List[Dict] = []
+    first_row = 0
+    for shard_rows in _sorted_shards(rows, shard_size):
+        shard = {
+            "file": f"results-{len(shards):05d}.ndjson",
+            "first_row": first_row,
+            "rows": len(shard_rows),
+            "bytes": 0,
+            "offsets": [],
+        }
+        lines = []
+        position = 0
+        for local, row in enumerate(shard_rows):
+            line = json.dumps(row, ensure_ascii=True) + "\n"
+            if local % stride == 0:
+                shard["offsets"].append(position)
+            key = [row.get("year"), row.get("sport")]
+            if not partitions or partitions[-1]["key"] != key:
+                partitions.append({"key": key, "first_row": first_row + local, "rows": 0, "shard": len(shards), "offset": position})
+            partitions[-1]["rows"] += 1
+            lines.append(line)
+            position += len(line)
+        shard["bytes"] = position
+        (temp_dir / shard["file"]).write_text("".join(lines), encoding="ascii")
+        shards.append(shard)
+        first_row += len(shard_rows)
+
+    manifest = {
+        "version": 1,
+        "format": "ndjson",
+        "sort": SORT_ORDER,
+        "total": first_row,
+        "shard_size": shard_size,
+        "stride": stride,
+        "shards": shards,
+        "partitions": [
+            {"year": entry["key"][0], "sport": entry["key"][1], **{k: v for k, v in entry.items() if k != "key"}}
+            for entry in partitions
+        ],
+    }
+    with (temp_dir / MANIFEST_NAME).open("w", encoding="utf-8") as stream:
+        json.dump(manifest, stream)
+
+    if directory.exists():
+        previous = directory.with_name(directory.name + ".old")
+        shutil.rmtree(previous, ignore_errors=True)
+        directory.replace(previous)
+        temp_dir.replace(directory)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        temp_dir.replace(directory)
+    return manifest
+
+
+def read_manifest(directory: Path) -> Dict:
+    with (Path(directory) / MANIFEST_NAME).open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def row_ranges(manifest: Dict, year: Optional[int] = None, sport: Optional[str] = None) -> List[Tuple[int, int, Optional[Dict]]]:
+    """Global row ranges ``(first_row, rows, partition)`` matching the filters, in order."""
+    if year is None and sport is None:
+        return [(0, manifest["total"], None)]
+    matches = [
+        entry for entry in manifest["partitions"]
+        if (year is None or entry["year"] == year) and (sport is None or entry["sport"] == sport)
+    ]
+    if sport is None and matches:
+        # Partitions of one year are adjacent: read them as a single range.
+        return [(matches[0]["first_row"], sum(entry["rows"] for entry in matches), matches[0])]
+    return [(entry["first_row"], entry["rows"], entry) for entry in matches]
+
+
+def _read_span(directory: Path, manifest: Dict, start: int, stop: int, anchor: Optional[Dict] = None) -> List[Dict]:
+    """Rows ``[start, stop)`` of one shard, reading from the closest known offset.
+
+    ``anchor`` is a partition entry whose byte offset may be closer than the
+    stride index.
+    """
+    stride = manifest["stride"]
+    shard = manifest["shards"][start // manifest["shard_size"]]
+    local_start, local_stop = start - shard["first_row"], stop - shard["first_row"]
+
+    first_line = (local_start // stride) * stride
+    begin = shard["offsets"][local_start // stride]
+    if anchor is not None and anchor["shard"] == start // manifest["shard_size"]:
+        anchor_line = anchor["first_row"] - shard["first_row"]
+        if first_line < anchor_line <= local_start:
+            first_line, begin = anchor_line, anchor["offset"]
+    end_index = -(-local_stop // stride)
+    end = shard["offsets"][end_index] if end_index < len(shard["offsets"]) else shard["bytes"]
+
+    with (Path(directory) / shard["file"]).open("rb") as stream:
+        stream.seek(begin)
+        lines = stream.read(end - begin).splitlines()
+    skip = local_start - first_line
+    return [json.loads(line) for line in lines[skip:skip + local_stop - local_start]]
+
+
+def read_rows(directory: Path, manifest: Dict, ranges: Sequence[Tuple[int, int, Optional[Dict]]], offset: int, limit: int) -> List[Dict]:
+    """Rows ``[offset, offset + limit)`` of the concatenation of ``ranges``."""
+    shard_size = manifest["shard_size"]
+    rows: List[Dict] = []
+    for first_row, count, anchor in ranges:
+        if len(rows) >= limit:
+            break
+        if offset >= count:
+            offset -= count
+            continue
+        start = first_row + offset
+        stop = first_row + min(count, offset + limit - len(rows))
+        offset = 0
+        while start < stop:
+            shard_stop = min(stop, (start // shard_size + 1) * shard_size)
+            rows.extend(_read_span(directory, manifest, start, shard_stop, anchor))
+            start = shard_stop
+    return rows
+
+
+def read_page(
+    directory: Path,
+    offset: int = 0,
+    limit: int = 50,
+    year: Optional[int] = None,
+    sport: Optional[str] = None,
+    manifest: Optional[Dict] = None,
+) -> Tuple[List[Dict], int]:
+    """One page of rows filtered on (year, sport), with the filtered total."""
+    manifest = manifest if manifest is not None else read_manifest(directory)
+    ranges = row_ranges(manifest, year, sport)
+    total = sum(count for _, count, _ in ranges)
+    return read_rows(directory, manifest, ranges, offset, limit), total
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Read one page of the sharded results")
+    parser.add_argument("directory", type=Path, help="Directory holding manifest.json and the shards")
+    parser.add_argument("--year", type=int, default=None)
+    parser.add_argument("--sport", default=None)
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=50)
+    arguments = parser.parse_args()
+
+    page, total = read_page(arguments.directory, arguments.offset, arguments.limit, arguments.year, arguments.sport)
+    print(json.dumps({"total": total, "results": page}, ensure_ascii=False, indent=2))
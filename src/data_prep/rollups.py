@@ -0,0 +1,100 @@
+"""Precomputed rollups of ``olympic_full`` served by the API.
+
+The demo endpoints used to aggregate ``results.json`` on every request
+(``/api/medals``, ``/api/stats``, ``/api/sports/top``) and the MySQL ones to
+scan ``medals``. The rollups below are computed once, with pandas groupbys,
+over the rows ``build_demo_data`` publishes in ``results.json`` (one per
+``olympic_full`` row that names an athlete):
+
+- ``medals``: medal counts per (year, city, medal), newest edition first;
+- ``sports``: rows and medals per sport, most represented first;
+- ``countries``: rows and medals (by colour) per country;
+- ``stats``: overall totals.
+
+``build_demo_data`` writes them as ``data/demo/rollup_*.json``. The MySQL
+``summary_*`` tables of ``sql/init_db.sql`` hold the same rollups, but
+``load_data_to_mysql.py --rollups`` builds them with ``INSERT ... SELECT``
+over the ``medals``/``athletes``/``results`` tables, the sources of the
+queries they replace: MySQL responses keep their values.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+import pandas as pd
+
+MEDAL_ORDER = {"GOLD": 0, "SILVER": 1, "BRONZE": 2}
+
+ROLLUP_FILES = {
+    "medals": "rollup_medals.json",
+    "sports": "rollup_sports.json",
+    "countries": "rollup_countries.json",
+    "stats": "rollup_stats.json",
+}
+
+COUNTRY_FIELDS = ["country", "participants", "medals", "gold", "silver", "bronze"]
+
+
+def json_records(df: pd.DataFrame) -> List[Dict]:
+    """JSON-ready records: numpy scalars as Python values, missing values as None.
+
+    Columns are converted with one ``tolist`` each, then zipped into rows,
+    which is much cheaper than boxing cell by cell through ``to_dict``.
+    """
+    columns = []
+    for _, series in df.items():
+        values = series.astype(object).where(series.notna(), None).tolist()
+        if series.dtype == object:
+            values = [value.item() if hasattr(value, "item") else value for value in values]
+        columns.append(values)
+    keys = list(df.columns)
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def medals_by_year_city(rows: pd.DataFrame) -> List[Dict]:
+    medals = rows[rows["medal"].notna()]
+    counts = medals.groupby(["year", "city", "medal"], dropna=False, sort=False).size().rename("count").reset_index()
+    counts = counts.assign(
+        _year=counts["year"].fillna(0).astype("int64"),
+        _city=counts["city"].fillna(""),
+        _medal=counts["medal"].map(MEDAL_ORDER).fillna(99),
+    )
+    counts = counts.sort_values(["_year", "_city", "_medal"], ascending=[False, True, True], kind="stable")
+    return json_records(counts[["year", "city", "medal", "count"]])
+
+
+def sport_totals(rows: pd.DataFrame) -> List[Dict]:
+    """Rows and medals per sport; ties keep the order of first appearance."""
+    sports = rows[rows["sport"].notna()]
+    totals = sports.groupby("sport", sort=False).agg(participants=("sport", "size"), medals=("medal", "count")).reset_index()
+    totals = totals.sort_values("participants", ascending=False, kind="stable")
+    return json_records(totals)
+
+
+def country_totals(rows: pd.DataFrame) -> List[Dict]:
+    countries = rows[rows["country"].notna()]
+    by_medal = pd.crosstab(countries["country"], countries["medal"]).reindex(columns=list(MEDAL_ORDER), fill_value=0)
+    totals = countries.groupby("country").agg(participants=("country", "size"), medals=("medal", "count"))
+    totals = totals.join(by_medal.rename(columns=str.lower)).fillna(0).reset_index()
+    totals = totals.sort_values(["medals", "country"], ascending=[False, True], kind="stable")
+    return json_records(totals[COUNTRY_FIELDS])
+
+
+def overall_stats(rows: pd.DataFrame) -> Dict[str, int]:
+    return {
+        "total_athletes": int(rows["athlete_key"].nunique()),
+        "total_results": int(len(rows)),
+        "total_medals": int(rows["medal"].notna().sum()),
+        "total_sports": int(rows["sport"].nunique()),
+    }
+
+
+def rollups_from_rows(rows: pd.DataFrame) -> Dict[str, object]:
+    """Every rollup of the ``results.json`` rows (``athlete_key``, ``year``, ``city``, ``sport``, ``country``, ``medal``)."""
+    return {
+        "medals": medals_by_year_city(rows),
+        "sports": sport_totals(rows),
+        "countries": country_totals(rows),
+        "stats": overall_stats(rows),
+    }
@@ -0,0 +1,289 @@
+"""Columnar storage layer for the processed Olympic datasets.
+
+Processed tables are written as compressed Parquet files with an explicit
+schema, so readers get stable dtypes and can project only the columns they
+need. CSV stays available as an export format (the API and the notebooks
+still consume ``country_year_summary.csv``) and as a read fallback for trees
+that only contain the historical CSV outputs.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from ..instrumentation import instrument
+
+try:  # pragma: no cover - depends on the local environment
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+DEFAULT_STORAGE = {
+    "format": "parquet",
+    "compression": "zstd",
+    "export_csv": True,
+}
+
+# Logical column types per processed dataset. Columns missing from a schema
+# keep the dtype inferred by pandas/pyarrow.
+PROCESSED_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "olympic_full": {
+        "discipline_title": "string",
+        "event_title": "string",
+        "slug_game": "string",
+        "participant_type": "string",
+        "medal_type": "string",
+        "athletes": "string",
+        "rank_equal": "bool",
+        "rank_position": "float64",
+        "country_name": "string",
+        "country_code": "string",
+        "country_3_letter_code": "string",
+        "athlete_url": "string",
+        "athlete_full_name": "string",
+        "value_unit": "string",
+        "value_type": "string",
+        "medal_type_medals": "string",
+        "athlete_full_name_profile": "string",
+        "games_participations": "float64",
+        "first_game": "string",
+        "athlete_year_birth": "float64",
+        "athlete_medals": "string",
+        "medal_type_final": "string",
+        "medal_flag": "int64",
+    },
+    "country_year_summary": {
+        "country_name": "string",
+        "slug_game": "string",
+        "medals_total": "int64",
+        "athletes_unique": "int64",
+        "avg_rank": "float64",
+    },
+    "country_year_features": {
+        "country_name": "string",
+        "slug_game": "string",
+        "game_year": "int64",
+        "game_season": "string",
+        "edition_order": "int64",
+        "is_host": "bool",
+        "is_next_host": "bool",
+    },
+}
+
+_ARROW_TYPES = {
+    "string": "string",
+    "float64": "float64",
+    "int64": "int64",
+    "bool": "bool_",
+}
+
+
+def storage_settings(config: Optional[dict] = None) -> dict:
+    """Return the ``storage`` section of the data config merged with defaults."""
+    settings = dict(DEFAULT_STORAGE)
+    settings.update((config or {}).get("storage", {}) or {})
+    if settings["format"] == "parquet" and pq is None:
+        print("⚠️  pyarrow is not installed, falling back to CSV storage.")
+        settings["format"] = "csv"
+    return settings
+
+
+def dataset_path(processed_dir: Path, name: str, config: Optional[dict] = None) -> Path:
+    """Return the primary on-disk location of a processed dataset."""
+    suffix = ".parquet" if storage_settings(config)["format"] == "parquet" else ".csv"
+    return processed_dir / f"{name}{suffix}"
+
+
+def _locate(path: Path) -> Path:
+    """Return ``path`` or, when missing, its Parquet/CSV sibling."""
+    if path.exists():
+        return path
+    for suffix in (".parquet", ".csv"):
+        candidate = path.with_suffix(suffix)
+        if candidate.exists() and (suffix == ".csv" or pq is not None):
+            return candidate
+    raise FileNotFoundError(f"Missing processed dataset at {path}.")
+
+
+def coerce_schema(df: pd.DataFrame, name: str) -> pd.DataFrame:
+    """Cast the columns of ``df`` to the declared schema of ``name``."""
+    schema = PROCESSED_SCHEMAS.get(name, {})
+    df = df.copy()
+    for column, logical_type in schema.items():
+        if column not in df.columns:
+            continue
+        if logical_type == "string":
+            df[column] = df[column].astype("string")
+        elif logical_type == "float64":
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+        elif logical_type == "int64":
+            df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype("int64")
+        elif logical_type == "bool":
+            df[column] = df[column].astype("boolean")
+    return df
+
+
+def _arrow_schema(df: pd.DataFrame, name: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    declared = PROCESSED_SCHEMAS.get(name, {})
+    fields = []
+    for field in table.schema:
+        logical_type = declared.get(field.name)
+        if logical_type is None:
+            fields.append(field)
+        else:
+            fields.append(pa.field(field.name, getattr(pa, _ARROW_TYPES[logical_type])()))
+    return table, pa.schema(fields)
+
+
+def write_dataset(
+    df: pd.DataFrame,
+    processed_dir: Path,
+    name: str,
+    config: Optional[dict] = None,
+) -> Path:
+    """Persist a processed dataset using the configured storage format."""
+    settings = storage_settings(config)
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    path = dataset_path(processed_dir, name, config)
+
+    with instrument(f"storage.write.{name}", rows_in=len(df), format=settings["format"]):
+        if settings["format"] == "parquet":
+            table, schema = _arrow_schema(coerce_schema(df, name), name)
+            temp_path = path.with_suffix(".parquet.tmp")
+            pq.write_table(table.cast(schema), temp_path, compression=settings["compression"])
+            temp_path.replace(path)
+            if settings["export_csv"]:
+                df.to_csv(path.with_suffix(".csv"), index=False)
+        else:
+            df.to_csv(path, index=False)
+    return path
+
+
+class DatasetWriter:
+    """Append chunks of a processed dataset, publishing the files on close.
+
+    Every chunk is cast to the declared schema of ``name``; with Parquet
+    storage the Arrow schema of the first chunk is kept for the following
+    ones and each chunk becomes a row group. Files are written next to their
+    final location and only replace it once every chunk has been written.
+    """
+
+    def __init__(self, processed_dir: Path, name: str, config: Optional[dict] = None):
+        self.name = name
+        self.settings = storage_settings(config)
+        processed_dir.mkdir(parents=True, exist_ok=True)
+        self.path = dataset_path(processed_dir, name, config)
+        self._parquet_writer = None
+        self._schema = None
+        self._targets: Dict[Path, Path] = {}
+        self.rows = 0
+
+    def _temp(self, path: Path) -> Path:
+        if path not in self._targets:
+            self._targets[path] = path.with_suffix(path.suffix + ".tmp")
+        return self._targets[path]
+
+    def _append_csv(self, df: pd.DataFrame, path: Path) -> None:
+        first = path not in self._targets
+        df.to_csv(self._temp(path), mode="w" if first else "a", header=first, index=False)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df = coerce_schema(df, self.name)
+        if self.settings["format"] == "parquet":
+            if self._parquet_writer is None:
+                table, self._schema = _arrow_schema(df, self.name)
+                self._parquet_writer = pq.ParquetWriter(
+                    self._temp(self.path), self._schema, compression=self.settings["compression"]
+                )
+            else:
+                table = pa.Table.from_pandas(df[self._schema.names], preserve_index=False)
+            self._parquet_writer.write_table(table.cast(self._schema))
+            if self.settings["export_csv"]:
+                self._append_csv(df, self.path.with_suffix(".csv"))
+        else:
+            self._append_csv(df, self.path)
+        self.rows += len(df)
+
+    def close(self) -> Path:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        for path, temp_path in self._targets.items():
+            temp_path.replace(path)
+        self._targets.clear()
+        return self.path
+
+    def abort(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        for temp_path in self._targets.values():
+            temp_path.unlink(missing_ok=True)
+        self._targets.clear()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def read_table(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a processed table from Parquet or CSV, projecting ``columns``."""
+    resolved = _locate(path)
+    if resolved.suffix == ".parquet":
+        return pq.read_table(resolved, columns=list(columns) if columns else None).to_pandas()
+    return pd.read_csv(resolved, usecols=list(columns) if columns else None)
+
+
+def dataset_columns(processed_dir: Path, name: str, config: Optional[dict] = None) -> List[str]:
+    """Return the column names of a processed dataset without loading its rows."""
+    resolved = _locate(dataset_path(processed_dir, name, config))
+    if resolved.suffix == ".parquet":
+        return list(pq.read_schema(resolved).names)
+    return pd.read_csv(resolved, nrows=0).columns.tolist()
+
+
+def read_dataset(
+    processed_dir: Path,
+    name: str,
+    columns: Optional[Iterable[str]] = None,
+    config: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Load a processed dataset by name, projecting ``columns`` when given."""
+    with instrument(f"storage.read.{name}") as step:
+        df = read_table(dataset_path(processed_dir, name, config), columns=list(columns) if columns else None)
+        step.rows_out = len(df)
+    return df
+
+
+def export_csv(processed_dir: Path, name: str, output_path: Optional[Path] = None) -> Path:
+    """Write a CSV copy of a processed dataset for legacy consumers."""
+    df = read_table(processed_dir / f"{name}.parquet")
+    target = output_path or processed_dir / f"{name}.csv"
+    df.to_csv(target, index=False)
+    return target
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .load_data import read_config
+
+    parser = argparse.ArgumentParser(description="Export processed Parquet datasets to CSV")
+    parser.add_argument("names", nargs="*", default=list(PROCESSED_SCHEMAS), help="Datasets to export")
+    arguments = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parents[2]
+    processed_dir = project_root / read_config().get("processed_dir", "data/processed")
+    for dataset_name in arguments.names:
+        print(f"Exported {dataset_name} to {export_csv(processed_dir, dataset_name)}")
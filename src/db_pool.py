@@ -0,0 +1,129 @@
+"""Pooled DB-API connections and phased parallel loading for the MySQL loaders.
+
+Both ``load_data_to_mysql.py`` and ``models/save_predictions_to_db.py`` go
+through :class:`ConnectionPool`. Connections are opened lazily with
+autocommit disabled, so every write happens inside an explicit transaction.
+The pool only relies on the DB-API methods ``cursor``, ``commit``,
+``rollback`` and ``close``. Any local stand-in connection factory (for
+example a ``sqlite3`` wrapper or a recording fake) can therefore replace
+MySQL.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Mapping, Sequence
+
+DEFAULT_POOL_SIZE = 4
+
+# Tables sharing a phase have no foreign-key dependency on each other.
+DEFAULT_SCHEDULE: List[List[str]] = [["hosts", "athletes"], ["medals", "results"]]
+
+
+def mysql_connection_factory(host: str, user: str, password: str, database: str = "olympics", **options):
+    """Return a callable opening MySQL connections without autocommit."""
+    import mysql.connector
+
+    def connect():
+        return mysql.connector.connect(
+            host=host,
+            user=user,
+            password=password,
+            database=database,
+            autocommit=False,
+            **options,
+        )
+
+    return connect
+
+
+class ConnectionPool:
+    """Fixed-size, thread-safe pool of DB-API connections."""
+
+    def __init__(self, factory: Callable[[], object], size: int = DEFAULT_POOL_SIZE):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._opened: List[object] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._opened) < self.size:
+                connection = self.factory()
+                self._opened.append(connection)
+                return connection
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        """Borrow a connection; it goes back to the pool afterwards."""
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[object]:
+        """Yield a cursor whose statements are committed together, or rolled back."""
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._opened:
+                connection.close()
+            self._opened.clear()
+        self._idle = queue.LifoQueue()
+
+
+def parse_schedule(raw: str) -> List[List[str]]:
+    """Parse ``"hosts,athletes;medals,results"`` into phases of table names."""
+    return [[name.strip() for name in phase.split(",") if name.strip()] for phase in raw.split(";") if phase.strip()]
+
+
+def run_schedule(
+    schedule: Sequence[Sequence[str]],
+    tasks: Mapping[str, Callable[[], object]],
+    max_workers: int = DEFAULT_POOL_SIZE,
+) -> Dict[str, object]:
+    """Run the tasks phase by phase, the tasks of a phase in parallel threads.
+
+    A phase only starts once the previous one completed; the first error of a
+    phase is raised after all its tasks have finished.
+    """
+    unknown = {name for phase in schedule for name in phase} - set(tasks)
+    if unknown:
+        raise ValueError(f"Unknown task(s) in schedule: {', '.join(sorted(unknown))}")
+
+    results: Dict[str, object] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for phase in schedule:
+            futures = {name: executor.submit(tasks[name]) for name in phase}
+            errors = []
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    errors.append(exc)
+            if errors:
+                raise errors[0]
+    return results
@@ -3,16 +3,19 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
 
 import pandas as pd
 
+from ..data_prep.storage import read_table
+from .feature_store import edition_calendar, feature_settings, history_features, load_features
+
 
 def load_country_summary(path: Path) -> pd.DataFrame:
-    """Load the aggregated country summary file."""
-    if not path.exists():
-        raise FileNotFoundError(f"Missing summary file at {path}. Run preprocessing first.")
-    return pd.read_csv(path)
+    """Load the aggregated country summary file (Parquet or CSV)."""
+    try:
+        return read_table(path)
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(f"Missing summary file at {path}. Run preprocessing first.") from exc
 
 
 def add_medal_shares(summary_df: pd.DataFrame) -> pd.DataFrame:
@@ -24,22 +27,32 @@ def add_medal_shares(summary_df: pd.DataFrame) -> pd.DataFrame:
 
 
 def add_trend_features(summary_df: pd.DataFrame, lag: int = 1) -> pd.DataFrame:
-    """Create rolling features per country to capture momentum."""
-    df = summary_df.copy()
-    df = df.sort_values(["country_name", "slug_game"])
-    df[f"medals_total_lag_{lag}"] = (
-        df.groupby("country_name")["medals_total"].shift(lag).fillna(0)
-    )
-    df[f"athletes_unique_lag_{lag}"] = (
-        df.groupby("country_name")["athletes_unique"].shift(lag).fillna(0)
-    )
+    """Create lagged features per country to capture momentum.
+
+    Editions are ordered by host year and season (see ``feature_store``), so
+    the previous edition is the chronologically previous one.
+    """
+    settings = feature_settings({"lags": [lag], "by_season": False})
+    df = summary_df
+    if "edition_order" not in df.columns:
+        calendar = edition_calendar(df["slug_game"])
+        df = df.merge(calendar[["slug_game", "edition_order"]], on="slug_game", how="left")
+    df = df.sort_values(["country_name", "edition_order"], ignore_index=True, kind="stable")
+    for name, values in history_features(df, settings).items():
+        df[name] = values
     return df
 
 
-def build_model_features(summary_path: Path, add_trends: bool = True) -> pd.DataFrame:
-    """Load, enrich, and return the feature table ready for modeling."""
-    summary_df = load_country_summary(summary_path)
-    enriched = add_medal_shares(summary_df)
+def build_model_features(summary_path: Path, add_trends: bool = True, refresh: bool = False) -> pd.DataFrame:
+    """Load, enrich, and return the feature table ready for modeling.
+
+    With ``add_trends`` the table comes from the feature store, rebuilt only
+    when the summary (or the ``features`` settings) changed; ``refresh``
+    forces the rebuild.
+    """
     if add_trends:
-        enriched = add_trend_features(enriched)
-    return enriched
+        try:
+            return load_features(summary_path, refresh=refresh)
+        except FileNotFoundError as exc:
+            raise FileNotFoundError(f"Missing summary file at {summary_path}. Run preprocessing first.") from exc
+    return add_medal_shares(load_country_summary(summary_path))
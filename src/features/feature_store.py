@@ -0,0 +1,280 @@
+"""Materialized country/edition feature table.
+
+Editions are ordered chronologically from ``olympic_hosts.csv`` (host year,
+then Winter before Summer), not by their slug, and each country's history is
+read within a season by default: the "previous edition" of a Summer Games is
+the previous Summer Games.
+
+For every column of ``features.columns`` the table holds:
+
+- ``<col>_lag_<n>``: value ``n`` editions earlier;
+- ``<col>_roll<w>_mean`` / ``<col>_roll<w>_sum``: over the ``w`` previous
+  editions (the current one excluded);
+- ``<col>_growth``: relative change since the previous edition.
+
+It also holds ``medal_share``, ``game_year``, ``game_season``,
+``edition_order`` and the host flags ``is_host`` / ``is_next_host``. All
+history features are computed for every country at once from one sorted
+array, without a ``groupby`` per column and lag.
+
+The table is written next to the summary as ``country_year_features`` with a
+JSON sidecar holding the fingerprint of its inputs (summary rows, host
+calendar, settings); ``load_features`` rebuilds it only when that changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from ..data_prep.incremental import frame_fingerprint
+from ..data_prep.load_data import read_config
+from ..data_prep.storage import dataset_path, read_dataset, read_table, write_dataset
+from ..instrumentation import instrument
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CONFIG_MODEL = PROJECT_ROOT / "config" / "model_params.yaml"
+HOSTS_PATH = PROJECT_ROOT / "data" / "olympic_hosts.csv"
+
+FEATURES_NAME = "country_year_features"
+METADATA_SUFFIX = ".meta.json"
+FEATURE_STORE_VERSION = 1
+
+DEFAULT_SETTINGS = {
+    "columns": ["medals_total", "athletes_unique"],
+    "lags": [1],
+    "rolling_windows": [],
+    "rolling_stats": ["mean", "sum"],
+    "growth": False,
+    "by_season": True,
+    "fill_value": 0,
+}
+ROLLING_STATS = ("mean", "sum")
+SEASON_RANK = {"Winter": 0, "Summer": 1}
+DEFAULT_SEASON = "Summer"
+
+# ``game_location`` spellings that differ from ``country_name`` in the results.
+HOST_COUNTRY_ALIASES = {
+    "United States": "United States of America",
+    "China": "People's Republic of China",
+    "USSR": "Soviet Union",
+}
+
+
+def feature_settings(params: Optional[Dict] = None) -> Dict:
+    """Return the ``features`` section of the model config merged with defaults."""
+    if params is None:
+        with CONFIG_MODEL.open("r", encoding="utf-8") as stream:
+            params = (yaml.safe_load(stream) or {}).get("features") or {}
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(params or {})
+    unknown = set(settings["rolling_stats"]) - set(ROLLING_STATS)
+    if unknown:
+        raise ValueError(f"Unknown rolling statistic(s): {sorted(unknown)}")
+    if any(int(lag) < 1 for lag in settings["lags"]) or any(int(w) < 1 for w in settings["rolling_windows"]):
+        raise ValueError("Lags and rolling windows must be positive.")
+    return settings
+
+
+def _host_countries(location: object) -> List[str]:
+    if not isinstance(location, str) or not location:
+        return []
+    # "Australia, Sweden": Melbourne 1956 held its equestrian events in Stockholm.
+    return [HOST_COUNTRY_ALIASES.get(part.strip(), part.strip()) for part in location.split(",")]
+
+
+def edition_calendar(slugs: Optional[pd.Series] = None, hosts_path: Path = HOSTS_PATH) -> pd.DataFrame:
+    """One row per edition with its year, season, chronological rank and host countries.
+
+    Editions of ``slugs`` missing from the host file get the year in their
+    slug and the Summer season.
+    """
+    hosts = pd.read_csv(hosts_path, usecols=["game_slug", "game_year", "game_season", "game_location"])
+    calendar = pd.DataFrame({
+        "slug_game": hosts["game_slug"].astype(str),
+        "game_year": hosts["game_year"].astype("int64"),
+        "game_season": hosts["game_season"].fillna(DEFAULT_SEASON).astype(str),
+        "host_countries": hosts["game_location"].map(_host_countries),
+    })
+    if slugs is not None:
+        missing = pd.Index(pd.Series(slugs).dropna().astype(str).unique()).difference(calendar["slug_game"])
+        if len(missing):
+            years = pd.to_numeric(missing.str.rsplit("-", n=1).str[-1], errors="coerce")
+            extra = pd.DataFrame({
+                "slug_game": missing,
+                "game_year": np.nan_to_num(years.to_numpy(dtype=float), nan=0).astype("int64"),
+                "game_season": DEFAULT_SEASON,
+                "host_countries": [[] for _ in range(len(missing))],
+            })
+            calendar = pd.concat([calendar, extra], ignore_index=True)
+
+    calendar["season_rank"] = calendar["game_season"].map(SEASON_RANK).fillna(len(SEASON_RANK)).astype("int64")
+    calendar = calendar.sort_values(["game_year", "season_rank", "slug_game"], ignore_index=True)
+    calendar["edition_order"] = np.arange(len(calendar), dtype=np.int64)
+    # Hosts of the next edition of the same season (the host-effect build-up).
+    calendar["next_host_countries"] = (
+        calendar.groupby("game_season", sort=False)["host_countries"].shift(-1).map(
+            lambda value: value if isinstance(value, list) else []
+        )
+    )
+    return calendar.drop(columns="season_rank")
+
+
+def _country_flags(df: pd.DataFrame, calendar: pd.DataFrame, column: str) -> np.ndarray:
+    pairs = calendar[["slug_game", column]].explode(column).dropna()
+    known = pd.MultiIndex.from_arrays([pairs["slug_game"].astype(str), pairs[column].astype(str)])
+    rows = pd.MultiIndex.from_arrays([df["slug_game"].astype(str), df["country_name"].astype(str)])
+    return rows.isin(known)
+
+
+def history_features(df: pd.DataFrame, settings: Dict) -> Dict[str, np.ndarray]:
+    """Lags, rolling statistics and growth of ``df`` (sorted by group then edition).
+
+    ``df`` must be ordered by country (and season), then ``edition_order``;
+    every statistic is computed for all groups and columns in one pass over
+    a 2-D array, using cumulative sums for the rolling windows.
+    """
+    columns = [column for column in settings["columns"] if column in df.columns]
+    n = len(df)
+    keys = ["country_name"] + (["game_season"] if settings["by_season"] else [])
+    group = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    row = np.arange(n)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if n else np.array([], dtype=np.int64)
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    position = row - group_start
+
+    values = df[columns].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, len(columns))), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, len(columns))), np.cumsum(valid, axis=0)])
+
+    output: Dict[str, np.ndarray] = {}
+    lags = sorted({int(lag) for lag in settings["lags"]} | ({1} if settings["growth"] else set()))
+    shifted: Dict[int, np.ndarray] = {}
+    for lag in lags:
+        lagged = np.full_like(values, np.nan)
+        if lag < n:
+            lagged[lag:] = values[:-lag]
+        lagged[position < lag] = np.nan
+        shifted[lag] = lagged
+    for lag in sorted(int(lag) for lag in settings["lags"]):
+        for index, column in enumerate(columns):
+            output[f"{column}_lag_{lag}"] = shifted[lag][:, index]
+
+    for window in sorted(int(window) for window in settings["rolling_windows"]):
+        low = np.maximum(group_start, row - window)
+        window_sum = sums[row] - sums[low]
+        window_count = counts[row] - counts[low]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            window_mean = window_sum / window_count
+        window_sum[window_count == 0] = np.nan
+        for index, column in enumerate(columns):
+            if "mean" in settings["rolling_stats"]:
+                output[f"{column}_roll{window}_mean"] = window_mean[:, index]
+            if "sum" in settings["rolling_stats"]:
+                output[f"{column}_roll{window}_sum"] = window_sum[:, index]
+
+    if settings["growth"]:
+        previous = shifted[1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            growth = np.where(previous > 0, values / previous - 1.0, np.nan)
+        for index, column in enumerate(columns):
+            output[f"{column}_growth"] = growth[:, index]
+
+    fill_value = settings["fill_value"]
+    if fill_value is not None:
+        output = {name: np.where(np.isnan(array), fill_value, array) for name, array in output.items()}
+    return output
+
+
+def build_feature_table(
+    summary_df: pd.DataFrame,
+    settings: Optional[Dict] = None,
+    hosts_path: Path = HOSTS_PATH,
+) -> pd.DataFrame:
+    """Enrich the country summary with shares, calendar, history and host features."""
+    settings = settings or feature_settings()
+    calendar = edition_calendar(summary_df["slug_game"], hosts_path)
+
+    df = summary_df.copy()
+    df["slug_game"] = df["slug_game"].astype(str)
+    totals = df.groupby("slug_game")["medals_total"].transform("sum")
+    df["medal_share"] = df["medals_total"] / totals.replace(0, 1)
+    df = df.merge(calendar[["slug_game", "game_year", "game_season", "edition_order"]], on="slug_game", how="left")
+
+    keys = ["country_name"] + (["game_season"] if settings["by_season"] else [])
+    df = df.sort_values(keys + ["edition_order"], ignore_index=True, kind="stable")
+    for name, array in history_features(df, settings).items():
+        df[name] = array
+    df["is_host"] = _country_flags(df, calendar, "host_countries")
+    df["is_next_host"] = _country_flags(df, calendar, "next_host_countries")
+    return df
+
+
+def _fingerprint(summary_df: pd.DataFrame, settings: Dict, hosts_path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(frame_fingerprint(summary_df).encode("utf-8"))
+    digest.update(frame_fingerprint(pd.read_csv(hosts_path)).encode("utf-8"))
+    digest.update(json.dumps({"version": FEATURE_STORE_VERSION, "settings": settings}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _metadata_path(processed_dir: Path) -> Path:
+    return processed_dir / f"{FEATURES_NAME}{METADATA_SUFFIX}"
+
+
+def load_features(
+    summary_path: Path,
+    settings: Optional[Dict] = None,
+    config: Optional[dict] = None,
+    refresh: bool = False,
+    hosts_path: Path = HOSTS_PATH,
+) -> pd.DataFrame:
+    """Return the feature table of ``summary_path``, rebuilding it only when its inputs changed."""
+    settings = settings or feature_settings()
+    config = config if config is not None else read_config()
+    processed_dir = Path(summary_path).parent
+    summary_df = read_table(summary_path)
+    fingerprint = _fingerprint(summary_df, settings, hosts_path)
+
+    metadata_path = _metadata_path(processed_dir)
+    with instrument("features.load", rows_in=len(summary_df)) as step:
+        if not refresh and metadata_path.exists() and dataset_path(processed_dir, FEATURES_NAME, config).exists():
+            with metadata_path.open("r", encoding="utf-8") as stream:
+                metadata = json.load(stream)
+            if metadata.get("fingerprint") == fingerprint:
+                features = read_dataset(processed_dir, FEATURES_NAME, config=config)
+                step.rows_out, step.extra["cache"] = len(features), "hit"
+                return features
+
+        features = build_feature_table(summary_df, settings, hosts_path)
+        write_dataset(features, processed_dir, FEATURES_NAME, config)
+        temp_path = metadata_path.with_suffix(".tmp")
+        with temp_path.open("w", encoding="utf-8") as stream:
+            json.dump(
+                {"fingerprint": fingerprint, "rows": len(features), "columns": list(features.columns), "settings": settings},
+                stream,
+                indent=2,
+            )
+        temp_path.replace(metadata_path)
+        step.rows_out, step.extra["cache"] = len(features), "miss"
+    return features
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Materialize the country/edition feature table")
+    parser.add_argument("--refresh", action="store_true", help="Rebuild even when the summary is unchanged")
+    arguments = parser.parse_args()
+
+    data_cfg = read_config()
+    summary = dataset_path(PROJECT_ROOT / data_cfg.get("processed_dir", "data/processed"), "country_year_summary", data_cfg)
+    table = load_features(summary, config=data_cfg, refresh=arguments.refresh)
+    print(f"{FEATURES_NAME}: {len(table)} rows x {table.shape[1]} columns")
@@ -0,0 +1,353 @@
+"""Stage-level instrumentation of the pipeline.
+
+``instrument`` (a context manager) and ``instrumented`` (a decorator) wrap a
+stage or sub-step and record, as one JSON line per step:
+
+- wall time and CPU time of the process;
+- resident memory at start and end, and the peak of the process tree
+  (worker processes included), sampled from ``/proc`` while the step runs;
+- rows in and out, set on the yielded ``Step`` or inferred by the decorator;
+- the enclosing step (``parent``), the process id and a run identifier.
+
+Nothing is recorded unless a sink is configured. Settings are read from the
+environment so that the worker processes of ``run_all`` inherit them:
+
+``OLYMPIC_METRICS``
+    JSON-lines file the records are appended to.
+``OLYMPIC_RUN_ID``
+    identifier stored in every record (default: set once per process).
+``OLYMPIC_PROFILE`` / ``OLYMPIC_TRACEMALLOC``
+    comma-separated step names (``name*`` matches a prefix) to run under
+    ``cProfile`` or ``tracemalloc``; the results are written to
+    ``OLYMPIC_PROFILE_DIR`` (default ``reports/profiles/``).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import resource
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PROFILE_DIR = PROJECT_ROOT / "reports" / "profiles"
+
+METRICS_ENV = "OLYMPIC_METRICS"
+RUN_ID_ENV = "OLYMPIC_RUN_ID"
+PROFILE_ENV = "OLYMPIC_PROFILE"
+TRACEMALLOC_ENV = "OLYMPIC_TRACEMALLOC"
+PROFILE_DIR_ENV = "OLYMPIC_PROFILE_DIR"
+
+SAMPLE_INTERVAL = 0.05
+PROFILE_TOP = 40
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 0.0
+_current_step: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_step", default=None)
+_process_run_id = uuid.uuid4().hex[:12]
+
+
+# ----------------------------------------------------------------------
+# Memory
+# ----------------------------------------------------------------------
+
+def _children(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r", encoding="ascii") as stream:
+                children.extend(int(child) for child in stream.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """Resident memory of one process (0 when ``/proc`` is unavailable)."""
+    try:
+        with open(f"/proc/{pid or os.getpid()}/statm", "r", encoding="ascii") as stream:
+            return int(stream.read().split()[1]) * _PAGE_MB
+    except OSError:
+        return 0.0
+
+
+def tree_rss_mb(pid: Optional[int] = None) -> float:
+    """Resident memory of a process and all its descendants."""
+    pending = [pid or os.getpid()]
+    total = 0.0
+    while pending:
+        current = pending.pop()
+        total += rss_mb(current)
+        pending.extend(_children(current))
+    return total
+
+
+def max_rss_mb() -> float:
+    """Peak RSS of this process since it started."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakSampler(threading.Thread):
+    """Poll ``tree_rss_mb`` in the background and keep the maximum."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = tree_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, tree_rss_mb())
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, tree_rss_mb())
+        return self.peak
+
+
+# ----------------------------------------------------------------------
+# Configuration
+# ----------------------------------------------------------------------
+
+def metrics_path() -> Optional[Path]:
+    value = os.environ.get(METRICS_ENV)
+    return Path(value) if value else None
+
+
+def run_id() -> str:
+    return os.environ.get(RUN_ID_ENV) or _process_run_id
+
+
+def _matches(name: str, variable: str) -> bool:
+    value = os.environ.get(variable)
+    if not value:
+        return False
+    for pattern in filter(None, (item.strip() for item in value.split(","))):
+        if pattern == name or (pattern.endswith("*") and name.startswith(pattern[:-1])):
+            return True
+    return False
+
+
+def configure(
+    metrics: Optional[Path] = None,
+    profile: Optional[List[str]] = None,
+    tracemalloc_steps: Optional[List[str]] = None,
+    profile_dir: Optional[Path] = None,
+    run: Optional[str] = None,
+) -> str:
+    """Set the instrumentation environment of this process and of its future children."""
+    if metrics is not None:
+        os.environ[METRICS_ENV] = str(metrics)
+    if profile:
+        os.environ[PROFILE_ENV] = ",".join(profile)
+    if tracemalloc_steps:
+        os.environ[TRACEMALLOC_ENV] = ",".join(tracemalloc_steps)
+    if profile_dir is not None:
+        os.environ[PROFILE_DIR_ENV] = str(profile_dir)
+    os.environ[RUN_ID_ENV] = run or os.environ.get(RUN_ID_ENV) or _process_run_id
+    return os.environ[RUN_ID_ENV]
+
+
+# ----------------------------------------------------------------------
+# Steps
+# ----------------------------------------------------------------------
+
+@dataclass
+class Step:
+    """Mutable view of the running step: set ``rows_in``/``rows_out`` or add ``extra`` fields."""
+
+    name: str
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def _profile_path(name: str, suffix: str) -> Path:
+    directory = Path(os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    return directory / f"{name}-{stamp}-{os.getpid()}{suffix}"
+
+
+def _dump_cprofile(profiler: cProfile.Profile, name: str) -> str:
+    path = _profile_path(name, ".prof")
+    profiler.dump_stats(path)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    path.with_suffix(".txt").write_text(text.getvalue(), encoding="utf-8")
+    return str(path)
+
+
+def _dump_tracemalloc(snapshot: tracemalloc.Snapshot, name: str, peak_mb: float) -> str:
+    path = _profile_path(name, ".tracemalloc.txt")
+    lines = [f"peak traced memory: {peak_mb:.1f} MB", ""]
+    for statistic in snapshot.statistics("lineno")[:PROFILE_TOP]:
+        lines.append(str(statistic))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def emit(record: Dict[str, Any]) -> None:
+    """Append one record to the metrics file."""
+    path = metrics_path()
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record, default=str) + "\n"
+    with path.open("a", encoding="utf-8") as stream:
+        stream.write(line)
+
+
+@contextmanager
+def instrument(name: str, rows_in: Optional[int] = None, **extra: Any) -> Iterator[Step]:
+    """Measure the enclosed block as step ``name``; no-op when nothing is configured."""
+    step = Step(name, rows_in, extra=dict(extra))
+    profile = _matches(name, PROFILE_ENV)
+    trace = _matches(name, TRACEMALLOC_ENV)
+    if metrics_path() is None and not profile and not trace:
+        yield step
+        return
+
+    parent = _current_step.get()
+    token = _current_step.set(name)
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (an enclosing step) is already active.
+            profiler = None
+    started_tracing = False
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            started_tracing = True
+        tracemalloc.reset_peak()
+
+    sampler = PeakSampler()
+    sampler.start()
+    rss_start = rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    status, error = "ok", None
+    try:
+        yield step
+    except BaseException as exc:
+        status, error = "error", repr(exc)
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = sampler.stop()
+        _current_step.reset(token)
+        record: Dict[str, Any] = {
+            "run_id": run_id(),
+            "stage": name,
+            "parent": parent,
+            "pid": os.getpid(),
+            "started": datetime.fromtimestamp(time.time() - wall).isoformat(timespec="milliseconds"),
+            "status": status,
+            "wall_seconds": round(wall, 6),
+            "cpu_seconds": round(cpu, 6),
+            "rss_start_mb": round(rss_start, 1),
+            "rss_end_mb": round(rss_mb(), 1),
+            "peak_rss_mb": round(peak, 1),
+            "max_rss_mb": round(max_rss_mb(), 1),
+            "rows_in": step.rows_in,
+            "rows_out": step.rows_out,
+        }
+        if error:
+            record["error"] = error
+        if profiler is not None:
+            profiler.disable()
+            record["cprofile"] = _dump_cprofile(profiler, name)
+        if trace:
+            peak_traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            record["tracemalloc_peak_mb"] = round(peak_traced, 1)
+            record["tracemalloc"] = _dump_tracemalloc(tracemalloc.take_snapshot(), name, peak_traced)
+            if started_tracing:
+                tracemalloc.stop()
+        record.update(step.extra)
+        emit(record)
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """Rows of a frame, array or sized value; first countable item of a tuple."""
+    if isinstance(value, tuple):
+        for item in value:
+            rows = count_rows(item)
+            if rows is not None:
+                return rows
+        return None
+    if hasattr(value, "shape") and getattr(value, "shape", None):
+        return int(value.shape[0])
+    return None
+
+
+def instrumented(name: str) -> Callable[[Callable], Callable]:
+    """Decorator form of ``instrument``; rows come from the first argument and the result."""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with instrument(name, rows_in=count_rows(args[0]) if args else None) as step:
+                result = func(*args, **kwargs)
+                step.rows_out = count_rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def read_metrics(path: Path, run: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Records of ``path``, restricted to one run when ``run`` is given."""
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as stream:
+        records = [json.loads(line) for line in stream if line.strip()]
+    return [record for record in records if run is None or record.get("run_id") == run]
+
+
+def format_summary(records: List[Dict[str, Any]], top: int = 15) -> str:
+    """The slowest steps of a run, one line each."""
+    lines = [f"{'step':<36} {'wall':>9} {'cpu':>9} {'peak RSS':>10} {'rows in':>10} {'rows out':>10}"]
+    for record in sorted(records, key=lambda item: item["wall_seconds"], reverse=True)[:top]:
+        rows_in = "" if record.get("rows_in") is None else record["rows_in"]
+        rows_out = "" if record.get("rows_out") is None else record["rows_out"]
+        lines.append(
+            f"{record['stage']:<36} {record['wall_seconds']:>8.2f}s {record['cpu_seconds']:>8.2f}s"
+            f" {record['peak_rss_mb']:>7.1f} MB {rows_in:>10} {rows_out:>10}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarise pipeline metrics (JSON lines)")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--run", default=None, help="run id (default: the last run in the file)")
+    parser.add_argument("--top", type=int, default=15)
+    arguments = parser.parse_args()
+
+    all_records = read_metrics(arguments.path)
+    selected_run = arguments.run or (all_records[-1]["run_id"] if all_records else None)
+    print(f"Run {selected_run}")
+    print(format_summary([record for record in all_records if record.get("run_id") == selected_run], arguments.top))
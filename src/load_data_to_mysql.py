@@ -3,24 +3,90 @@ Script Python pour insérer les données CSV dans la base MySQL olympique
 Utilise les procédures stockées créées dans insert_data_python.sql
 """
 
+import csv
+import os
+import tempfile
+import time
+
 import pandas as pd
-import mysql.connector
 import sys
 import re
 from datetime import datetime
 from pathlib import Path
 
+try:
+    from .db_pool import (DEFAULT_POOL_SIZE, DEFAULT_SCHEDULE, ConnectionPool,
+                          mysql_connection_factory, parse_schedule, run_schedule)
+except ImportError:  # exécuté directement comme script
+    from db_pool import (DEFAULT_POOL_SIZE, DEFAULT_SCHEDULE, ConnectionPool,
+                         mysql_connection_factory, parse_schedule, run_schedule)
+
+YEAR_PATTERN = r'(\d{4})'
+
+# Tables summary_* lues par /api/stats, /api/medals et /api/sports/top (sql/init_db.sql).
+# Elles agrègent les mêmes tables, avec les mêmes requêtes, que les routes qu'elles
+# remplacent (app.js, database.js::getStats) : les réponses MySQL ne changent pas.
+# `position` fige l'ordre de tri (ROW_NUMBER, MySQL 8+).
+SUMMARY_QUERIES = {
+    'summary_medals_year_city': """
+        INSERT INTO summary_medals_year_city (position, year, city, medal, count)
+        SELECT ROW_NUMBER() OVER (ORDER BY year DESC, medal, city) - 1, year, city, medal, COUNT(*)
+        FROM medals
+        WHERE medal IS NOT NULL
+        GROUP BY year, city, medal
+    """,
+    'summary_sport_totals': """
+        INSERT INTO summary_sport_totals (position, sport, participants, medals)
+        SELECT ROW_NUMBER() OVER (ORDER BY COUNT(*) DESC, sport) - 1, sport, COUNT(*), COUNT(medal)
+        FROM medals
+        WHERE sport IS NOT NULL
+        GROUP BY sport
+    """,
+    'summary_country_totals': """
+        INSERT INTO summary_country_totals (position, country, participants, medals, gold, silver, bronze)
+        SELECT ROW_NUMBER() OVER (ORDER BY COUNT(m.medal) DESC, a.nationality) - 1, a.nationality,
+               COUNT(*), COUNT(m.medal),
+               SUM(m.medal = 'GOLD'), SUM(m.medal = 'SILVER'), SUM(m.medal = 'BRONZE')
+        FROM medals m
+        JOIN athletes a ON a.id = m.athlete_id
+        WHERE a.nationality IS NOT NULL
+        GROUP BY a.nationality
+    """,
+    'summary_stats': """
+        INSERT INTO summary_stats (name, value)
+        SELECT 'total_athletes', COUNT(*) FROM athletes
+        UNION ALL SELECT 'total_results', COUNT(*) FROM results
+        UNION ALL SELECT 'total_medals', COUNT(*) FROM medals
+        UNION ALL SELECT 'total_sports', COUNT(DISTINCT sport) FROM medals
+    """,
+}
+
 class OlympicDBLoader:
-    def __init__(self, host, user, password, database='olympics'):
-        """Initialise la connexion à la base de données"""
+    def __init__(self, host, user, password, database='olympics',
+                 batch_size=5000, commit_every=10, bulk_method='insert',
+                 pool_size=DEFAULT_POOL_SIZE, connection_factory=None):
+        """Initialise la connexion à la base de données
+
+        ``batch_size`` (lignes par INSERT multi-lignes ou par fichier
+        ``LOAD DATA``), ``commit_every`` (nombre de lots par transaction) et
+        ``bulk_method`` (``insert`` ou ``infile``) ne concernent que le mode
+        bulk (méthodes ``bulk_load_*``), qui écrit via un pool de
+        ``pool_size`` connexions. ``connection_factory`` permet de remplacer
+        MySQL par une connexion DB-API locale (tests).
+        """
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.bulk_method = bulk_method
+        self.throughput = {}
         try:
-            self.conn = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database,
-                autocommit=True
+            factory = connection_factory or mysql_connection_factory(
+                host, user, password, database,
+                allow_local_infile=(bulk_method == 'infile')
             )
+            self.pool = ConnectionPool(factory, size=pool_size)
+            # Connexion dédiée aux procédures stockées (mode historique)
+            self.conn = factory()
+            self.conn.autocommit = True
             self.cursor = self.conn.cursor()
             self.initialize_schema()
             print(f"✅ Connexion réussie à la base {database}")
@@ -167,6 +233,196 @@ class OlympicDBLoader:
         except Exception as e:
             print(f"❌ Erreur lors du chargement des résultats: {e}")
     
+    # ------------------------------------------------------------------
+    # Mode bulk : résolution des IDs en une jointure et écritures par lots
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _records(df, columns):
+        """Convertit les colonnes choisies en tuples, NaN remplacés par None."""
+        subset = df[columns].astype(object)
+        subset = subset.where(subset.notna(), None)
+        return list(subset.itertuples(index=False, name=None))
+
+    def _insert_batch(self, cursor, table, columns, rows):
+        placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        sql = (
+            f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES "
+            + ', '.join([placeholders] * len(rows))
+        )
+        cursor.execute(sql, [value for row in rows for value in row])
+
+    def _load_infile_batch(self, cursor, table, columns, rows):
+        """Écrit le lot dans un fichier temporaire puis LOAD DATA LOCAL INFILE."""
+        handle, staged_path = tempfile.mkstemp(suffix='.csv', prefix=f'{table}_')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8', newline='') as stream:
+                writer = csv.writer(stream, lineterminator='\n')
+                for row in rows:
+                    writer.writerow(['\\N' if value is None else value for value in row])
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{Path(staged_path).as_posix()}' IGNORE INTO TABLE {table} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+            )
+        finally:
+            os.remove(staged_path)
+
+    def bulk_write(self, table, columns, rows):
+        """Écrit ``rows`` par lots de ``batch_size``, une transaction tous les ``commit_every`` lots."""
+        write_batch = self._load_infile_batch if self.bulk_method == 'infile' else self._insert_batch
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for batch_number, offset in enumerate(range(0, len(rows), self.batch_size), start=1):
+                    write_batch(cursor, table, columns, rows[offset:offset + self.batch_size])
+                    if batch_number % self.commit_every == 0:
+                        conn.commit()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        elapsed = time.perf_counter() - start
+        rate = len(rows) / elapsed if elapsed > 0 else float('inf')
+        self.throughput[table] = {'rows': len(rows), 'seconds': elapsed, 'rows_per_s': rate}
+        print(f"✅ {len(rows)} lignes insérées dans {table} en {elapsed:.1f}s ({rate:,.0f} lignes/s)")
+        return len(rows)
+
+    def fetch_athlete_ids(self, names):
+        """Résout les IDs de ``names`` côté serveur et renvoie {nom du CSV: id}.
+
+        Les noms distincts sont copiés dans une table temporaire puis joints à
+        ``athletes`` : la comparaison suit la collation de ``athletes.name``
+        (insensible à la casse et aux accents), comme le ``WHERE name = ...``
+        des procédures stockées. Chaque nom du CSV garde sa propre clé, même
+        quand plusieurs graphies désignent le même athlète.
+        """
+        names = list(dict.fromkeys(names))
+        rows = list(enumerate(names))
+        with self.pool.transaction() as cursor:
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS athlete_names")
+            # La colonne name est copiée depuis athletes, collation comprise.
+            cursor.execute(
+                "CREATE TEMPORARY TABLE athlete_names (position INT PRIMARY KEY) "
+                "SELECT name FROM athletes LIMIT 0"
+            )
+            for offset in range(0, len(rows), self.batch_size):
+                self._insert_batch(cursor, 'athlete_names', ['position', 'name'],
+                                   rows[offset:offset + self.batch_size])
+            cursor.execute(
+                "SELECT s.position, MIN(a.id) FROM athlete_names s "
+                "JOIN athletes a ON a.name = s.name GROUP BY s.position"
+            )
+            resolved = {names[position]: athlete_id for position, athlete_id in cursor.fetchall()}
+            cursor.execute("DROP TEMPORARY TABLE athlete_names")
+        return resolved
+
+    @staticmethod
+    def _with_year(df):
+        years = df['slug_game'].astype(str).str.extract(YEAR_PATTERN, expand=False)
+        return df.assign(year=pd.to_numeric(years, errors='coerce'))
+
+    def _with_athlete_ids(self, df, athlete_ids):
+        mapped = df['athlete_full_name'].map(athlete_ids)
+        missing = int(mapped.isna().sum())
+        if missing:
+            print(f"   ⚠️ {missing} lignes ignorées (athlète inconnu)")
+        return df.assign(athlete_id=mapped).dropna(subset=['athlete_id'])
+
+    def bulk_load_hosts(self, csv_path='csv/olympic_hosts.csv'):
+        """Charge les hôtes en mode bulk"""
+        df = pd.read_csv(csv_path)
+        df = df.assign(
+            year=df['game_year'].astype(int),
+            city=df['game_name'].str.split().str[-1],
+        )
+        rows = self._records(df, ['year', 'city', 'game_location', 'game_season'])
+        return self.bulk_write('hosts', ['year', 'city', 'country', 'season'], rows)
+
+    def bulk_load_athletes(self, csv_path='csv/olympic_athletes.csv'):
+        """Charge les athlètes en mode bulk"""
+        df = pd.read_csv(csv_path)
+        birth_year = pd.to_numeric(df['athlete_year_birth'], errors='coerce')
+        df = df.assign(
+            sex=None,
+            age=(2024 - birth_year).astype('Int64'),
+            nationality=None,
+        )
+        rows = self._records(df, ['athlete_full_name', 'sex', 'age', 'nationality'])
+        return self.bulk_write('athletes', ['name', 'sex', 'age', 'nationality'], rows)
+
+    def bulk_load_medals(self, csv_path='csv/olympic_medals.csv', athlete_ids=None):
+        """Charge les médailles en mode bulk (IDs résolus en une jointure)"""
+        df = self._with_year(pd.read_csv(csv_path))
+        df = df[df['year'].notna() & df['athlete_full_name'].notna()]
+        if athlete_ids is None:
+            athlete_ids = self.fetch_athlete_ids(df['athlete_full_name'])
+        df = self._with_athlete_ids(df, athlete_ids)
+        df = df.assign(year=df['year'].astype(int), athlete_id=df['athlete_id'].astype(int))
+        rows = self._records(
+            df, ['athlete_id', 'year', 'participant_title', 'discipline_title', 'event_title', 'medal_type']
+        )
+        return self.bulk_write('medals', ['athlete_id', 'year', 'city', 'sport', 'event', 'medal'], rows)
+
+    def bulk_load_results(self, csv_path='csv/olympic_results.csv', athlete_ids=None):
+        """Charge les résultats en mode bulk (IDs résolus en une jointure)"""
+        df = self._with_year(pd.read_csv(csv_path))
+        df = df.assign(rank=pd.to_numeric(df['rank_position'], errors='coerce'), score=None)
+        df = df[df['year'].notna() & df['athlete_full_name'].notna() & df['rank'].notna()]
+        if athlete_ids is None:
+            athlete_ids = self.fetch_athlete_ids(df['athlete_full_name'])
+        df = self._with_athlete_ids(df, athlete_ids)
+        df = df.assign(
+            year=df['year'].astype(int),
+            athlete_id=df['athlete_id'].astype(int),
+            rank=df['rank'].astype(int),
+        )
+        rows = self._records(df, ['athlete_id', 'year', 'event_title', 'rank', 'score'])
+        return self.bulk_write('results', ['athlete_id', 'year', 'event', 'rank', 'score'], rows)
+
+    def bulk_load_all(self, schedule=None, csv_dir='csv'):
+        """Charge les quatre tables en mode bulk, phase par phase.
+
+        Les tables d'une même phase (par défaut hôtes + athlètes, puis
+        médailles + résultats) sont chargées en parallèle, chacune sur sa
+        propre connexion du pool.
+        """
+        csv_dir = Path(csv_dir)
+        tasks = {
+            'hosts': lambda: self.bulk_load_hosts(csv_dir / 'olympic_hosts.csv'),
+            'athletes': lambda: self.bulk_load_athletes(csv_dir / 'olympic_athletes.csv'),
+            'medals': lambda: self.bulk_load_medals(csv_dir / 'olympic_medals.csv'),
+            'results': lambda: self.bulk_load_results(csv_dir / 'olympic_results.csv'),
+        }
+        return run_schedule(schedule or DEFAULT_SCHEDULE, tasks, max_workers=self.pool.size)
+
+    def load_rollups(self):
+        """Recalcule les tables summary_* depuis les tables chargées (INSERT ... SELECT)
+
+        Chaque table est vidée puis remplie dans une seule transaction : l'API
+        ne lit jamais une table à moitié chargée.
+        """
+        total = 0
+        for table, query in SUMMARY_QUERIES.items():
+            with self.pool.transaction() as cursor:
+                cursor.execute(f"DELETE FROM {table}")
+                cursor.execute(query)
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                rows = cursor.fetchone()[0]
+            print(f"✅ {rows} lignes dans {table}")
+            total += rows
+        return total
+
+    def report_throughput(self):
+        """Affiche le débit mesuré pour chaque table chargée en mode bulk"""
+        for table, stats in self.throughput.items():
+            print(f"   {table:<10} {stats['rows']:>8} lignes  {stats['seconds']:>7.1f}s  "
+                  f"{stats['rows_per_s']:>10,.0f} lignes/s")
+
     def show_stats(self):
         """Affiche les statistiques de la base de données"""
         try:
@@ -197,10 +453,27 @@ class OlympicDBLoader:
         """Ferme la connexion"""
         self.cursor.close()
         self.conn.close()
+        self.pool.close()
         print("🔒 Connexion fermée")
 
 def main():
     """Fonction principale"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Charge les CSV olympiques dans MySQL")
+    parser.add_argument('--bulk', action='store_true', help="INSERT multi-lignes / LOAD DATA au lieu des procédures")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Lignes par lot en mode bulk")
+    parser.add_argument('--commit-every', type=int, default=10, help="Lots entre deux COMMIT en mode bulk")
+    parser.add_argument('--method', choices=['insert', 'infile'], default='insert',
+                        help="INSERT multi-lignes ou LOAD DATA LOCAL INFILE")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE,
+                        help="Connexions du pool (= tables chargées en parallèle)")
+    parser.add_argument('--schedule', type=parse_schedule, default=DEFAULT_SCHEDULE,
+                        help="Phases de chargement, ex. 'hosts,athletes;medals,results'")
+    parser.add_argument('--rollups', action='store_true',
+                        help="Recalcule aussi les tables summary_* depuis les tables chargées")
+    arguments = parser.parse_args()
+
     print("🏆 CHARGEMENT DES DONNÉES OLYMPIQUES")
     print("="*50)
     print(f"📅 Début: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -217,24 +490,40 @@ def main():
     
     try:
         # Initialisation de la connexion
-        loader = OlympicDBLoader(host, user, password)
+        loader = OlympicDBLoader(host, user, password,
+                                 batch_size=arguments.batch_size,
+                                 commit_every=arguments.commit_every,
+                                 bulk_method=arguments.method,
+                                 pool_size=arguments.pool_size)
         
         # Option pour nettoyer avant insertion (décommentez si nécessaire)
         # loader.clean_database()
         
-        # Chargement des données dans l'ordre des dépendances
-        print("\n1. Chargement des hôtes...")
-        loader.load_hosts()
-        
-        print("\n2. Chargement des athlètes...")
-        loader.load_athletes()
-        
-        print("\n3. Chargement des médailles...")
-        loader.load_medals()
-        
-        print("\n4. Chargement des résultats...")
-        loader.load_results()
+        if arguments.bulk:
+            phases = ' puis '.join('+'.join(phase) for phase in arguments.schedule)
+            print(f"\nChargement bulk en parallèle: {phases}")
+            loader.bulk_load_all(arguments.schedule)
+
+            print("\n⏱️  Débit par table:")
+            loader.report_throughput()
+        else:
+            # Chargement des données dans l'ordre des dépendances
+            print("\n1. Chargement des hôtes...")
+            loader.load_hosts()
+            
+            print("\n2. Chargement des athlètes...")
+            loader.load_athletes()
+            
+            print("\n3. Chargement des médailles...")
+            loader.load_medals()
+            
+            print("\n4. Chargement des résultats...")
+            loader.load_results()
         
+        if arguments.rollups:
+            print("\n5. Tables de synthèse de l'API...")
+            loader.load_rollups()
+
         # Affichage des statistiques finales
         loader.show_stats()
         
@@ -248,4 +537,4 @@ def main():
         print(f"❌ Erreur générale: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,366 @@
+"""Array-based export of the RandomForest medal classifier.
+
+``export_forest`` flattens every tree of the fitted pipeline into a few
+contiguous arrays shared by the whole forest:
+
+- ``feature``, ``threshold``, ``missing_left``: the split of each node;
+- ``child``: global index of the left child, the right child being the next
+  node (trees are laid out breadth-first); leaves point to themselves;
+- ``value``: class fractions of each node, as stored by scikit-learn;
+- ``roots``: the first node of each tree.
+
+``CompactForest.predict_proba`` moves every (row, tree) pair down one level
+per iteration with numpy gathers, then adds the leaf values tree by tree in
+the order scikit-learn uses, so the probabilities are bit-identical to
+``RandomForestClassifier.predict_proba``. The object keeps the fitted
+preprocessing step and exposes ``feature_names_in_`` and ``classes_``, so
+``src.models.inference`` serves it like the original pipeline; its arrays are
+plain numpy arrays that ``joblib.load(..., mmap_mode="r")`` maps without
+copying.
+
+``subset`` and ``prune`` return smaller forests (the first trees, or trees cut
+at a depth whose nodes become leaves with their own class fractions, which
+the breadth-first layout makes a prefix of each tree);
+``python -m src.models.compact_forest benchmark`` reports their accuracy and
+latency on the test split.
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+MODELS_DIR = Path(__file__).resolve().parents[2] / "models"
+DEFAULT_MODEL_PATH = MODELS_DIR / "rf_classifier_medal.joblib"
+DEFAULT_COMPACT_PATH = MODELS_DIR / "rf_classifier_medal.compact.joblib"
+
+# Rows scored together; bounds the (rows x trees) node-index matrix.
+ROW_BLOCK = 4096
+
+
+class CompactForest:
+    """Flattened forest plus the preprocessing that feeds it."""
+
+    def __init__(
+        self,
+        preprocess,
+        feature_names_in: Sequence[str],
+        classes: np.ndarray,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        missing_left: np.ndarray,
+        child: np.ndarray,
+        value: np.ndarray,
+    ):
+        self.preprocess = preprocess
+        self.feature_names_in_ = np.asarray(feature_names_in, dtype=object)
+        self.classes_ = np.asarray(classes)
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.child = child
+        self.value = value
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.roots, self.feature, self.threshold, self.missing_left, self.child, self.value)
+        return sum(array.nbytes for array in arrays)
+
+    def _transform(self, X) -> np.ndarray:
+        """Preprocess ``X`` into the float32 matrix the trees were fitted on."""
+        matrix = self.preprocess.transform(X) if self.preprocess is not None else X
+        if sparse.issparse(matrix):
+            matrix = matrix.toarray()
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def apply(self, matrix: np.ndarray) -> np.ndarray:
+        """Global leaf index reached by each row in each tree, shape (rows, trees)."""
+        n_rows, n_features = matrix.shape
+        n_trees = self.n_trees
+        values = matrix.ravel()
+        leaves = np.empty(n_rows * n_trees, dtype=np.int32)
+        position = np.arange(n_rows * n_trees)
+        offset = np.repeat(np.arange(n_rows) * n_features, n_trees)
+        nodes = np.tile(self.roots, n_rows)
+        # Missing values only need special handling if a split sends them left.
+        route_missing = bool(self.missing_left.any())
+        while nodes.size:
+            child = self.child[nodes]
+            done = child == nodes
+            finished = np.count_nonzero(done)
+            # Pairs that reached a leaf stay on it; drop them once they are numerous.
+            if finished == nodes.size or finished * 4 > nodes.size:
+                leaves[position[done]] = nodes[done]
+                pending = ~done
+                nodes, child, position, offset = nodes[pending], child[pending], position[pending], offset[pending]
+                if not nodes.size:
+                    break
+                done = None
+            x = values[offset + self.feature[nodes]]
+            go_right = ~(x <= self.threshold[nodes])
+            if route_missing:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.missing_left[nodes[missing]]
+            if done is not None:
+                go_right &= ~done
+            nodes = child + go_right
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        matrix = self._transform(X)
+        proba = np.zeros((matrix.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, matrix.shape[0], ROW_BLOCK):
+            leaves = self.apply(matrix[start:start + ROW_BLOCK])
+            block = proba[start:start + ROW_BLOCK]
+            # Same accumulation order as RandomForestClassifier.predict_proba.
+            for tree in range(self.n_trees):
+                block += self.value[leaves[:, tree]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _tree_bounds(self) -> np.ndarray:
+        return np.append(self.roots, self.n_nodes)
+
+    def subset(self, n_trees: int) -> "CompactForest":
+        """Forest of the first ``n_trees`` trees (node arrays are sliced, not copied)."""
+        if not 0 < n_trees <= self.n_trees:
+            raise ValueError(f"n_trees must be between 1 and {self.n_trees}")
+        end = int(self._tree_bounds()[n_trees])
+        return CompactForest(
+            self.preprocess, self.feature_names_in_, self.classes_, self.roots[:n_trees],
+            self.feature[:end], self.threshold[:end], self.missing_left[:end], self.child[:end], self.value[:end],
+        )
+
+    def prune(self, max_depth: int) -> "CompactForest":
+        """Cut every tree at ``max_depth``: nodes at that depth become leaves."""
+        depth = np.empty(self.n_nodes, dtype=np.int32)
+        frontier = self.roots
+        level = 0
+        while frontier.size:
+            depth[frontier] = level
+            frontier = frontier[self.child[frontier] != frontier]
+            frontier = np.concatenate([self.child[frontier], self.child[frontier] + 1])
+            level += 1
+        # Breadth-first layout: the kept nodes are a prefix of each tree.
+        keep = np.flatnonzero(depth <= max_depth)
+        bounds = self._tree_bounds()
+        shift = np.repeat(bounds[:-1] - np.searchsorted(keep, bounds[:-1]), np.diff(np.searchsorted(keep, bounds)))
+        node = keep - shift
+        child = np.where(depth[keep] < max_depth, self.child[keep] - shift, node).astype(np.int32)
+        return CompactForest(
+            self.preprocess, self.feature_names_in_, self.classes_, np.searchsorted(keep, self.roots).astype(np.int32),
+            self.feature[keep], self.threshold[keep], self.missing_left[keep], child, self.value[keep],
+        )
+
+
+def _breadth_first(tree) -> np.ndarray:
+    """Node ids of a scikit-learn tree in breadth-first order, children side by side."""
+    order = [np.array([0])]
+    frontier = order[0]
+    while frontier.size:
+        frontier = frontier[tree.children_left[frontier] >= 0]
+        frontier = np.column_stack([tree.children_left[frontier], tree.children_right[frontier]]).ravel()
+        order.append(frontier)
+    return np.concatenate(order)
+
+
+def export_forest(model) -> CompactForest:
+    """Flatten a fitted ``Pipeline([..., ("clf", RandomForestClassifier)])``."""
+    steps = getattr(model, "steps", None)
+    forest = steps[-1][1] if steps else model
+    preprocess = model[:-1] if steps and len(steps) > 1 else None
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be exported.")
+
+    n_classes = len(forest.classes_)
+    roots, features, thresholds, missing, children, values = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        order = _breadth_first(tree)
+        position = np.empty(tree.node_count, dtype=np.int64)
+        position[order] = np.arange(tree.node_count) + offset
+        leaf = tree.children_left[order] < 0
+        roots.append(offset)
+        features.append(np.where(leaf, 0, tree.feature[order]).astype(np.int32))
+        thresholds.append(tree.threshold[order].astype(np.float64))
+        node_missing = np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool)
+        missing.append(node_missing[order] & ~leaf)
+        # Leaves point to themselves; the right child always follows the left one.
+        children.append(np.where(leaf, position[order], position[np.maximum(tree.children_left[order], 0)]).astype(np.int32))
+        values.append(np.ascontiguousarray(tree.value[order, 0, :n_classes], dtype=np.float64))
+        offset += tree.node_count
+
+    return CompactForest(
+        preprocess,
+        getattr(model, "feature_names_in_", getattr(forest, "feature_names_in_", [])),
+        forest.classes_,
+        np.asarray(roots, dtype=np.int32),
+        np.concatenate(features),
+        np.concatenate(thresholds),
+        np.concatenate(missing),
+        np.concatenate(children),
+        np.concatenate(values),
+    )
+
+
+def export_model(model_path: Path = DEFAULT_MODEL_PATH, output_path: Path = DEFAULT_COMPACT_PATH) -> Path:
+    """Export a saved pipeline; the artifact is written uncompressed so it can be memory-mapped."""
+    compact = export_forest(joblib.load(model_path))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(compact, output_path)
+    return output_path
+
+
+def _measure_load(path: str, mmap_mode: Optional[str]) -> Dict[str, float]:
+    """Run in a fresh process: load time and resident memory added by the artifact."""
+    import sklearn.compose, sklearn.ensemble, sklearn.impute, sklearn.pipeline, sklearn.preprocessing  # noqa: F401
+
+    from .inference import memory_mb
+
+    # Modules are imported first so only the deserialisation is measured.
+    before = memory_mb().get("rss_mb", 0.0)
+    start = time.perf_counter()
+    joblib.load(path, mmap_mode=mmap_mode)
+    seconds = time.perf_counter() - start
+    return {"load_seconds": seconds, "rss_mb": memory_mb().get("rss_mb", 0.0) - before}
+
+
+def measure_load(path: Path, mmap_mode: Optional[str] = None) -> Dict[str, float]:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_measure_load, str(path), mmap_mode).result()
+
+
+def _rows_per_second(predict, X: pd.DataFrame, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+def _row_latency_ms(predict, X: pd.DataFrame, rows: int = 20) -> float:
+    """Median time to score a single row."""
+    timings = []
+    for index in range(min(rows, len(X))):
+        start = time.perf_counter()
+        predict(X.iloc[index:index + 1])
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def benchmark_compact(
+    model,
+    compact: CompactForest,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    tree_counts: Sequence[int] = (),
+    depths: Sequence[Optional[int]] = (None,),
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Accuracy, agreement with the full forest, throughput, latency and size of each variant."""
+    expected = model.predict_proba(X_test)
+    full_prediction = model.classes_[expected.argmax(axis=1)]
+    rows: List[Dict] = [{
+        "variant": "sklearn",
+        "trees": compact.n_trees,
+        "max_depth": None,
+        "accuracy": float(np.mean(full_prediction == np.asarray(y_test))),
+        "agreement": 1.0,
+        "rows_per_second": _rows_per_second(model.predict_proba, X_test, repeats),
+        "row_latency_ms": _row_latency_ms(model.predict_proba, X_test),
+        "nodes": compact.n_nodes,
+        "array_mb": None,
+    }]
+    for n_trees in sorted(set(tree_counts) | {compact.n_trees}, reverse=True):
+        for depth in depths:
+            variant = compact.subset(n_trees)
+            if depth is not None:
+                variant = variant.prune(depth)
+            prediction = variant.predict(X_test)
+            rows.append({
+                "variant": "compact",
+                "trees": n_trees,
+                "max_depth": depth,
+                "accuracy": float(np.mean(prediction == np.asarray(y_test))),
+                "agreement": float(np.mean(prediction == full_prediction)),
+                "rows_per_second": _rows_per_second(variant.predict_proba, X_test, repeats),
+                "row_latency_ms": _row_latency_ms(variant.predict_proba, X_test),
+                "nodes": variant.n_nodes,
+                "array_mb": variant.nbytes / (1024 * 1024),
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..data_prep.load_data import read_config
+    # The package module's definitions, so the artifact pickles ``src.models.compact_forest.CompactForest``.
+    from .compact_forest import benchmark_compact, export_model, measure_load
+    from .train_medal_predictor import load_split, read_params
+
+    parser = argparse.ArgumentParser(description="Export or benchmark the array-based medal classifier")
+    parser.add_argument("command", choices=["export", "benchmark"])
+    parser.add_argument("--model", type=Path, default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--output", type=Path, default=DEFAULT_COMPACT_PATH)
+    parser.add_argument("--trees", type=int, nargs="+", default=[25, 50, 100], help="benchmark: tree subsets")
+    parser.add_argument("--depths", type=int, nargs="+", default=[8, 12, 16], help="benchmark: pruning depths")
+    parser.add_argument("--repeats", type=int, default=3)
+    arguments = parser.parse_args()
+
+    path = export_model(arguments.model, arguments.output)
+    print(f"Compact forest saved to {path}")
+    if arguments.command == "benchmark":
+        project_root = Path(__file__).resolve().parents[2]
+        data_cfg = read_config()
+        params = read_params()
+        _, X_test, _, y_test = load_split(
+            project_root / data_cfg.get("processed_dir", "data/processed"),
+            data_cfg,
+            params.get("classification", {}),
+            params.get("global", {}).get("random_state", 42),
+        )
+        model = joblib.load(arguments.model)
+        compact = joblib.load(path)
+        identical = np.array_equal(model.predict_proba(X_test), compact.predict_proba(X_test))
+        print(f"predict_proba bit-identical on the test split: {identical}")
+
+        for label, artifact in (("sklearn", arguments.model), ("compact", path)):
+            for mmap_mode in (None, "r"):
+                usage = measure_load(artifact, mmap_mode)
+                print(
+                    f"{label:<8} mmap={str(mmap_mode):<5} {artifact.stat().st_size / (1024 * 1024):8.1f} MB on disk, "
+                    f"load {usage['load_seconds']:.3f}s, +{usage['rss_mb']:.1f} MB RSS"
+                )
+        table = benchmark_compact(
+            model, compact, X_test, y_test, arguments.trees, [None] + arguments.depths, arguments.repeats
+        )
+        print(table.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+        reports_dir = project_root / "reports"
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        table.to_csv(reports_dir / "compact_forest_benchmark.csv", index=False)
@@ -0,0 +1,215 @@
+"""Persistent cache of cross-validation scores for the hyperparameter searches.
+
+A candidate's entry is keyed by everything that determines its CV score:
+
+- the training data (values, column names and dtypes of ``X`` and ``y``);
+- every primitive parameter of the pipeline once the candidate is applied,
+  which covers the preprocessing configuration and the classifier settings;
+- the pipeline's structure: the class of every nested estimator and, for
+  each ``ColumnTransformer`` entry, its name, steps and column list, so that
+  moving a column from one encoder to another changes the key;
+- the resolved categorical ``encodings`` (``settings["encodings"]``), the CV
+  splitting (``cv``) and the ``scoring``.
+
+Searches only fit the candidates missing from the cache and choose the best
+parameters over cached and new scores together. The cache is a JSON file;
+``python -m src.models.cv_cache`` lists, summarises and prunes it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import BaseCrossValidator
+from sklearn.pipeline import Pipeline
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / ".cache" / "cv_scores.json"
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def data_fingerprint(X: pd.DataFrame, y) -> str:
+    """Hash the rows, column names and dtypes of the training data."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in X.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _primitive(value) -> bool:
+    if isinstance(value, (list, tuple)):
+        return all(_primitive(item) for item in value)
+    return isinstance(value, _PRIMITIVES) or isinstance(value, np.generic)
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _class_path(value) -> str:
+    return f"{type(value).__module__}.{type(value).__qualname__}"
+
+
+def _structure(value):
+    """Classes, step names and column lists of a (possibly nested) estimator.
+
+    Primitive parameters are left to ``get_params(deep=True)``.
+    """
+    if isinstance(value, Pipeline):
+        return [_class_path(value), [[name, _structure(step)] for name, step in value.steps]]
+    if isinstance(value, ColumnTransformer):
+        entries = [
+            [name, _structure(transformer), _jsonable(columns) if _primitive(columns) else repr(columns)]
+            for name, transformer, columns in value.transformers
+        ]
+        return [_class_path(value), entries, _structure(value.remainder)]
+    if isinstance(value, str):
+        return value
+    return _class_path(value)
+
+
+def estimator_signature(estimator, candidate: Dict) -> Dict:
+    """Primitive parameters of ``estimator`` with ``candidate`` applied, and its structure.
+
+    Nested estimators are not listed as parameters: ``get_params(deep=True)``
+    already expands their own parameters, and ``__structure__`` records their
+    classes and the columns each transformer receives. CV splitters (e.g. the
+    folds of ``TargetEncoder``) are recorded by their ``repr``.
+    """
+    model = clone(estimator).set_params(**candidate)
+    params = model.get_params(deep=True)
+    signature = {}
+    for name, value in sorted(params.items()):
+        if _primitive(value):
+            signature[name] = _jsonable(value)
+        elif isinstance(value, BaseCrossValidator):
+            signature[name] = repr(value)
+    signature["__structure__"] = _structure(model)
+    return signature
+
+
+class CVCache:
+    """JSON-backed store of mean and per-fold CV scores."""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as stream:
+                self.entries = json.load(stream).get("entries", {})
+        self._fingerprints: List = []
+
+    def fingerprint(self, X, y) -> str:
+        """Data fingerprint, memoised for the frames of the current search."""
+        for frame, target, value in self._fingerprints:
+            if frame is X and target is y:
+                return value
+        value = data_fingerprint(X, y)
+        self._fingerprints = [(X, y, value)] + self._fingerprints[:3]
+        return value
+
+    @staticmethod
+    def key(fingerprint: str, signature: Dict, settings: Dict) -> str:
+        payload = json.dumps(
+            {
+                "data": fingerprint,
+                "params": signature,
+                "encodings": settings.get("encodings"),
+                "cv": repr(settings["cv"]),
+                "scoring": repr(settings["scoring"]),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry["last_used"] = _now()
+        return entry
+
+    def put(self, key: str, fingerprint: str, candidate: Dict, fold_scores: Iterable[float]) -> None:
+        fold_scores = [float(score) for score in fold_scores]
+        self.entries[key] = {
+            "data": fingerprint,
+            "params": {name: _jsonable(value) for name, value in candidate.items()},
+            "mean_score": float(np.mean(fold_scores)),
+            "fold_scores": fold_scores,
+            "created": _now(),
+            "last_used": _now(),
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".json.tmp")
+        with temp_path.open("w", encoding="utf-8") as stream:
+            json.dump({"entries": self.entries}, stream, indent=1, sort_keys=True)
+        temp_path.replace(self.path)
+
+    def to_frame(self) -> pd.DataFrame:
+        rows = [
+            {"key": key[:12], "data": entry["data"][:12], "mean_score": entry["mean_score"],
+             "params": json.dumps(entry["params"], sort_keys=True), "last_used": entry["last_used"]}
+            for key, entry in self.entries.items()
+        ]
+        return pd.DataFrame(rows, columns=["key", "data", "mean_score", "params", "last_used"])
+
+    def prune(self, older_than_days: Optional[int] = None, keep_data: Optional[Iterable[str]] = None) -> int:
+        """Drop entries unused for ``older_than_days`` or built on other data."""
+        keep = set(keep_data) if keep_data is not None else None
+        limit = (datetime.now() - timedelta(days=older_than_days)).isoformat() if older_than_days is not None else None
+        stale = [
+            key for key, entry in self.entries.items()
+            if (limit is not None and entry["last_used"] < limit)
+            or (keep is not None and not any(entry["data"].startswith(prefix) for prefix in keep))
+        ]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or prune the CV score cache")
+    parser.add_argument("command", choices=["list", "stats", "prune", "clear"])
+    parser.add_argument("--path", type=Path, default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--older-than", type=int, default=None, metavar="DAYS", help="prune: entries unused for DAYS")
+    parser.add_argument("--keep-data", nargs="+", default=None, metavar="FINGERPRINT",
+                        help="prune: keep only entries of these data fingerprints (prefixes accepted)")
+    arguments = parser.parse_args()
+
+    cache = CVCache(arguments.path)
+    if arguments.command == "list":
+        with pd.option_context("display.max_colwidth", 120, "display.width", 200):
+            print(cache.to_frame().sort_values("mean_score", ascending=False).to_string(index=False))
+    elif arguments.command == "stats":
+        frame = cache.to_frame()
+        print(f"{len(frame)} entries, {frame['data'].nunique()} data fingerprints, {arguments.path}")
+        for data, count in frame["data"].value_counts().items():
+            print(f"    {data}: {count} candidates")
+    else:
+        if arguments.command == "clear":
+            removed = len(cache.entries)
+            cache.entries = {}
+        else:
+            removed = cache.prune(arguments.older_than, arguments.keep_data)
+        cache.save()
+        print(f"Removed {removed} entries")
@@ -0,0 +1,136 @@
+"""Encoding policy for the categorical features of the medal classifier.
+
+``classification.encoding`` in ``model_params.yaml`` assigns each categorical
+column one of:
+
+- ``onehot``: ``OneHotEncoder`` capped by ``max_categories`` and
+  ``min_frequency``; rarer categories share an "infrequent" column;
+- ``hashing``: ``FeatureHasher`` into ``hashing_features`` columns;
+- ``ordinal``: one integer column, ``-1`` for unknown categories;
+- ``target``: ``TargetEncoder``, whose ``fit_transform`` cross-fits the
+  encoding so training rows never see their own target;
+- ``drop``: the column is not used.
+
+Identifier-like columns (URLs, or more than ``id_unique_ratio`` distinct
+values per non-null row) are dropped automatically unless the policy names
+them explicitly.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, TargetEncoder
+
+SKLEARN_VERSION = tuple(int(part) for part in sklearn.__version__.split(".")[:2])
+
+ENCODINGS = ("onehot", "hashing", "ordinal", "target", "drop")
+
+DEFAULT_POLICY = {
+    "default": "onehot",
+    "max_categories": 30,
+    "min_frequency": 10,
+    "hashing_features": 32,
+    "id_unique_ratio": 0.3,
+    "columns": {},
+}
+
+
+class HashingEncoder(TransformerMixin, BaseEstimator):
+    """Hash ``column=value`` tokens of every row into a fixed-width sparse matrix."""
+
+    def __init__(self, n_features: int = 32):
+        self.n_features = n_features
+
+    def fit(self, X, y=None):
+        self.n_features_in_ = np.asarray(X).shape[1]
+        return self
+
+    def transform(self, X):
+        values = np.asarray(X, dtype=object)
+        rows = ([f"{column}={value}" for column, value in enumerate(row)] for row in values)
+        return FeatureHasher(n_features=self.n_features, input_type="string").transform(rows)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.array([f"hash_{index}" for index in range(self.n_features)], dtype=object)
+
+
+def encoding_policy(params: Optional[Dict]) -> Dict:
+    policy = dict(DEFAULT_POLICY)
+    policy.update(params or {})
+    policy["columns"] = dict(policy.get("columns") or {})
+    unknown = {value for value in [policy["default"], *policy["columns"].values()] if value not in ENCODINGS}
+    if unknown:
+        raise ValueError(f"Unknown encoding(s): {', '.join(sorted(unknown))}")
+    return policy
+
+
+def detect_id_columns(X: pd.DataFrame, columns: List[str], unique_ratio: float) -> List[str]:
+    """Return the columns that look like identifiers rather than categories."""
+    detected = []
+    for column in columns:
+        values = X[column].dropna()
+        if values.empty:
+            continue
+        looks_like_url = values.astype(str).str.startswith(("http://", "https://")).mean() > 0.5
+        if looks_like_url or values.nunique() / len(values) > unique_ratio:
+            detected.append(column)
+    return detected
+
+
+def assign_encodings(X: pd.DataFrame, categorical_cols: List[str], policy: Dict) -> Dict[str, str]:
+    """Map each categorical column to its encoding, dropping identifier-like ones."""
+    explicit = policy["columns"]
+    ids = set(detect_id_columns(X, [c for c in categorical_cols if c not in explicit], policy["id_unique_ratio"]))
+    return {
+        column: explicit.get(column, "drop" if column in ids else policy["default"])
+        for column in categorical_cols
+    }
+
+
+def _encoder(kind: str, policy: Dict):
+    if kind == "onehot":
+        return OneHotEncoder(
+            handle_unknown="infrequent_if_exist",
+            max_categories=policy["max_categories"],
+            min_frequency=policy["min_frequency"],
+        )
+    if kind == "hashing":
+        return HashingEncoder(n_features=policy["hashing_features"])
+    if kind == "ordinal":
+        return OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1)
+    # Same shuffled folds either way; scikit-learn 1.9 takes them as ``cv`` and
+    # deprecates ``shuffle``/``random_state``, which older versions require.
+    if SKLEARN_VERSION >= (1, 9):
+        return TargetEncoder(cv=StratifiedKFold(n_splits=5, shuffle=True, random_state=0))
+    return TargetEncoder(random_state=0)
+
+
+def categorical_transformers(assigned: Dict[str, str], policy: Dict) -> List[Tuple[str, Pipeline, List[str]]]:
+    """One ``ColumnTransformer`` entry per encoding in use."""
+    transformers = []
+    for kind in ENCODINGS:
+        columns = [column for column, encoding in assigned.items() if encoding == kind]
+        if kind == "drop" or not columns:
+            continue
+        transformers.append(
+            (
+                f"cat_{kind}",
+                Pipeline(
+                    steps=[
+                        ("imputer", SimpleImputer(strategy="most_frequent")),
+                        ("encoder", _encoder(kind, policy)),
+                    ]
+                ),
+                columns,
+            )
+        )
+    return transformers
@@ -0,0 +1,334 @@
+"""Batch inference with the trained models.
+
+Each artifact is loaded once per process and scored batch by batch:
+
+- ``medal``: ``models/rf_classifier_medal.joblib``, the medal classifier
+  pipeline, outputs ``prediction`` and, for the binary target,
+  ``probability``; ``medal-compact`` is its array-based export
+  (``src.models.compact_forest``), same outputs;
+- ``clusters``: ``models/kmeans_clusters.joblib``, the scaler and KMeans
+  model, outputs ``cluster``; like training, rows with a missing feature
+  are not clustered and get ``<NA>``.
+
+Input is read in fixed-size batches from CSV, Parquet (only the model's
+columns are read) or JSON lines, from a file or from stdin (``-``).
+Predictions are streamed to the output as each batch is scored, so memory
+does not grow with the input size.
+
+``mmap_mode="r"`` makes ``joblib.load`` memory-map the numpy arrays stored in
+the artifact instead of reading them into the heap; worker processes that
+load the same file then share its pages through the page cache. Arrays that
+an estimator copies while unpickling (the scikit-learn tree nodes, for
+instance) are still private to each process.
+
+Throughput, load time and resident memory are reported on stderr, so the
+predictions can be piped from stdout:
+
+    python -m src.models.inference medal --input results.csv > predictions.csv
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = Path(__file__).resolve().parents[2] / "models"
+ARTIFACTS = {
+    "medal": MODELS_DIR / "rf_classifier_medal.joblib",
+    "medal-compact": MODELS_DIR / "rf_classifier_medal.compact.joblib",
+    "clusters": MODELS_DIR / "kmeans_clusters.joblib",
+}
+FORMATS = ("csv", "parquet", "jsonl")
+DEFAULT_BATCH_SIZE = 10_000
+
+_PAGE_MB = resource.getpagesize() / (1024 * 1024)
+
+
+def memory_mb() -> Dict[str, float]:
+    """Current resident and shared memory of this process, and its peak RSS."""
+    usage = {"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as stream:
+            _, resident, shared = stream.read().split()[:3]
+        usage["rss_mb"] = int(resident) * _PAGE_MB
+        usage["shared_mb"] = int(shared) * _PAGE_MB
+    except OSError:
+        pass
+    return usage
+
+
+@dataclass
+class LoadedModel:
+    """A deserialised artifact and the input columns it expects."""
+
+    path: Path
+    kind: str
+    estimator: object
+    features: List[str]
+    scaler: Optional[object] = None
+    load_seconds: float = 0.0
+
+    def predict_frame(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Score one batch.
+
+        The medal pipeline imputes, so missing input columns are passed to it
+        as missing values. The clustering model requires every feature column
+        and only scores the rows where none is missing.
+        """
+        if self.kind == "clusters":
+            return self._predict_clusters(batch)
+
+        X = batch.reindex(columns=self.features)
+        if not hasattr(self.estimator, "predict_proba"):
+            return pd.DataFrame({"prediction": self.estimator.predict(X)}, index=batch.index)
+        # One pass over the trees: the prediction is the most probable class.
+        proba = self.estimator.predict_proba(X)
+        classes = np.asarray(self.estimator.classes_)
+        output = pd.DataFrame({"prediction": classes[proba.argmax(axis=1)]}, index=batch.index)
+        if len(classes) == 2:
+            output["probability"] = proba[:, 1]
+        return output
+
+    def _predict_clusters(self, batch: pd.DataFrame) -> pd.DataFrame:
+        missing = [column for column in self.features if column not in batch.columns]
+        if missing:
+            raise ValueError(f"Input lacks the clustering features {missing}; score country_year_features instead.")
+        X = batch[self.features]
+        # Same rows as training, which drops those with a missing feature.
+        complete = X.notna().all(axis=1).to_numpy()
+        clusters = pd.Series(pd.NA, index=batch.index, dtype="Int64")
+        if complete.any():
+            scaled = self.scaler.transform(X[complete].astype("float64"))
+            clusters[complete] = self.estimator.predict(scaled)
+        return pd.DataFrame({"cluster": clusters})
+
+
+def load_model(model: Union[str, Path], mmap_mode: Optional[str] = None) -> LoadedModel:
+    """Load ``medal``, ``clusters`` or an artifact path, timing the deserialisation."""
+    path = Path(ARTIFACTS.get(str(model), model))
+    if not path.exists():
+        raise FileNotFoundError(f"Model artifact not found: {path}. Train the model first.")
+
+    start = time.perf_counter()
+    artifact = joblib.load(path, mmap_mode=mmap_mode)
+    load_seconds = time.perf_counter() - start
+
+    if isinstance(artifact, dict) and "model" in artifact:
+        return LoadedModel(path, "clusters", artifact["model"], list(artifact["features"]), artifact.get("scaler"), load_seconds)
+    features = getattr(artifact, "feature_names_in_", None)
+    if features is None:
+        raise ValueError(f"{path} was not fitted on a DataFrame; its input columns are unknown.")
+    return LoadedModel(path, "classifier", artifact, list(features), load_seconds=load_seconds)
+
+
+def _source_format(source: str, fmt: Optional[str]) -> str:
+    if fmt is not None:
+        return fmt
+    if source == "-":
+        return "jsonl"
+    suffix = Path(source).suffix.lower()
+    return {".parquet": "parquet", ".jsonl": "jsonl", ".json": "jsonl"}.get(suffix, "csv")
+
+
+def iter_batches(
+    source: str,
+    columns: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    fmt: Optional[str] = None,
+    stdin: Optional[TextIO] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield ``batch_size``-row frames from a CSV, Parquet or JSON-lines source."""
+    fmt = _source_format(source, fmt)
+    wanted = set(columns) if columns is not None else None
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(source)
+        names = parquet.schema_arrow.names
+        selected = [name for name in names if wanted is None or name in wanted]
+        for record_batch in parquet.iter_batches(batch_size=batch_size, columns=selected):
+            yield record_batch.to_pandas()
+        return
+
+    if fmt == "csv":
+        usecols = (lambda name: name in wanted) if wanted is not None else None
+        handle = (stdin or sys.stdin) if source == "-" else source
+        yield from pd.read_csv(handle, usecols=usecols, chunksize=batch_size)
+        return
+
+    stream = (stdin or sys.stdin) if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        records: List[Dict] = []
+        for line in stream:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) >= batch_size:
+                yield pd.DataFrame.from_records(records)
+                records = []
+        if records:
+            yield pd.DataFrame.from_records(records)
+    finally:
+        if stream is not sys.stdin and stream is not stdin:
+            stream.close()
+
+
+class PredictionWriter:
+    """Append scored batches to a CSV or JSON-lines stream."""
+
+    def __init__(self, stream: TextIO, fmt: str = "csv"):
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported output format: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self._header = True
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.fmt == "csv":
+            frame.to_csv(self.stream, header=self._header, index=False, lineterminator="\n")
+            self._header = False
+        else:
+            frame.to_json(self.stream, orient="records", lines=True)
+        self.stream.flush()
+
+
+@dataclass
+class InferenceReport:
+    model: str
+    rows: int = 0
+    batches: int = 0
+    load_seconds: float = 0.0
+    score_seconds: float = 0.0
+    workers: int = 1
+    memory: Dict[str, float] = field(default_factory=dict)
+    worker_memory: List[Dict[str, float]] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.score_seconds if self.score_seconds else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.model}: {self.rows} rows in {self.batches} batches, {self.score_seconds:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s), model loaded in {self.load_seconds:.3f}s",
+            "    main process: " + ", ".join(f"{key} {value:.1f}" for key, value in sorted(self.memory.items())),
+        ]
+        for index, usage in enumerate(self.worker_memory):
+            lines.append(f"    worker {index}: " + ", ".join(f"{key} {value:.1f}" for key, value in sorted(usage.items())))
+        return "\n".join(lines)
+
+
+# Per-process model of the worker pool, loaded once by ``_init_worker``.
+_WORKER_MODEL: Optional[LoadedModel] = None
+
+
+def _init_worker(model: str, mmap_mode: Optional[str]) -> None:
+    global _WORKER_MODEL
+    _WORKER_MODEL = load_model(model, mmap_mode)
+
+
+def _score_in_worker(batch: pd.DataFrame):
+    import os
+
+    return _WORKER_MODEL.predict_frame(batch), os.getpid(), memory_mb()
+
+
+def run_inference(
+    model: Union[str, Path],
+    source: str,
+    output: TextIO,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    input_format: Optional[str] = None,
+    output_format: str = "csv",
+    keep: Optional[List[str]] = None,
+    mmap_mode: Optional[str] = None,
+    workers: int = 1,
+) -> InferenceReport:
+    """Score ``source`` batch by batch and stream the predictions to ``output``.
+
+    ``keep`` lists input columns copied in front of the predictions (an id,
+    for instance). With ``workers > 1`` every worker process loads the model
+    once and batches are scored in parallel, written in input order.
+    """
+    keep = list(keep or [])
+    loaded = load_model(model, mmap_mode)
+    report = InferenceReport(model=str(model), load_seconds=loaded.load_seconds, workers=workers)
+    writer = PredictionWriter(output, output_format)
+    batches = iter_batches(source, loaded.features + keep, batch_size, input_format)
+
+    def emit(batch: pd.DataFrame, predictions: pd.DataFrame) -> None:
+        kept = batch.reindex(columns=keep)
+        writer.write(pd.concat([kept, predictions], axis=1) if keep else predictions)
+        report.rows += len(batch)
+        report.batches += 1
+
+    start = time.perf_counter()
+    if workers <= 1:
+        for batch in batches:
+            emit(batch, loaded.predict_frame(batch))
+    else:
+        # The main process only reads, the workers hold their own model.
+        del loaded
+        worker_usage: Dict[int, Dict[str, float]] = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(str(model), mmap_mode)) as pool:
+            pending = []
+            for batch in batches:
+                pending.append((batch, pool.submit(_score_in_worker, batch)))
+                # Keep a bounded number of batches in flight.
+                while len(pending) > 2 * workers:
+                    done_batch, future = pending.pop(0)
+                    predictions, pid, usage = future.result()
+                    worker_usage[pid] = usage
+                    emit(done_batch, predictions)
+            for done_batch, future in pending:
+                predictions, pid, usage = future.result()
+                worker_usage[pid] = usage
+                emit(done_batch, predictions)
+        report.worker_memory = list(worker_usage.values())
+    report.score_seconds = time.perf_counter() - start
+    report.memory = memory_mb()
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score a CSV, Parquet or JSON-lines input with a trained model")
+    parser.add_argument("model", help="medal, clusters or the path of a joblib artifact")
+    parser.add_argument("--input", default="-", help="input file, '-' for JSON lines on stdin")
+    parser.add_argument("--input-format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--output", default="-", help="predictions file, '-' for stdout")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--keep", nargs="+", default=None, metavar="COLUMN", help="input columns copied to the output")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the model arrays (joblib mmap_mode='r')")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each loading the model once")
+    arguments = parser.parse_args()
+
+    output_stream = sys.stdout if arguments.output == "-" else open(arguments.output, "w", encoding="utf-8", newline="")
+    try:
+        result = run_inference(
+            arguments.model,
+            arguments.input,
+            output_stream,
+            batch_size=arguments.batch_size,
+            input_format=arguments.input_format,
+            output_format=arguments.output_format,
+            keep=arguments.keep,
+            mmap_mode="r" if arguments.mmap else None,
+            workers=arguments.workers,
+        )
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+    print(result.summary(), file=sys.stderr)
@@ -5,10 +5,14 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-import mysql.connector
 import pandas as pd
 
 from ..data_prep.load_data import read_config
+from ..data_prep.storage import read_dataset
+from ..db_pool import DEFAULT_POOL_SIZE, ConnectionPool, mysql_connection_factory, parse_schedule, run_schedule
+
+# Both tables are independent, so they are loaded in parallel by default.
+DEFAULT_SCHEDULE = [["country_year_summary", "medal_predictions"]]
 
 PREDICTION_INSERT_SQL = (
     "INSERT INTO medal_predictions "
@@ -46,14 +50,14 @@ def run_sql_script(connection, script_path: Path) -> None:
         cursor.close()
 
 
-def connect_mysql(host: str, user: str, password: str, database: str = "olympics"):
-    return mysql.connector.connect(
-        host=host,
-        user=user,
-        password=password,
-        database=database,
-        autocommit=True,
-    )
+def create_pool(
+    host: str,
+    user: str,
+    password: str,
+    database: str = "olympics",
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> ConnectionPool:
+    return ConnectionPool(mysql_connection_factory(host, user, password, database), size=pool_size)
 
 
 def insert_country_summary(cursor, df: pd.DataFrame) -> int:
@@ -102,7 +106,64 @@ def load_csv(path: Path) -> pd.DataFrame:
     return pd.read_csv(path)
 
 
-def main(host: str, user: str, password: str, database: str = "olympics") -> None:
+def load_country_summary_table(pool: ConnectionPool, processed_dir: Path, data_cfg: dict) -> int:
+    country_df = read_dataset(processed_dir, "country_year_summary", config=data_cfg)
+    with pool.transaction() as cursor:
+        inserted_summary = insert_country_summary(cursor, country_df)
+    print(f"Inserted {inserted_summary} rows into country_year_summary")
+    return inserted_summary
+
+
+def load_predictions_table(pool: ConnectionPool, medal_predictions_path: Path) -> int:
+    if not medal_predictions_path.exists():
+        print("No medal_predictions.csv found, skipping prediction inserts.")
+        return 0
+
+    predictions_df = load_csv(medal_predictions_path)
+    model_name = (
+        predictions_df["model_name"].iloc[0]
+        if "model_name" in predictions_df.columns
+        else predictions_df.columns[-1]
+    )
+    target_column = "target" if "target" in predictions_df.columns else "medals_total"
+
+    with pool.transaction() as cursor:
+        if target_column in predictions_df.columns:
+            total_inserted = 0
+            for target_value, group in predictions_df.groupby(target_column):
+                group = group.assign(
+                    predicted_value=group.get("predicted_value", group.get("predicted_medals"))
+                )
+                inserted = insert_medal_predictions(
+                    cursor,
+                    group,
+                    str(model_name),
+                    str(target_value),
+                )
+                total_inserted += inserted
+        else:
+            predictions_df = predictions_df.rename(
+                columns={predictions_df.columns[-1]: "predicted_value"}
+            )
+            total_inserted = insert_medal_predictions(
+                cursor,
+                predictions_df,
+                str(model_name),
+                "medals_total",
+            )
+    print(f"Inserted {total_inserted} rows into medal_predictions")
+    return total_inserted
+
+
+def main(
+    host: str,
+    user: str,
+    password: str,
+    database: str = "olympics",
+    pool_size: int = DEFAULT_POOL_SIZE,
+    schedule=None,
+    pool: ConnectionPool | None = None,
+) -> None:
     project_root = Path(__file__).resolve().parents[2]
     data_cfg = read_config()
 
@@ -110,57 +171,20 @@ def main(host: str, user: str, password: str, database: str = "olympics") -> Non
     reports_dir = project_root / "reports"
     init_script = project_root / "sql" / "init_db.sql"
 
-    country_summary_path = processed_dir / "country_year_summary.csv"
     medal_predictions_path = reports_dir / "medal_predictions.csv"
 
-    conn = connect_mysql(host, user, password, database)
-    run_sql_script(conn, init_script)
-
-    cursor = conn.cursor()
+    pool = pool or create_pool(host, user, password, database, pool_size)
     try:
-        country_df = load_csv(country_summary_path)
-        inserted_summary = insert_country_summary(cursor, country_df)
-        print(f"Inserted {inserted_summary} rows into country_year_summary")
-
-        if medal_predictions_path.exists():
-            predictions_df = load_csv(medal_predictions_path)
-            model_name = (
-                predictions_df["model_name"].iloc[0]
-                if "model_name" in predictions_df.columns
-                else predictions_df.columns[-1]
-            )
-            target_column = "target" if "target" in predictions_df.columns else "medals_total"
-
-            if target_column in predictions_df.columns:
-                total_inserted = 0
-                for target_value, group in predictions_df.groupby(target_column):
-                    group = group.assign(
-                        predicted_value=group.get("predicted_value", group.get("predicted_medals"))
-                    )
-                    inserted = insert_medal_predictions(
-                        cursor,
-                        group,
-                        str(model_name),
-                        str(target_value),
-                    )
-                    total_inserted += inserted
-                print(f"Inserted {total_inserted} rows into medal_predictions")
-            else:
-                predictions_df = predictions_df.rename(
-                    columns={predictions_df.columns[-1]: "predicted_value"}
-                )
-                inserted = insert_medal_predictions(
-                    cursor,
-                    predictions_df,
-                    str(model_name),
-                    "medals_total",
-                )
-                print(f"Inserted {inserted} rows into medal_predictions")
-        else:
-            print("No medal_predictions.csv found, skipping prediction inserts.")
+        with pool.connection() as conn:
+            run_sql_script(conn, init_script)
+
+        tasks = {
+            "country_year_summary": lambda: load_country_summary_table(pool, processed_dir, data_cfg),
+            "medal_predictions": lambda: load_predictions_table(pool, medal_predictions_path),
+        }
+        run_schedule(schedule or DEFAULT_SCHEDULE, tasks, max_workers=pool.size)
     finally:
-        cursor.close()
-        conn.close()
+        pool.close()
 
 
 if __name__ == "__main__":
@@ -169,6 +193,20 @@ if __name__ == "__main__":
     parser.add_argument("--user", required=True, help="MySQL user")
     parser.add_argument("--password", required=True, help="MySQL password")
     parser.add_argument("--database", default="olympics", help="MySQL database name")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Pooled MySQL connections")
+    parser.add_argument(
+        "--schedule",
+        type=parse_schedule,
+        default=DEFAULT_SCHEDULE,
+        help="Load phases, e.g. 'country_year_summary;medal_predictions' to load sequentially",
+    )
 
     arguments = parser.parse_args()
-    main(arguments.host, arguments.user, arguments.password, arguments.database)
+    main(
+        arguments.host,
+        arguments.user,
+        arguments.password,
+        arguments.database,
+        pool_size=arguments.pool_size,
+        schedule=arguments.schedule,
+    )
@@ -0,0 +1,404 @@
+"""Hyperparameter search strategies for the medal classifier.
+
+``classification.search.strategy`` in ``model_params.yaml`` selects:
+
+- ``grid``: the exhaustive ``GridSearchCV`` used so far;
+- ``random``: a budget of ``n_iter`` candidates sampled from the grid,
+  evaluated in batches;
+- ``halving``: successive halving. Every round scores the remaining
+  candidates with a growing resource (training rows or ``n_estimators``)
+  and keeps the best ``1 / factor`` of them.
+
+``random`` and ``halving`` stop early once the best score improved by less
+than ``tol`` for ``patience`` consecutive batches or rounds. Every search
+reports its wall-clock time and the number of model fits, so strategies can
+be compared against the grid.
+
+When only the final step of the pipeline is tuned, the preprocessing is
+fitted once per CV fold (:class:`FoldCache`) instead of once per candidate
+and fold. The transformed fold matrices are dumped to disk and memory-mapped,
+so parallel workers share one read-only copy and only the classifier is
+refitted per candidate. Scores are identical to ``GridSearchCV`` on the full
+pipeline.
+
+With a :class:`~src.models.cv_cache.CVCache`, candidates already scored on
+the same data and configuration are read back instead of being fitted.
+"""
+
+from __future__ import annotations
+
+import math
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, ParameterGrid, ParameterSampler, check_cv, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.utils import check_array
+
+from .cv_cache import CVCache, estimator_signature
+
+STRATEGIES = ("grid", "random", "halving")
+
+# Tree models convert their input to float32 (CSC to fit, CSR to predict);
+# storing the fold matrices in that layout avoids one copy per fit.
+_TREE_MODELS = (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)
+
+
+@dataclass
+class SearchOutcome:
+    strategy: str
+    best_estimator: object
+    best_params: Dict
+    best_score: float
+    n_candidates: int
+    n_fits: int
+    seconds: float
+    history: List[Dict] = field(default_factory=list)
+
+    def summary(self) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "seconds": round(self.seconds, 3),
+            "n_fits": self.n_fits,
+            "n_candidates": self.n_candidates,
+            "best_score": self.best_score,
+            "best_params": self.best_params,
+        }
+
+
+class _Plateau:
+    """Track the best score and detect when it stops improving."""
+
+    def __init__(self, patience: Optional[int], tol: float):
+        self.patience = patience
+        self.tol = tol
+        self.best = -np.inf
+        self.stale = 0
+
+    def update(self, score: float) -> bool:
+        """Record a round's best score; return ``True`` when the search should stop."""
+        if score > self.best + self.tol:
+            self.stale = 0
+        else:
+            self.stale += 1
+        self.best = max(self.best, score)
+        return bool(self.patience) and self.stale >= self.patience
+
+
+def search_settings(params: Dict) -> Dict:
+    """Merge ``classification.search`` with the legacy ``gridsearch`` section."""
+    grid_cfg = params.get("gridsearch", {})
+    settings = {
+        "strategy": "grid",
+        "cv": grid_cfg.get("cv", 5),
+        "n_jobs": grid_cfg.get("n_jobs", -1),
+        "verbose": grid_cfg.get("verbose", 1),
+        "scoring": params.get("scoring", "accuracy"),
+        "params": grid_cfg.get("params", {}),
+    }
+    settings.update(params.get("search", {}) or {})
+    if settings["strategy"] not in STRATEGIES:
+        raise ValueError(f"Unknown search strategy: {settings['strategy']}")
+    return settings
+
+
+class FoldCache:
+    """Per-fold matrices transformed by a pipeline's preprocessing steps.
+
+    The folds are built on first use: each fold's preprocessing is fitted
+    once on its training part, both parts are dumped under a temporary
+    directory and reloaded memory-mapped. Use the cache as a context manager
+    so the directory is removed.
+    """
+
+    def __init__(self, estimator: Pipeline, X, y, cv, cache_dir: Optional[Path] = None):
+        self.estimator = estimator
+        self.X = X
+        self.y = y
+        self.cv = cv
+        self.cache_dir = cache_dir
+        self.final_name, self.final = estimator.steps[-1]
+        self.directory: Optional[Path] = None
+        self._folds: Optional[List] = None
+
+    @property
+    def folds(self) -> List:
+        if self._folds is None:
+            self._folds = self._build()
+        return self._folds
+
+    def _build(self) -> List:
+        self.directory = Path(tempfile.mkdtemp(prefix="fold_cache_", dir=self.cache_dir))
+        tree_input = isinstance(self.final, _TREE_MODELS)
+        splitter = check_cv(self.cv, self.y, classifier=is_classifier(self.estimator))
+        y_values = np.asarray(self.y)
+        folds = []
+        for index, (train, test) in enumerate(splitter.split(self.X, y_values)):
+            preprocess = clone(self.estimator[:-1])
+            X_train = preprocess.fit_transform(self.X.iloc[train], y_values[train])
+            X_test = preprocess.transform(self.X.iloc[test])
+            if tree_input:
+                X_train = check_array(X_train, accept_sparse="csc", dtype=np.float32)
+                X_test = check_array(X_test, accept_sparse="csr", dtype=np.float32)
+            path = self.directory / f"fold_{index}.joblib"
+            joblib.dump((X_train, y_values[train], X_test, y_values[test]), path)
+            folds.append(joblib.load(path, mmap_mode="r"))
+        return folds
+
+    @staticmethod
+    def supports(estimator, params: Dict) -> bool:
+        """Only parameters of the final pipeline step can reuse the folds."""
+        if not isinstance(estimator, Pipeline) or len(estimator.steps) < 2:
+            return False
+        prefix = f"{estimator.steps[-1][0]}__"
+        return all(name.startswith(prefix) for name in params)
+
+    def final_params(self, candidate: Dict) -> Dict:
+        prefix = f"{self.final_name}__"
+        return {name[len(prefix):]: value for name, value in candidate.items()}
+
+    def close(self) -> None:
+        self._folds = None
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+    def __enter__(self) -> "FoldCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _fit_and_score(final, params: Dict, fold, scoring) -> float:
+    X_train, y_train, X_test, y_test = fold
+    model = clone(final).set_params(**params).fit(X_train, y_train)
+    return check_scoring(model, scoring=scoring)(model, X_test, y_test)
+
+
+def _open_folds(estimator, X, y, settings: Dict, params: Dict):
+    """Return a :class:`FoldCache` when it applies, else a no-op context."""
+    if not settings.get("cache_folds", True) or not FoldCache.supports(estimator, params):
+        return nullcontext()
+    return FoldCache(estimator, X, y, settings["cv"])
+
+
+def _cross_validate(estimator, candidates: List[Dict], X, y, settings: Dict, folds: Optional[FoldCache]) -> np.ndarray:
+    """Return the per-fold test scores of each candidate, shape ``(candidates, folds)``."""
+    if folds is None:
+        search = GridSearchCV(
+            estimator,
+            param_grid=[{name: [value] for name, value in candidate.items()} for candidate in candidates],
+            cv=settings["cv"],
+            scoring=settings["scoring"],
+            n_jobs=settings["n_jobs"],
+            refit=False,
+        )
+        search.fit(X, y)
+        return np.column_stack([search.cv_results_[f"split{index}_test_score"] for index in range(search.n_splits_)])
+
+    if settings.get("verbose"):
+        print(f"Fitting {len(folds.folds)} folds for each of {len(candidates)} candidates (cached preprocessing)")
+    scores = Parallel(n_jobs=settings["n_jobs"])(
+        delayed(_fit_and_score)(folds.final, folds.final_params(candidate), fold, settings["scoring"])
+        for candidate in candidates
+        for fold in folds.folds
+    )
+    return np.asarray(scores, dtype=float).reshape(len(candidates), len(folds.folds))
+
+
+def _score_candidates(
+    estimator,
+    candidates: List[Dict],
+    X,
+    y,
+    settings: Dict,
+    folds: Optional[FoldCache] = None,
+    cache: Optional[CVCache] = None,
+) -> Tuple[np.ndarray, int]:
+    """Return the mean CV score of each candidate and the number of fits run.
+
+    Candidates found in ``cache`` are not fitted again; new scores are added
+    to it.
+    """
+    scores = np.zeros(len(candidates))
+    missing = list(range(len(candidates)))
+    keys: List[Optional[str]] = [None] * len(candidates)
+    if cache is not None:
+        fingerprint = cache.fingerprint(X, y)
+        missing = []
+        for index, candidate in enumerate(candidates):
+            keys[index] = cache.key(fingerprint, estimator_signature(estimator, candidate), settings)
+            entry = cache.get(keys[index])
+            if entry is None:
+                missing.append(index)
+            else:
+                scores[index] = entry["mean_score"]
+        if settings.get("verbose") and len(missing) < len(candidates):
+            print(f"{len(candidates) - len(missing)}/{len(candidates)} candidates found in the CV cache")
+
+    n_fits = 0
+    if missing:
+        fold_scores = _cross_validate(estimator, [candidates[index] for index in missing], X, y, settings, folds)
+        n_fits = fold_scores.size
+        for row, index in enumerate(missing):
+            scores[index] = fold_scores[row].mean()
+            if cache is not None:
+                cache.put(keys[index], fingerprint, candidates[index], fold_scores[row])
+    if cache is not None:
+        cache.save()
+    return scores, n_fits
+
+
+def _refit(estimator, best_params: Dict, X, y):
+    model = clone(estimator).set_params(**best_params)
+    return model.fit(X, y)
+
+
+def _grid_search(estimator, X, y, settings: Dict, random_state: int, cache: Optional[CVCache] = None) -> SearchOutcome:
+    candidates = list(ParameterGrid(settings["params"]))
+    with _open_folds(estimator, X, y, settings, candidates[0]) as folds:
+        scores, n_fits = _score_candidates(estimator, candidates, X, y, settings, folds, cache)
+
+    # ``np.argmax`` keeps the first best candidate, like ``GridSearchCV``.
+    best_index = int(np.argmax(scores))
+    best_params = candidates[best_index]
+    return SearchOutcome(
+        "grid", _refit(estimator, best_params, X, y), best_params, float(scores[best_index]),
+        len(candidates), n_fits + 1, 0.0,
+    )
+
+
+def _random_search(estimator, X, y, settings: Dict, random_state: int, cache: Optional[CVCache] = None) -> SearchOutcome:
+    grid_size = len(ParameterGrid(settings["params"]))
+    n_iter = min(settings.get("n_iter", 8), grid_size)
+    candidates = list(ParameterSampler(settings["params"], n_iter=n_iter, random_state=random_state))
+    batch_size = max(1, settings.get("batch_size", 4))
+    plateau = _Plateau(settings.get("patience"), settings.get("tol", 0.0))
+
+    scores: List[float] = []
+    history = []
+    n_fits = 0
+    with _open_folds(estimator, X, y, settings, candidates[0]) as folds:
+        for start in range(0, len(candidates), batch_size):
+            batch = candidates[start:start + batch_size]
+            batch_scores, batch_fits = _score_candidates(estimator, batch, X, y, settings, folds, cache)
+            scores.extend(batch_scores)
+            n_fits += batch_fits
+            best = float(np.max(scores))
+            history.append({"round": len(history), "n_candidates": len(batch), "best_score": best})
+            if plateau.update(best):
+                break
+
+    best_index = int(np.argmax(scores))
+    best_params = candidates[best_index]
+    return SearchOutcome(
+        "random", _refit(estimator, best_params, X, y), best_params, float(scores[best_index]),
+        len(scores), n_fits + 1, 0.0, history,
+    )
+
+
+def _halving_search(estimator, X, y, settings: Dict, random_state: int, cache: Optional[CVCache] = None) -> SearchOutcome:
+    cfg = settings.get("halving", {}) or {}
+    resource = cfg.get("resource", "n_samples")
+    factor = cfg.get("factor", 3)
+    grid_params = dict(settings["params"])
+
+    if resource == "n_samples":
+        max_resources = len(X)
+        floor = 10 * settings["cv"]
+    else:
+        # The resource is a parameter: it leaves the grid and grows per round.
+        values = grid_params.pop(resource, None)
+        max_resources = cfg.get("max_resources") or (max(values) if values else 400)
+        floor = 1
+    candidates = list(ParameterGrid(grid_params))
+
+    # Same number of rounds as sklearn's HalvingGridSearchCV.
+    n_rounds = 1 + int(math.log(len(candidates), factor)) if len(candidates) > 1 else 1
+    min_resources = cfg.get("min_resources") or max_resources // factor ** (n_rounds - 1)
+    min_resources = max(int(min_resources), floor)
+    plateau = _Plateau(settings.get("patience"), settings.get("tol", 0.0))
+
+    history = []
+    n_fits = 0
+    evaluated = 0
+    round_index = 0
+    # With a parameter as resource every round reuses the same folds.
+    shared = nullcontext() if resource == "n_samples" else _open_folds(
+        estimator, X, y, settings, dict(candidates[0], **{resource: 1})
+    )
+    with shared as shared_folds:
+        while True:
+            amount = int(min(max_resources, min_resources * factor ** round_index))
+            if resource == "n_samples":
+                if amount < len(X):
+                    X_round, _, y_round, _ = train_test_split(
+                        X, y, train_size=amount, stratify=y, random_state=random_state
+                    )
+                else:
+                    X_round, y_round = X, y
+                with _open_folds(estimator, X_round, y_round, settings, candidates[0]) as folds:
+                    scores, round_fits = _score_candidates(estimator, candidates, X_round, y_round, settings, folds, cache)
+            else:
+                round_candidates = [dict(candidate, **{resource: amount}) for candidate in candidates]
+                scores, round_fits = _score_candidates(estimator, round_candidates, X, y, settings, shared_folds, cache)
+            n_fits += round_fits
+            evaluated += len(candidates)
+            order = np.argsort(-scores, kind="stable")
+            history.append(
+                {"round": round_index, "resource": amount, "n_candidates": len(candidates), "best_score": float(scores[order[0]])}
+            )
+
+            best_params = candidates[int(order[0])]
+            best_score = float(scores[order[0]])
+            survivors = max(1, math.ceil(len(candidates) / factor))
+            if plateau.update(best_score) or survivors == 1 or amount >= max_resources:
+                break
+            candidates = [candidates[i] for i in order[:survivors]]
+            round_index += 1
+
+    if resource != "n_samples":
+        best_params = dict(best_params, **{resource: int(max_resources)})
+    return SearchOutcome(
+        "halving", _refit(estimator, best_params, X, y), best_params, best_score,
+        evaluated, n_fits + 1, 0.0, history,
+    )
+
+
+_SEARCHES = {"grid": _grid_search, "random": _random_search, "halving": _halving_search}
+
+
+def run_search(
+    estimator,
+    X,
+    y,
+    settings: Dict,
+    random_state: int = 42,
+    cache: Optional[CVCache] = None,
+) -> SearchOutcome:
+    """Run the configured strategy and time it."""
+    start = time.perf_counter()
+    outcome = _SEARCHES[settings["strategy"]](estimator, X, y, settings, random_state, cache)
+    outcome.seconds = time.perf_counter() - start
+    return outcome
+
+
+def record_search(outcome: SearchOutcome, path) -> None:
+    """Append the time and fit count of a search to a CSV log."""
+    row = pd.DataFrame([{**outcome.summary(), "timestamp": pd.Timestamp.now().isoformat(timespec="seconds")}])
+    row["best_params"] = row["best_params"].astype(str)
+    row.to_csv(path, mode="a", header=not path.exists(), index=False)
@@ -2,32 +2,102 @@
 
 from __future__ import annotations
 
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional
 
 import joblib
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import seaborn as sns
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score
 from sklearn.preprocessing import StandardScaler
 import yaml
 
 from ..data_prep.load_data import read_config
+from ..data_prep.storage import dataset_path
 from ..features.feature_engineering import build_model_features
+from ..instrumentation import instrument, instrumented
 
 sns.set_theme(style="whitegrid")
 
 CONFIG_MODEL = Path(__file__).resolve().parents[2] / "config" / "model_params.yaml"
 
+# Above this many rows the ``auto`` algorithm switches to MiniBatchKMeans.
+DEFAULT_MINIBATCH_THRESHOLD = 50_000
+DEFAULT_SILHOUETTE_SAMPLE = 10_000
+
 
 def read_params() -> Dict:
     with CONFIG_MODEL.open("r", encoding="utf-8") as stream:
         return yaml.safe_load(stream)
 
 
+def resolve_algorithm(params: Dict, n_rows: int) -> str:
+    """Return ``kmeans`` or ``minibatch`` from the ``algorithm`` setting."""
+    algorithm = params.get("algorithm", "kmeans")
+    if algorithm == "auto":
+        threshold = params.get("minibatch_threshold", DEFAULT_MINIBATCH_THRESHOLD)
+        return "minibatch" if n_rows > threshold else "kmeans"
+    if algorithm not in {"kmeans", "minibatch"}:
+        raise ValueError(f"Unknown clustering algorithm: {algorithm}")
+    return algorithm
+
+
+def make_model(k: int, algorithm: str, params: Dict, random_state: int = 42):
+    if algorithm == "minibatch":
+        return MiniBatchKMeans(
+            n_clusters=k,
+            random_state=random_state,
+            n_init="auto",
+            batch_size=params.get("batch_size", 1024),
+        )
+    return KMeans(n_clusters=k, random_state=random_state, n_init="auto")
+
+
+def fit_k(
+    k: int,
+    scaled: np.ndarray,
+    algorithm: str,
+    params: Dict,
+    silhouette_sample: Optional[int],
+    random_state: int = 42,
+) -> Dict:
+    """Fit one k of the sweep and score it, timing both steps."""
+    start = time.perf_counter()
+    model = make_model(k, algorithm, params, random_state)
+    labels = model.fit_predict(scaled)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # The exact silhouette is O(n²); score a random subset on large tables.
+    sample_size = silhouette_sample if silhouette_sample and len(scaled) > silhouette_sample else None
+    silhouette = silhouette_score(scaled, labels, sample_size=sample_size, random_state=random_state)
+    return {
+        "k": k,
+        "model": model,
+        "labels": labels,
+        "inertia": model.inertia_,
+        "silhouette": silhouette,
+        "fit_seconds": fit_seconds,
+        "silhouette_seconds": time.perf_counter() - start,
+        "silhouette_rows": sample_size or len(scaled),
+    }
+
+
+def sweep_k(scaled: np.ndarray, k_values: List[int], params: Dict, algorithm: str) -> List[Dict]:
+    """Fit every k of the sweep in parallel workers."""
+    silhouette_sample = params.get("silhouette_sample_size", DEFAULT_SILHOUETTE_SAMPLE)
+    return Parallel(n_jobs=params.get("n_jobs", -1))(
+        delayed(fit_k)(k, scaled, algorithm, params, silhouette_sample) for k in k_values
+    )
+
+
+@instrumented("clustering")
 def run_clustering(save_figures: bool = True) -> Path:
     """Execute clustering pipeline and persist labels."""
     project_root = Path(__file__).resolve().parents[2]
@@ -38,65 +108,80 @@ def run_clustering(save_figures: bool = True) -> Path:
     reports_fig_dir = project_root / "reports" / "figures"
     reports_fig_dir.mkdir(parents=True, exist_ok=True)
 
-    summary_path = processed_dir / "country_year_summary.csv"
-    feature_df = build_model_features(summary_path)
+    with instrument("clustering.features") as step:
+        summary_path = dataset_path(processed_dir, "country_year_summary", data_cfg)
+        feature_df = build_model_features(summary_path)
 
-    feature_cols = ["medals_total", "athletes_unique", "avg_rank", "medal_share", "medals_total_lag_1"]
-    available_cols = [c for c in feature_cols if c in feature_df.columns]
-    if not available_cols:
-        raise ValueError("No feature columns available for clustering.")
+        feature_cols = ["medals_total", "athletes_unique", "avg_rank", "medal_share", "medals_total_lag_1"]
+        available_cols = [c for c in feature_cols if c in feature_df.columns]
+        if not available_cols:
+            raise ValueError("No feature columns available for clustering.")
 
-    data = feature_df.dropna(subset=available_cols).copy()
-    scaler = StandardScaler()
-    scaled = scaler.fit_transform(data[available_cols])
+        data = feature_df.dropna(subset=available_cols).copy()
+        scaler = StandardScaler()
+        scaled = scaler.fit_transform(data[available_cols])
+        step.rows_in, step.rows_out = len(feature_df), len(data)
 
     k_values = params.get("k_range", list(range(2, 11)))
-    inertias, silhouettes = [], []
-    for k in k_values:
-        model = KMeans(n_clusters=k, random_state=42, n_init="auto")
-        labels = model.fit_predict(scaled)
-        inertias.append(model.inertia_)
-        silhouettes.append(silhouette_score(scaled, labels))
+    algorithm = resolve_algorithm(params, len(scaled))
+    with instrument("clustering.sweep", rows_in=len(scaled), algorithm=algorithm, k_values=list(k_values)):
+        sweep = sweep_k(scaled, k_values, params, algorithm)
+    inertias = [entry["inertia"] for entry in sweep]
+    silhouettes = [entry["silhouette"] for entry in sweep]
+
+    timings = pd.DataFrame(
+        [{key: value for key, value in entry.items() if key not in {"model", "labels"}} for entry in sweep]
+    )
+    timings["algorithm"] = algorithm
+    timings.to_csv(reports_fig_dir / "clustering_k_sweep.csv", index=False)
 
     if save_figures:
-        fig, ax = plt.subplots(1, 2, figsize=(14, 5))
-        ax[0].plot(k_values, inertias, marker="o")
-        ax[0].set_title("Méthode du coude")
-        ax[0].set_xlabel("k")
-        ax[0].set_ylabel("Inertie")
-
-        ax[1].plot(k_values, silhouettes, marker="o", color="orange")
-        ax[1].set_title("Score de silhouette")
-        ax[1].set_xlabel("k")
-        ax[1].set_ylabel("Silhouette")
-        plt.tight_layout()
-        fig.savefig(reports_fig_dir / "clustering_elbow_silhouette.png", dpi=120)
-        plt.close(fig)
-
-    best_k = params.get("default_k", 4)
-    final_model = KMeans(n_clusters=best_k, random_state=42, n_init="auto")
-    labels = final_model.fit_predict(scaled)
-
-    data["cluster"] = labels
-    pca = PCA(n_components=2, random_state=42)
-    coords = pca.fit_transform(scaled)
-    data["pca_1"] = coords[:, 0]
-    data["pca_2"] = coords[:, 1]
+        with instrument("clustering.plot_sweep"):
+            fig, ax = plt.subplots(1, 2, figsize=(14, 5))
+            ax[0].plot(k_values, inertias, marker="o")
+            ax[0].set_title("Méthode du coude")
+            ax[0].set_xlabel("k")
+            ax[0].set_ylabel("Inertie")
+
+            ax[1].plot(k_values, silhouettes, marker="o", color="orange")
+            ax[1].set_title("Score de silhouette")
+            ax[1].set_xlabel("k")
+            ax[1].set_ylabel("Silhouette")
+            plt.tight_layout()
+            fig.savefig(reports_fig_dir / "clustering_elbow_silhouette.png", dpi=120)
+            plt.close(fig)
+
+    with instrument("clustering.final", rows_in=len(scaled)):
+        best_k = params.get("default_k", 4)
+        fitted = {entry["k"]: entry for entry in sweep}
+        if best_k in fitted:
+            final_model, labels = fitted[best_k]["model"], fitted[best_k]["labels"]
+        else:
+            final_model = make_model(best_k, algorithm, params)
+            labels = final_model.fit_predict(scaled)
+
+        data["cluster"] = labels
+        pca = PCA(n_components=2, random_state=42)
+        coords = pca.fit_transform(scaled)
+        data["pca_1"] = coords[:, 0]
+        data["pca_2"] = coords[:, 1]
 
     if save_figures:
-        fig, ax = plt.subplots(figsize=(10, 7))
-        sns.scatterplot(data=data, x="pca_1", y="pca_2", hue="cluster", palette="tab10", ax=ax, s=70)
-        ax.set_title("Clusters de pays (PCA)")
-        plt.tight_layout()
-        fig.savefig(reports_fig_dir / "clustering_pca.png", dpi=120)
-        plt.close(fig)
-
-    output_path = processed_dir / "country_year_clusters.csv"
-    data.to_csv(output_path, index=False)
-
-    models_dir = project_root / "models"
-    models_dir.mkdir(parents=True, exist_ok=True)
-    joblib.dump({"model": final_model, "scaler": scaler, "features": available_cols}, models_dir / "kmeans_clusters.joblib")
+        with instrument("clustering.plot_pca", rows_in=len(data)):
+            fig, ax = plt.subplots(figsize=(10, 7))
+            sns.scatterplot(data=data, x="pca_1", y="pca_2", hue="cluster", palette="tab10", ax=ax, s=70)
+            ax.set_title("Clusters de pays (PCA)")
+            plt.tight_layout()
+            fig.savefig(reports_fig_dir / "clustering_pca.png", dpi=120)
+            plt.close(fig)
+
+    with instrument("clustering.save", rows_in=len(data)):
+        output_path = processed_dir / "country_year_clusters.csv"
+        data.to_csv(output_path, index=False)
+
+        models_dir = project_root / "models"
+        models_dir.mkdir(parents=True, exist_ok=True)
+        joblib.dump({"model": final_model, "scaler": scaler, "features": available_cols}, models_dir / "kmeans_clusters.joblib")
 
     return output_path
 
@@ -2,45 +2,106 @@
 
 from __future__ import annotations
 
+import time
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import joblib
+import numpy as np
 import pandas as pd
 import yaml
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 import matplotlib.pyplot as plt
 from sklearn.metrics import ConfusionMatrixDisplay, classification_report, confusion_matrix
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 from ..data_prep.load_data import read_config
+from ..data_prep.storage import dataset_columns, read_dataset
+from ..instrumentation import instrument, instrumented
+from .compact_forest import export_forest
+from .cv_cache import CVCache
+from .encoding import assign_encodings, categorical_transformers, encoding_policy
+from .search import record_search, run_search, search_settings
 
 CONFIG_MODEL = Path(__file__).resolve().parents[2] / "config" / "model_params.yaml"
 
+TARGET_COL = "medal_flag"
+DROP_COLS = {
+    TARGET_COL,
+    "athlete_url",
+    "athlete_full_name",
+    "medal_type_result",
+    "medal_type_medals",
+    "medal_type_final",
+}
+
 
 def read_params() -> Dict:
     with CONFIG_MODEL.open("r", encoding="utf-8") as stream:
         return yaml.safe_load(stream)
 
 
-def load_training_data(processed_dir: Path) -> pd.DataFrame:
-    data_path = processed_dir / "olympic_full.csv"
-    if not data_path.exists():
-        raise FileNotFoundError("Processed dataset missing. Run preprocessing first.")
-    return pd.read_csv(data_path)
+def load_training_data(
+    processed_dir: Path,
+    exclude: Iterable[str] = (),
+    config: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Load ``olympic_full`` without the columns listed in ``exclude``."""
+    try:
+        excluded = set(exclude)
+        columns = [col for col in dataset_columns(processed_dir, "olympic_full", config) if col not in excluded]
+        return read_dataset(processed_dir, "olympic_full", columns=columns, config=config)
+    except FileNotFoundError as exc:
+        raise FileNotFoundError("Processed dataset missing. Run preprocessing first.") from exc
+
+
+def load_split(
+    processed_dir: Path,
+    data_cfg: dict,
+    params: Dict,
+    random_state: int,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    """Features and target of ``olympic_full``, split into train and test sets."""
+    df = load_training_data(processed_dir, exclude=DROP_COLS - {TARGET_COL}, config=data_cfg)
+    feature_cols = [col for col in df.columns if col not in DROP_COLS]
+
+    X = df[feature_cols]
+    y = df[TARGET_COL].astype(int)
+
+    test_size = params.get("test_size", 0.2)
+    return train_test_split(
+        X,
+        y,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y,
+    )
 
 
-def build_pipeline(numeric_cols, categorical_cols) -> ColumnTransformer:
+def build_pipeline(
+    numeric_cols,
+    categorical_cols,
+    encodings: Optional[Dict[str, str]] = None,
+    policy: Optional[Dict] = None,
+) -> ColumnTransformer:
+    """Preprocessing step; without ``encodings`` every categorical column is one-hot encoded."""
     numeric_transformer = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="median")),
             ("scaler", StandardScaler()),
         ]
     )
+    if encodings is not None:
+        return ColumnTransformer(
+            transformers=[("num", numeric_transformer, numeric_cols)]
+            + categorical_transformers(encodings, encoding_policy(policy))
+        )
+
     categorical_transformer = Pipeline(
         steps=[
             ("imputer", SimpleImputer(strategy="most_frequent")),
@@ -55,7 +116,15 @@ def build_pipeline(numeric_cols, categorical_cols) -> ColumnTransformer:
     )
 
 
-def run_training() -> Tuple[Path, Dict]:
+def describe_features(preprocessor: ColumnTransformer, X: pd.DataFrame, y: pd.Series) -> Tuple[int, float]:
+    """Fit a copy of the preprocessing on ``X``; return the matrix width and fit time."""
+    start = time.perf_counter()
+    width = clone(preprocessor).fit_transform(X, y).shape[1]
+    return width, time.perf_counter() - start
+
+
+@instrumented("training")
+def run_training(strategy: Optional[str] = None) -> Tuple[Path, Dict]:
     project_root = Path(__file__).resolve().parents[2]
     data_cfg = read_config()
     params = read_params().get("classification", {})
@@ -67,25 +136,25 @@ def run_training() -> Tuple[Path, Dict]:
     figures_dir = reports_dir / "figures"
     figures_dir.mkdir(parents=True, exist_ok=True)
 
-    df = load_training_data(processed_dir)
-    target_col = "medal_flag"
-    drop_cols = {
-        target_col,
-        "athlete_url",
-        "athlete_full_name",
-        "medal_type_result",
-        "medal_type_medals",
-        "medal_type_final",
-    }
-    feature_cols = [col for col in df.columns if col not in drop_cols]
-
-    X = df[feature_cols]
-    y = df[target_col].astype(int)
-
-    numeric_cols = X.select_dtypes(include=["number"]).columns.tolist()
-    categorical_cols = X.select_dtypes(include=["object"]).columns.tolist()
-
-    preprocessor = build_pipeline(numeric_cols, categorical_cols)
+    with instrument("training.load") as step:
+        X_train, X_test, y_train, y_test = load_split(processed_dir, data_cfg, params, random_state)
+        step.rows_out = len(X_train) + len(X_test)
+    numeric_cols = X_train.select_dtypes(include=["number"]).columns.tolist()
+    categorical_cols = X_train.select_dtypes(include=["object"]).columns.tolist()
+
+    # Encodings are chosen on the training split only.
+    with instrument("training.encode", rows_in=len(X_train)) as step:
+        encodings: Optional[Dict[str, str]] = None
+        if params.get("encoding") is not None:
+            encodings = assign_encodings(X_train, categorical_cols, encoding_policy(params["encoding"]))
+            dropped: List[str] = [column for column, kind in encodings.items() if kind == "drop"]
+            print(f"Categorical encodings: {encodings}")
+            if dropped:
+                print(f"Dropped identifier-like columns: {dropped}")
+        preprocessor = build_pipeline(numeric_cols, categorical_cols, encodings, params.get("encoding"))
+        feature_width, preprocess_seconds = describe_features(preprocessor, X_train, y_train)
+        step.extra["feature_width"] = feature_width
+    print(f"Feature matrix: {len(X_train)} rows x {feature_width} columns (preprocessing fit in {preprocess_seconds:.2f}s)")
 
     base_estimator = RandomForestClassifier(random_state=random_state)
     pipeline = Pipeline([
@@ -93,51 +162,57 @@ def run_training() -> Tuple[Path, Dict]:
         ("clf", base_estimator),
     ])
 
-    test_size = params.get("test_size", 0.2)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=test_size,
-        random_state=random_state,
-        stratify=y,
-    )
-
-    grid_cfg = params.get("gridsearch", {})
-    grid = GridSearchCV(
-        pipeline,
-        param_grid=grid_cfg.get("params", {}),
-        cv=grid_cfg.get("cv", 5),
-        scoring=params.get("scoring", "accuracy"),
-        n_jobs=grid_cfg.get("n_jobs", -1),
-        verbose=grid_cfg.get("verbose", 1),
-    )
-    grid.fit(X_train, y_train)
-
-    y_pred = grid.predict(X_test)
-    report = classification_report(y_test, y_pred, output_dict=True)
-
-    cm = confusion_matrix(y_test, y_pred, labels=grid.best_estimator_.named_steps["clf"].classes_)
-    disp = ConfusionMatrixDisplay(cm, display_labels=grid.best_estimator_.named_steps["clf"].classes_)
-    fig, ax = plt.subplots(figsize=(6, 5))
-    disp.plot(ax=ax, colorbar=False)
-    ax.set_title("Confusion Matrix - Medal Prediction")
-    ax.set_xlabel("Predicted label")
-    ax.set_ylabel("True label")
-    plt.tight_layout()
-    confusion_path = figures_dir / "classification_confusion_matrix.png"
-    fig.savefig(confusion_path, dpi=150)
-    plt.close(fig)
-
-    models_dir = project_root / "models"
-    models_dir.mkdir(parents=True, exist_ok=True)
-    model_path = models_dir / "rf_classifier_medal.joblib"
-    joblib.dump(grid.best_estimator_, model_path)
+    settings = search_settings(params)
+    if strategy:
+        settings["strategy"] = strategy
+    # Part of the CV cache key: two policies can build the same transformers with other columns.
+    settings["encodings"] = encodings
+    cache = CVCache() if settings.get("cv_cache", True) else None
+    with instrument("training.search", rows_in=len(X_train), strategy=settings.get("strategy")):
+        search = run_search(pipeline, X_train, y_train, settings, random_state, cache=cache)
+        record_search(search, reports_dir / "search_history.csv")
+    best_model = search.best_estimator
+
+    with instrument("training.evaluate", rows_in=len(X_test)):
+        y_pred = best_model.predict(X_test)
+        report = classification_report(y_test, y_pred, output_dict=True)
+
+    with instrument("training.plot_confusion"):
+        cm = confusion_matrix(y_test, y_pred, labels=best_model.named_steps["clf"].classes_)
+        disp = ConfusionMatrixDisplay(cm, display_labels=best_model.named_steps["clf"].classes_)
+        fig, ax = plt.subplots(figsize=(6, 5))
+        disp.plot(ax=ax, colorbar=False)
+        ax.set_title("Confusion Matrix - Medal Prediction")
+        ax.set_xlabel("Predicted label")
+        ax.set_ylabel("True label")
+        plt.tight_layout()
+        confusion_path = figures_dir / "classification_confusion_matrix.png"
+        fig.savefig(confusion_path, dpi=150)
+        plt.close(fig)
+
+    with instrument("training.save"):
+        models_dir = project_root / "models"
+        models_dir.mkdir(parents=True, exist_ok=True)
+        model_path = models_dir / "rf_classifier_medal.joblib"
+        joblib.dump(best_model, model_path)
+
+    # Array-based copy for serving; it must score the test split exactly like the pipeline.
+    with instrument("training.compact_export", rows_in=len(X_test)):
+        compact = export_forest(best_model)
+        if not np.array_equal(compact.predict_proba(X_test), best_model.predict_proba(X_test)):
+            raise RuntimeError("Compact forest export does not reproduce predict_proba.")
+        compact_path = models_dir / "rf_classifier_medal.compact.joblib"
+        joblib.dump(compact, compact_path)
 
     metrics_path = reports_dir / "classification_metrics.csv"
     pd.DataFrame(report).to_csv(metrics_path)
 
     return model_path, {
-        "best_params": grid.best_params_,
+        "best_params": search.best_params,
+        "search": search.summary(),
+        "feature_width": feature_width,
+        "encodings": encodings,
+        "compact_model_path": compact_path,
         "metrics_path": metrics_path,
         "confusion_matrix_path": confusion_path,
         "report": report,
@@ -145,6 +220,16 @@ def run_training() -> Tuple[Path, Dict]:
 
 
 if __name__ == "__main__":
-    path, info = run_training()
+    import argparse
+
+    from .search import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Train the medal classifier")
+    parser.add_argument("--strategy", choices=STRATEGIES, default=None, help="Override classification.search.strategy")
+    arguments = parser.parse_args()
+
+    path, info = run_training(strategy=arguments.strategy)
     print(f"Model saved to {path}")
     print(f"Best params: {info['best_params']}")
+    print(f"Search: {info['search']['strategy']} - {info['search']['n_fits']} fits in {info['search']['seconds']:.1f}s")
+    print(f"Feature matrix width: {info['feature_width']}")
@@ -1,30 +1,319 @@
-"""End-to-end pipeline runner for the Olympic ML project."""
+"""End-to-end pipeline runner for the Olympic ML project.
+
+The pipeline is described as a small DAG of stages. Each stage declares the
+files and configuration sections it reads and the files it writes; a stage is
+skipped when the hash of its inputs matches the cached manifest and its
+outputs are untouched. Independent stages (clustering and classification once
+preprocessing is done) run concurrently in separate processes.
+
+``--metrics`` records the wall time, CPU time, peak memory and row counts of
+every stage and sub-step as JSON lines (see ``src.instrumentation``);
+``--profile`` and ``--tracemalloc`` run the named steps under ``cProfile`` or
+``tracemalloc`` and write the results to ``reports/profiles/``.
+"""
 
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import yaml
 
+from .data_prep.load_data import CONFIG_PATH as DATA_CONFIG_PATH
+from .data_prep.load_data import raw_dataset_paths, read_config
 from .data_prep.preprocess import run_preprocessing
-from .models.train_clustering import run_clustering
+from .data_prep.storage import dataset_path
+from .features.feature_store import FEATURES_NAME, HOSTS_PATH
+from .instrumentation import DEFAULT_PROFILE_DIR, configure, format_summary, read_metrics
+from .models.train_clustering import CONFIG_MODEL, run_clustering
 from .models.train_medal_predictor import run_training
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = PROJECT_ROOT / ".cache" / "run_all"
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+DEFAULT_METRICS_PATH = DEFAULT_PROFILE_DIR / "stages.jsonl"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A pipeline step with its declared inputs and outputs."""
+
+    name: str
+    func: Callable[[], object]
+    inputs: Tuple[Path, ...]
+    outputs: Tuple[Path, ...]
+    config: Tuple[Tuple[Path, str], ...] = ()
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageReport:
+    name: str
+    status: str
+    seconds: float = 0.0
+    detail: List[str] = field(default_factory=list)
+
+
+def _python_files(directory: Path) -> Tuple[Path, ...]:
+    return tuple(sorted(directory.glob("*.py")))
+
+
+def build_stages(incremental: bool = False, chunksize: Optional[int] = None) -> List[Stage]:
+    """Declare the pipeline stages in dependency order."""
+    data_cfg = read_config()
+    processed_dir = PROJECT_ROOT / data_cfg.get("processed_dir", "data/processed")
+    models_dir = PROJECT_ROOT / "models"
+    reports_dir = PROJECT_ROOT / "reports"
+    src_dir = PROJECT_ROOT / "src"
+
+    full_path = dataset_path(processed_dir, "olympic_full", data_cfg)
+    summary_path = dataset_path(processed_dir, "country_year_summary", data_cfg)
+    # Modules the model stages read their data through, and the storage settings they use.
+    data_modules = (
+        src_dir / "data_prep" / "load_data.py",
+        src_dir / "data_prep" / "storage.py",
+        src_dir / "data_prep" / "incremental.py",
+        src_dir / "instrumentation.py",
+    )
+    storage_config = (DATA_CONFIG_PATH, "storage")
+
+    return [
+        Stage(
+            name="preprocess",
+            func=partial(run_preprocessing, incremental=incremental, chunksize=chunksize),
+            inputs=tuple(raw_dataset_paths(data_cfg).values()) + _python_files(src_dir / "data_prep"),
+            outputs=(full_path, summary_path),
+            config=((DATA_CONFIG_PATH, "files"), (DATA_CONFIG_PATH, "schemas"), storage_config),
+        ),
+        Stage(
+            name="clustering",
+            func=run_clustering,
+            inputs=(summary_path, HOSTS_PATH, src_dir / "models" / "train_clustering.py")
+            + _python_files(src_dir / "features")
+            + data_modules,
+            outputs=(
+                processed_dir / "country_year_clusters.csv",
+                dataset_path(processed_dir, FEATURES_NAME, data_cfg),
+                models_dir / "kmeans_clusters.joblib",
+                reports_dir / "figures" / "clustering_k_sweep.csv",
+            ),
+            config=((CONFIG_MODEL, "clustering"), (CONFIG_MODEL, "features"), storage_config),
+            deps=("preprocess",),
+        ),
+        Stage(
+            name="training",
+            func=run_training,
+            # Every module of src/models (search, CV cache, encodings, compact export).
+            inputs=(full_path,) + _python_files(src_dir / "models") + data_modules,
+            outputs=(
+                models_dir / "rf_classifier_medal.joblib",
+                models_dir / "rf_classifier_medal.compact.joblib",
+                reports_dir / "classification_metrics.csv",
+            ),
+            config=((CONFIG_MODEL, "classification"), (CONFIG_MODEL, "global"), storage_config),
+            deps=("preprocess",),
+        ),
+    ]
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 of a file, or ``"missing"`` when it does not exist."""
+    if not path.exists():
+        return "missing"
+    digest = hashlib.sha256()
+    with path.open("rb") as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _config_section(path: Path, section: str) -> str:
+    with path.open("r", encoding="utf-8") as stream:
+        content = yaml.safe_load(stream) or {}
+    return json.dumps(content.get(section), sort_keys=True, default=str)
+
+
+def stage_key(stage: Stage) -> str:
+    """Hash every declared input of a stage (file contents and config sections)."""
+    digest = hashlib.sha256(stage.name.encode("utf-8"))
+    for path in stage.inputs:
+        digest.update(str(path).encode("utf-8"))
+        digest.update(file_digest(path).encode("utf-8"))
+    for path, section in stage.config:
+        digest.update(f"{path.name}:{section}".encode("utf-8"))
+        digest.update(_config_section(path, section).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_digests(stage: Stage) -> Dict[str, str]:
+    return {str(path): file_digest(path) for path in stage.outputs}
+
+
+def read_manifest() -> Dict[str, dict]:
+    if not MANIFEST_PATH.exists():
+        return {}
+    with MANIFEST_PATH.open("r", encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def write_manifest(manifest: Dict[str, dict]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    temp_path = MANIFEST_PATH.with_suffix(".json.tmp")
+    with temp_path.open("w", encoding="utf-8") as stream:
+        json.dump(manifest, stream, indent=2, sort_keys=True)
+    temp_path.replace(MANIFEST_PATH)
+
+
+def is_cached(stage: Stage, key: str, manifest: Dict[str, dict]) -> bool:
+    """A stage hits the cache when its key matches and its outputs are untouched."""
+    entry = manifest.get(stage.name)
+    if not entry or entry.get("key") != key:
+        return False
+    current = output_digests(stage)
+    return "missing" not in current.values() and current == entry.get("outputs")
+
+
+def describe_result(name: str, result: object) -> List[str]:
+    """Turn the return value of a stage into the log lines of the old runner."""
+    if name == "preprocess":
+        full_path, summary_path = result
+        return [f"Saved detailed dataset at {full_path}", f"Saved summary dataset at {summary_path}"]
+    if name == "clustering":
+        return [f"Saved clusters at {result}"]
+    if name == "training":
+        model_path, info = result
+        return [f"Saved classifier at {model_path}", f"Best params: {info['best_params']}"]
+    return [str(result)]
+
+
+def _run_stage(func: Callable[[], object]) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run_pipeline(
+    stages: Sequence[Stage],
+    force: Iterable[str] = (),
+    only: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+) -> List[StageReport]:
+    """Execute the DAG, running ready stages concurrently and skipping cached ones."""
+    by_name = {stage.name: stage for stage in stages}
+    forced = set(by_name) if "all" in set(force) else set(force)
+    selected = set(only) if only else set(by_name)
+    unknown = (forced | selected) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    manifest = read_manifest()
+    reports: Dict[str, StageReport] = {}
+    # Stages outside the selection are assumed to be up to date.
+    finished = {name for name in by_name if name not in selected}
+    pending = [stage for stage in stages if stage.name in selected]
+    running: Dict[Future, Tuple[Stage, str]] = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if any(reports.get(dep) and reports[dep].status in {"failed", "blocked"} for dep in stage.deps):
+                    reports[stage.name] = StageReport(stage.name, "blocked", detail=["upstream stage failed"])
+                    pending.remove(stage)
+                    continue
+                if not all(dep in finished for dep in stage.deps):
+                    continue
+                pending.remove(stage)
+                key = stage_key(stage)
+                if stage.name not in forced and is_cached(stage, key, manifest):
+                    reports[stage.name] = StageReport(stage.name, "cached")
+                    finished.add(stage.name)
+                    print(f"[{stage.name}] cache hit, skipped")
+                    continue
+                print(f"[{stage.name}] running...")
+                running[pool.submit(_run_stage, stage.func)] = (stage, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key = running.pop(future)
+                try:
+                    result, seconds = future.result()
+                except Exception as exc:
+                    reports[stage.name] = StageReport(stage.name, "failed", detail=[repr(exc)])
+                    print(f"[{stage.name}] failed: {exc!r}")
+                    continue
+                lines = describe_result(stage.name, result)
+                reports[stage.name] = StageReport(stage.name, "ran", seconds, lines)
+                for line in lines:
+                    print(f"    {line}")
+                manifest[stage.name] = {"key": key, "outputs": output_digests(stage)}
+                write_manifest(manifest)
+                finished.add(stage.name)
+
+    return [reports[stage.name] for stage in stages if stage.name in reports]
+
+
+def print_report(reports: Sequence[StageReport]) -> None:
+    print("Stage summary:")
+    for report in reports:
+        timing = f"{report.seconds:.1f}s" if report.status == "ran" else "-"
+        print(f"    {report.name:<12} {report.status:<8} {timing}")
+    hits = sum(report.status == "cached" for report in reports)
+    print(f"    cache hits: {hits}/{len(reports)}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Olympic ML pipeline")
+    parser.add_argument("--force", nargs="*", default=None, metavar="STAGE", help="Re-run these stages (no value: all)")
+    parser.add_argument("--only", nargs="+", metavar="STAGE", help="Run only these stages")
+    parser.add_argument("--jobs", type=int, default=None, help="Maximum number of concurrent stages")
+    parser.add_argument("--incremental", action="store_true", help="Use incremental preprocessing")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the results file by chunks of N rows")
+    parser.add_argument(
+        "--metrics", nargs="?", type=Path, const=DEFAULT_METRICS_PATH, default=None, metavar="PATH",
+        help=f"Append per-step metrics as JSON lines (default path: {DEFAULT_METRICS_PATH.relative_to(PROJECT_ROOT)})",
+    )
+    parser.add_argument("--profile", nargs="+", default=None, metavar="STEP", help="Run these steps under cProfile (name* matches a prefix)")
+    parser.add_argument("--tracemalloc", nargs="+", default=None, metavar="STEP", help="Trace the allocations of these steps")
+    arguments = parser.parse_args(argv)
 
-def main() -> None:
-    project_root = Path(__file__).resolve().parents[1]
-    print("[1/3] Running preprocessing...")
-    full_path, summary_path = run_preprocessing()
-    print(f"    Saved detailed dataset at {full_path}")
-    print(f"    Saved summary dataset at {summary_path}")
+    force = arguments.force if arguments.force else ["all"] if arguments.force is not None else []
+    stages = build_stages(incremental=arguments.incremental, chunksize=arguments.chunksize)
+    names = [stage.name for stage in stages]
+    for option, values in (("--force", [name for name in force if name != "all"]), ("--only", arguments.only or [])):
+        unknown = sorted(set(values) - set(names))
+        if unknown:
+            parser.error(f"{option}: unknown stage(s) {', '.join(unknown)} (choose from {', '.join(names)})")
 
-    print("[2/3] Training clustering model...")
-    clusters_path = run_clustering()
-    print(f"    Saved clusters at {clusters_path}")
+    metrics = arguments.metrics
+    if metrics is None and (arguments.profile or arguments.tracemalloc):
+        metrics = DEFAULT_METRICS_PATH
+    run_id = None
+    if metrics is not None:
+        # Set before the process pool starts so the stage workers inherit it.
+        run_id = configure(metrics, arguments.profile, arguments.tracemalloc)
 
-    print("[3/3] Training classification model...")
-    model_path, info = run_training()
-    print(f"    Saved classifier at {model_path}")
-    print(f"    Best params: {info['best_params']}")
+    reports = run_pipeline(
+        stages,
+        force=force,
+        only=arguments.only,
+        max_workers=arguments.jobs,
+    )
+    print_report(reports)
+    if run_id is not None:
+        print(f"Step metrics ({metrics}, run {run_id}):")
+        print(format_summary(read_metrics(metrics, run_id)))
+    return 1 if any(report.status in {"failed", "blocked"} for report in reports) else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Conversions JSON / XML / HTML vers CSV en streaming, à mémoire bornée.
+
+Les lecteurs historiques (``pd.read_json``, ``pd.read_xml``, ``pd.read_html``)
+chargent tout le fichier source en mémoire ; ``pd.read_html`` analyse même
+toutes les tables de la page avant d'en garder une seule. Ici :
+
+- le tableau JSON est décodé élément par élément (``JSONDecoder.raw_decode``) ;
+- le XML est lu avec ``iterparse`` et chaque enregistrement est libéré ;
+- l'extraction HTML s'arrête dès la fin de la table visée.
+
+Les enregistrements sont écrits en CSV par paquets de ``chunk_size`` lignes,
+si bien que le pic mémoire ne dépend plus de la taille du fichier source.
+Pour le JSON et le XML, une première passe relève l'union des clés, comme
+le faisait pandas : une clé qui n'apparaît que tardivement garde sa colonne.
+Les valeurs sont écrites telles qu'elles apparaissent dans la source (pas
+d'inférence de type globale) ; ``pd.read_csv`` les retype à la lecture.
+"""
+
+import json
+import time
+import xml.etree.ElementTree as ET
+from html.parser import HTMLParser
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 10_000
+BUFFER_SIZE = 1 << 16
+
+
+def iter_json_records(path, buffer_size=BUFFER_SIZE):
+    """Itère sur les éléments d'un tableau JSON sans charger tout le fichier."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as stream:
+        buffer = ''
+        position = 0
+        eof = False
+        started = False
+
+        def refill():
+            nonlocal buffer, position, eof
+            chunk = stream.read(buffer_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                if buffer[position] == ',' and not started:
+                    raise ValueError("Tableau JSON attendu")
+                position += 1
+            if position >= len(buffer):
+                if eof:
+                    raise ValueError("Fin de fichier inattendue dans le tableau JSON")
+                refill()
+                continue
+
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Le fichier JSON doit contenir un tableau d'enregistrements")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == ']':
+                return
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                refill()
+                continue
+
+            # Une valeur en fin de tampon peut être tronquée (ex. un nombre).
+            if not eof and buffer[end:].strip() == '':
+                refill()
+                continue
+
+            position = end
+            yield value
+
+
+def iter_xml_records(path):
+    """Itère sur les enfants directs de la racine XML (un dict par enregistrement)."""
+    context = ET.iterparse(path, events=('start', 'end'))
+    _, root = next(context)
+    depth = 0
+    for event, element in context:
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            record = dict(element.attrib)
+            for child in element:
+                record[child.tag] = child.text
+            yield record
+            root.clear()
+
+
+class _TableExtractor(HTMLParser):
+    """Collecte les lignes de la ``table_index``-ième table d'une page HTML."""
+
+    def __init__(self, table_index=0):
+        super().__init__(convert_charrefs=True)
+        self.table_index = table_index
+        self.tables_seen = 0
+        self.depth = 0
+        self.active = False
+        self.done = False
+        self.header = None
+        self.rows = []
+        self._row = None
+        self._cell = None
+        self._row_is_header = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'table':
+            if self.active:
+                self.depth += 1
+            elif self.tables_seen == self.table_index and not self.done:
+                self.active = True
+                self.depth = 1
+            self.tables_seen += 1
+            return
+        if not self.active or self.depth != 1:
+            return
+        if tag == 'tr':
+            self._row = []
+            self._row_is_header = True
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+            if tag == 'td':
+                self._row_is_header = False
+
+    def handle_endtag(self, tag):
+        if not self.active:
+            return
+        if tag == 'table':
+            self.depth -= 1
+            if self.depth == 0:
+                self.active = False
+                self.done = True
+            return
+        if self.depth != 1:
+            return
+        if tag in ('td', 'th') and self._cell is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            if self.header is None and self._row_is_header and not self.rows:
+                self.header = self._row
+            else:
+                self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self.active and self._cell is not None:
+            self._cell.append(data)
+
+
+def iter_html_table_rows(path, table_index=0, buffer_size=BUFFER_SIZE):
+    """Itère sur les lignes (dicts) d'une table HTML et s'arrête après celle-ci."""
+    parser = _TableExtractor(table_index)
+    with open(path, 'r', encoding='utf-8') as stream:
+        while not parser.done:
+            chunk = stream.read(buffer_size)
+            if not chunk:
+                parser.close()
+                break
+            parser.feed(chunk)
+            yield from _drain_rows(parser)
+    yield from _drain_rows(parser)
+    if parser.header is None and parser.tables_seen <= table_index:
+        raise ValueError("Aucune table trouvée dans le fichier HTML")
+
+
+def _drain_rows(parser):
+    """Lignes lues depuis le dernier appel ; les cellules sans colonne lèvent ``ValueError``."""
+    rows, parser.rows = parser.rows, []
+    for row in rows:
+        header = parser.header or [str(i) for i in range(len(row))]
+        if len(row) > len(header):
+            raise ValueError(
+                f"Ligne HTML de {len(row)} cellules pour un en-tête de {len(header)} colonnes : {row[len(header):]}"
+            )
+        yield dict(zip(header, row))
+
+
+def collect_columns(records):
+    """Union des clés des enregistrements, dans l'ordre de première apparition (comme pandas)."""
+    columns = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    return list(columns)
+
+
+def write_csv_chunks(records, output_path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """Écrit un itérable de dicts en CSV par paquets ; renvoie (lignes, colonnes).
+
+    L'en-tête est ``columns`` ou, à défaut, les clés du premier paquet. Une
+    clé absente de l'en-tête lève ``ValueError`` au lieu d'être ignorée.
+    """
+    output_path = Path(output_path)
+    temp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    columns = list(columns) if columns is not None else None
+    written = False
+    total = 0
+    chunk = []
+
+    def flush():
+        nonlocal columns, written
+        if columns is None:
+            frame = pd.DataFrame.from_records(chunk)
+            columns = list(frame.columns)
+        else:
+            extra = {key for record in chunk for key in record}.difference(columns)
+            if extra:
+                raise ValueError(f"Colonnes absentes de l'en-tête CSV: {sorted(map(str, extra))}")
+            frame = pd.DataFrame.from_records(chunk, columns=columns)
+        frame.to_csv(temp_path, mode='a' if written else 'w', header=not written, index=False)
+        written = True
+        chunk.clear()
+
+    try:
+        for record in records:
+            chunk.append(record)
+            total += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk or not written:
+            flush()
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    temp_path.replace(output_path)
+    return total, len(columns)
+
+
+def convert_json_streaming(source, output, chunk_size=DEFAULT_CHUNK_SIZE):
+    columns = collect_columns(iter_json_records(source))
+    return write_csv_chunks(iter_json_records(source), output, chunk_size, columns)
+
+
+def convert_xml_streaming(source, output, chunk_size=DEFAULT_CHUNK_SIZE):
+    columns = collect_columns(iter_xml_records(source))
+    return write_csv_chunks(iter_xml_records(source), output, chunk_size, columns)
+
+
+def convert_html_streaming(source, output, chunk_size=DEFAULT_CHUNK_SIZE, table_index=0):
+    return write_csv_chunks(iter_html_table_rows(source, table_index), output, chunk_size)
+
+
+# ----------------------------------------------------------------------
+# Benchmark : lecteurs historiques de convert_all_to_csv vs streaming
+# ----------------------------------------------------------------------
+
+LEGACY_READERS = {
+    'json': lambda source: pd.read_json(source),
+    'xml': lambda source: pd.read_xml(source),
+    'html': lambda source: pd.read_html(source)[0],
+}
+
+STREAMING_CONVERTERS = {
+    'json': convert_json_streaming,
+    'xml': convert_xml_streaming,
+    'html': convert_html_streaming,
+}
+
+
+def _measure(kind, mode, source, output):
+    """Exécuté dans un processus neuf : renvoie (durée, pic RSS en Mo, lignes)."""
+    import resource
+
+    start = time.perf_counter()
+    if mode == 'legacy':
+        df = LEGACY_READERS[kind](source)
+        df.to_csv(output, index=False)
+        rows = len(df)
+    else:
+        rows, _ = STREAMING_CONVERTERS[kind](source, output)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, peak_mb, rows
+
+
+def benchmark_streaming(sources, output_dir):
+    """Compare durée et pic RSS des deux chemins, chacun dans un processus dédié."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for kind, source in sources.items():
+        for mode in ('legacy', 'streaming'):
+            output = output_dir / f"{Path(source).stem}_{mode}.csv"
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                elapsed, peak_mb, rows = executor.submit(_measure, kind, mode, str(source), str(output)).result()
+            results.append({'source': str(source), 'mode': mode, 'seconds': elapsed, 'peak_rss_mb': peak_mb, 'rows': rows})
+            print(f"{Path(source).name:<24} {mode:<10} {elapsed:>8.2f}s {peak_mb:>9.1f} Mo {rows:>9} lignes")
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark des conversions streaming")
+    parser.add_argument('--json', default='data/olympic_athletes.json')
+    parser.add_argument('--xml', default='data/olympic_hosts.xml')
+    parser.add_argument('--html', default='data/olympic_results.html')
+    parser.add_argument('--output-dir', default='csv/benchmark')
+    arguments = parser.parse_args()
+
+    available = {kind: path for kind, path in (('json', arguments.json), ('xml', arguments.xml), ('html', arguments.html))
+                 if Path(path).exists()}
+    benchmark_streaming(available, arguments.output_dir)